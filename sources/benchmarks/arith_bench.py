@@ -0,0 +1,59 @@
+"""
+    arith_bench.py [COUNT]
+
+    Measure shifting COUNT :class:`pyjalali.datetime.datetime` objects by
+    small and large :class:`python:datetime.timedelta` values and subtracting
+    them from each other, against the same on standard
+    :class:`python:datetime.datetime`.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import datetime as std
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.datetime import datetime, j2g
+
+from timer import best_of
+
+
+def shift(values, delta):
+    for v in values:
+        v + delta
+
+
+def difference(values, other):
+    for v in values:
+        v - other
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: arith_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    rand = random.Random(1348)
+    values = [datetime(rand.randint(1300, 1500), rand.randint(1, 12),
+                       rand.randint(1, 29), rand.randint(0, 23),
+                       rand.randint(0, 59), rand.randint(0, 59))
+              for i in range(n)]
+    gregorian = [j2g(v) for v in values]
+
+    rows = (('+ 90 minutes', shift, std.timedelta(minutes=90)),
+            ('+ 45 days', shift, std.timedelta(days=45, seconds=7)),
+            ('- 100 years', shift, std.timedelta(days=-36524)),
+            ('- datetime', difference, None))
+    print('%d datetimes' % n)
+    print('%-14s %14s %14s' % ('', 'pyjalali', 'standard'))
+    for name, func, arg in rows:
+        print('%-14s %11.0f ns %11.0f ns' % (
+            name, best_of(3, func, values, arg or values[0]) / n * 1e9,
+            best_of(3, func, gregorian, arg or gregorian[0]) / n * 1e9))
+
+
+if __name__ == '__main__':
+    main()
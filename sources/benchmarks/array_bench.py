@@ -0,0 +1,77 @@
+"""
+    array_bench.py [COUNT]
+
+    Compare COUNT dates held in a list of :class:`pyjalali.datetime.date`
+    objects against :class:`pyjalali.vector.JalaliDateArray`: memory, adding
+    a timedelta, comparing, extracting years and formatting.  Memory is
+    measured by :mod:`tracemalloc`, so only on Python 3.  Run from *sources*
+    directory.
+"""
+
+from __future__ import print_function
+import datetime as std
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.datetime import date
+from pyjalali.vector import JalaliDateArray
+
+from timer import best_of
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def memory(factory):
+    if tracemalloc is None:
+        return float('nan')
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objs = factory()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del objs
+    return used
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: array_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    rand = random.Random(1348)
+    ordinals = [rand.randint(700000, 750000) for i in range(n)]
+    dates = [date.fromordinal(o) for o in ordinals]
+    array = JalaliDateArray(ordinals)
+    delta = std.timedelta(days=45)
+    pivot = date(1392, 1, 1)
+
+    rows = [
+        ('bytes/date', memory(lambda: [date.fromordinal(o) for o in ordinals])
+         / n, memory(lambda: JalaliDateArray(ordinals)) / n),
+    ]
+    for name, scalar, vector in (
+            ('+ timedelta', lambda: [d + delta for d in dates],
+             lambda: array + delta),
+            ('< date', lambda: [d < pivot for d in dates],
+             lambda: array < pivot),
+            ('year', lambda: [d.year for d in dates], lambda: array.year),
+            ('strftime', lambda: [d.strftime('%Y/%m/%d') for d in dates],
+             lambda: array.strftime('%Y/%m/%d'))):
+        rows.append((name + ' ns', best_of(3, scalar) / n * 1e9,
+                     best_of(3, vector) / n * 1e9))
+
+    print('%d dates' % n)
+    print('%-14s %12s %12s' % ('', 'list', 'array'))
+    for name, scalar, vector in rows:
+        print('%-14s %12.1f %12.1f' % (name, scalar, vector))
+
+
+if __name__ == '__main__':
+    main()
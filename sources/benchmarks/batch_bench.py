@@ -0,0 +1,62 @@
+"""
+    batch_bench.py [COUNT]
+
+    Compare converting COUNT timestamps by :func:`pyjalali.jtime.jgmtime`
+    and :func:`pyjalali.jtime.jlocaltime` one at a time against their array
+    variants :func:`~pyjalali.jtime.jgmtime_n` and
+    :func:`~pyjalali.jtime.jlocaltime_n`, and updating as many structures by
+    :func:`pyjalali.jalali.jalali_update` against
+    :func:`~pyjalali.jalali.jalali_update_n`.  Set ``PYJALALI_BACKEND`` to
+    ``ctypes`` to measure libjalali calls.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import random
+import sys
+from ctypes import c_longlong
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.jalali import jalali_update, jalali_update_n
+from pyjalali.jtime import jgmtime, jgmtime_n, jlocaltime, jlocaltime_n
+
+from timer import best_of
+
+
+def one_by_one(func, values):
+    for v in values:
+        func(v)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: batch_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    rand = random.Random(1348)
+    # within 32 bits, scalar calls of ctypes backend pass int time_t
+    pts = [rand.randint(-2 ** 31, 2 ** 31 - 1) for i in range(n)]
+    ts = (c_longlong * n)(*pts)
+    jtms = jgmtime_n(ts)
+
+    rows = [
+        ('gmtime', best_of(3, one_by_one, jgmtime, pts),
+         best_of(3, jgmtime_n, ts, jtms)),
+        ('localtime', best_of(3, one_by_one, jlocaltime, pts),
+         best_of(3, jlocaltime_n, ts, jtms)),
+        ('update', best_of(3, one_by_one, jalali_update, jtms),
+         best_of(3, jalali_update_n, jtms)),
+    ]
+
+    print('%d values, %s backend' % (n, os.environ.get('PYJALALI_BACKEND',
+                                                        'python')))
+    print('%-10s %14s %14s %9s' % ('', 'one by one', 'batch', 'speedup'))
+    for name, scalar, batch in rows:
+        print('%-10s %11.1f ns %11.1f ns %8.1fx' % (
+            name, scalar / n * 1e9, batch / n * 1e9, scalar / batch))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+    cache_bench.py [COUNT [DAYS]]
+
+    Measure :func:`pyjalali.datetime.g2j` and :func:`~pyjalali.datetime.j2g`
+    of COUNT datetimes falling on DAYS distinct days, with days cache of
+    converters disabled and of default size (see
+    :func:`~pyjalali.datetime.set_conversion_cache_size`).  Run from
+    *sources* directory.
+"""
+
+from __future__ import print_function
+import datetime as std
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.datetime import (CONVERSION_CACHE_SIZE, conversion_cache_info,
+                               g2j, j2g, set_conversion_cache_size)
+
+from timer import best_of
+
+
+def convert(func, values):
+    for v in values:
+        func(v)
+
+
+def main():
+    if len(sys.argv) > 3:
+        print('usage: cache_bench.py [COUNT [DAYS]]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+
+    rand = random.Random(1348)
+    start = std.datetime(2010, 1, 1)
+    offsets = [rand.randint(0, 20000) for i in range(days)]
+    gregorian = [start + std.timedelta(days=rand.choice(offsets),
+                                       seconds=rand.randint(0, 86399))
+                 for i in range(n)]
+    jalali = [g2j(d) for d in gregorian]
+
+    print('%d values on %d days' % (n, days))
+    print('%-6s %14s %14s' % ('', 'no cache', 'cached'))
+    for name, func, values in (('g2j', g2j, gregorian),
+                               ('j2g', j2g, jalali)):
+        row = []
+        for size in (0, CONVERSION_CACHE_SIZE):
+            set_conversion_cache_size(size)
+            row.append(best_of(3, convert, func, values) / n * 1e9)
+        print('%-6s %11.1f ns %11.1f ns' % (name, row[0], row[1]))
+    info = conversion_cache_info()
+    print('last run: %d hits, %d misses' % (info.hits, info.misses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+    format_bench.py [COUNT]
+
+    Compare formatting COUNT :class:`pyjalali.datetime.datetime` objects
+    through libjalali's :func:`jstrftime` against formats compiled by
+    :mod:`pyjalali.formatting`, one at a time and by
+    :func:`~pyjalali.formatting.format_many`.  libjalali is needed for the
+    first column.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import sys
+from ctypes import byref, create_string_buffer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali import jstr
+from pyjalali.datetime import datetime
+from pyjalali.formatting import format_many
+
+from timer import best_of
+
+FORMATS = ('%Y-%m-%d %H:%M:%S', '%a %d %b %Y', '%E')
+
+
+def with_libjalali(fmt, values):
+    fmt = fmt.encode('utf-8') if not isinstance(fmt, bytes) else fmt
+    for v in values:
+        n = len(fmt) << 8
+        res = create_string_buffer(n)
+        jstr._jstrftime(res, n, fmt, byref(v.jtm))
+        res.value
+
+
+def one_by_one(fmt, values):
+    for v in values:
+        v.strftime(fmt)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: format_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+    values = [datetime(1300 + i % 200, 1 + i % 12, 1 + i % 29, i % 24,
+                       i % 60, i % 60) for i in range(n)]
+
+    print('%d datetimes' % n)
+    print('%-20s %13s %13s %13s' % ('format', 'libjalali', 'strftime',
+                                    'format_many'))
+    for fmt in FORMATS:
+        try:
+            c = '%10.0f ns' % (best_of(3, with_libjalali, fmt, values) / n *
+                               1e9)
+        except OSError:
+            c = 'n/a'
+        print('%-20s %13s %10.0f ns %10.0f ns' % (
+            fmt, c, best_of(3, one_by_one, fmt, values) / n * 1e9,
+            best_of(3, format_many, fmt, values) / n * 1e9))
+    print('%-20s %13s %10.0f ns' % (
+        'isoformat()', '', best_of(3, lambda: [v.isoformat()
+                                              for v in values]) / n * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+    import_bench.py [RUNS]
+
+    Measure import time of pyjalali modules, each in RUNS fresh interpreters,
+    by ``python -X importtime`` (Python 3.7 and later).  Median of total
+    microseconds of each module is shown, and top modules imported on the
+    way by their own time for slowest one.  Byte compile modules first, by
+    ``python -m compileall pyjalali``, or compiling them is measured too.
+    Set ``PYJALALI_BACKEND`` to ``ctypes`` to measure that backend.  Run
+    from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import subprocess
+import sys
+
+SOURCES = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('pyjalali', 'pyjalali.jtime', 'pyjalali.jstr', 'pyjalali.datetime',
+           'pyjalali.convert')
+
+
+def import_times(module):
+    """Return {module: (self, cumulative)} microseconds of importing
+    `module` in a new interpreter."""
+    env = dict(os.environ, PYTHONPATH=SOURCES)
+    err = subprocess.Popen([sys.executable, '-X', 'importtime', '-c',
+                            'import %s' % module], env=env,
+                           stderr=subprocess.PIPE).communicate()[1]
+    times = {}
+    for line in err.decode().splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, total, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(total))
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: import_bench.py [RUNS]')
+        sys.exit(1)
+    if sys.version_info < (3, 7):
+        print('import_bench.py needs Python 3.7 or later')
+        sys.exit(1)
+    runs = int(sys.argv[1]) if len(sys.argv) == 2 else 9
+
+    print('%d runs, %s backend' % (runs, os.environ.get('PYJALALI_BACKEND',
+                                                        'python')))
+    slowest = None
+    for module in MODULES:
+        results = [import_times(module) for i in range(runs)]
+        total = median(r[module][1] for r in results)
+        print('%-20s %8d us' % (module, total))
+        if slowest is None or total > slowest[1]:
+            slowest = module, total, results
+    module, total, results = slowest
+    own = dict((name, median(r.get(name, (0, 0))[0] for r in results))
+               for name in results[0])
+    print('\nslowest imports of %s:' % module)
+    for name in sorted(own, key=own.get, reverse=True)[:10]:
+        print('  %-28s %8d us' % (name, own[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+    object_bench.py [COUNT]
+
+    Measure memory per :class:`pyjalali.datetime.date` and
+    :class:`pyjalali.datetime.datetime` object, holding COUNT of them, and
+    cost of creating them and reading their fields.  Memory is measured by
+    :mod:`tracemalloc`, so only on Python 3.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.datetime import date, datetime
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def make_dates(n):
+    return [date(1300 + i % 200, 1 + i % 12, 1 + i % 29) for i in range(n)]
+
+
+def make_datetimes(n):
+    return [datetime(1300 + i % 200, 1 + i % 12, 1 + i % 29, i % 24, i % 60,
+                     i % 60, i % 1000000) for i in range(n)]
+
+
+def bytes_per_object(factory, n):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objs = factory(n)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del objs
+    # the list holding objects isn't counted
+    return (used - sys.getsizeof([None] * n)) / float(n)
+
+
+def per_call(stmt, setup_globals, number=200000):
+    timer = timeit.Timer(stmt, globals=setup_globals) \
+        if sys.version_info >= (3, 5) else \
+        timeit.Timer(stmt, 'from __main__ import d, dt, date, datetime')
+    return min(timer.repeat(3, number)) / number * 1e9
+
+
+d = date(1392, 9, 2)
+dt = datetime(1392, 9, 2, 23, 46, 10, 703498)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: object_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    for name, factory in (('date', make_dates),
+                          ('datetime', make_datetimes)):
+        size = bytes_per_object(factory, n)
+        print('%-9s %s bytes per object' % (
+            name, 'n/a' if size is None else '%.0f' % size))
+
+    g = {'d': d, 'dt': dt, 'date': date, 'datetime': datetime}
+    for stmt in ('date(1392, 9, 2)',
+                 'datetime(1392, 9, 2, 23, 46, 10, 703498)',
+                 'd.year', 'd.month', 'd.day', 'd.weekday()',
+                 'dt.year', 'dt.day', 'dt.hour', 'dt.second',
+                 'dt.microsecond', 'dt.date()'):
+        print('%-45s %9.1f ns' % (stmt, per_call(stmt, g)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+    parse_bench.py [COUNT]
+
+    Compare parsing COUNT date strings of one format through libjalali's
+    :func:`jstrptime` against formats compiled by :mod:`pyjalali.formatting`,
+    into :class:`pyjalali.datetime.datetime` objects and into columns.
+    libjalali is needed for the first column.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import sys
+from ctypes import byref
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali import jstr
+from pyjalali.datetime import datetime
+from pyjalali.formatting import parse_many
+from pyjalali.types import struct_jtm
+
+from timer import best_of
+
+FORMATS = ('%Y-%m-%d %H:%M:%S', '%d %B %Y')
+
+
+def with_libjalali(fmt, lines):
+    fmt = fmt.encode('utf-8')
+    for line in lines:
+        jtm = struct_jtm()
+        jstr._jstrptime(line.encode('utf-8'), fmt, byref(jtm))
+        datetime(jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday, jtm.tm_hour,
+                 jtm.tm_min, jtm.tm_sec)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: parse_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+    values = [datetime(1300 + i % 200, 1 + i % 12, 1 + i % 29, i % 24,
+                       i % 60, i % 60) for i in range(n)]
+
+    print('%d lines' % n)
+    print('%-20s %13s %13s %13s' % ('format', 'libjalali', 'datetimes',
+                                    'columns'))
+    for fmt in FORMATS:
+        lines = [v.strftime(fmt) for v in values]
+        try:
+            c = '%10.0f ns' % (best_of(3, with_libjalali, fmt, lines) / n *
+                               1e9)
+        except OSError:
+            c = 'n/a'
+        print('%-20s %13s %10.0f ns %10.0f ns' % (
+            fmt, c, best_of(3, parse_many, fmt, lines) / n * 1e9,
+            best_of(3, parse_many, fmt, lines, True) / n * 1e9))
+
+
+if __name__ == '__main__':
+    main()
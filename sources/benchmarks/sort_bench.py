@@ -0,0 +1,83 @@
+"""
+    sort_bench.py [COUNT]
+
+    Measure sorting, deduplicating by a set and bisecting COUNT
+    :class:`pyjalali.datetime.datetime` objects, naive and aware, against
+    standard datetimes of same instants and tuples of their fields.  Run from
+    *sources* directory.
+"""
+
+from __future__ import print_function
+import bisect
+import datetime as std
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.datetime import g2j
+
+from timer import best_of
+
+
+class _fixed(std.tzinfo):
+    def __init__(self, minutes):
+        self._offset = std.timedelta(minutes=minutes)
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return std.timedelta(0)
+
+
+def sort(values):
+    sorted(values)
+
+
+def dedup(values):
+    set(values)
+
+
+def bisect_all(values, probes):
+    bisect_left = bisect.bisect_left
+    for v in probes:
+        bisect_left(values, v)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: sort_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    rand = random.Random(1348)
+    start = std.datetime(1970, 1, 1)
+    zones = [_fixed(210), _fixed(270)]
+    naive = [start + std.timedelta(seconds=rand.randint(0, 2 ** 31))
+             for i in range(n)]
+    aware = [d.replace(tzinfo=rand.choice(zones)) for d in naive]
+
+    print('%d values' % n)
+    print('%-14s %12s %12s %12s' % ('', 'tuple', 'datetime', 'pyjalali'))
+    for name, gregorian in (('naive', naive), ('aware', aware)):
+        tuples = [d.timetuple()[:6] + (d.microsecond,) for d in gregorian]
+        jalali = [g2j(d) for d in gregorian]
+        for op in ('sort', 'set', 'bisect'):
+            row = []
+            for values in (tuples, gregorian, jalali):
+                if op == 'sort':
+                    e = best_of(3, sort, values)
+                elif op == 'set':
+                    e = best_of(3, dedup, values)
+                else:
+                    ordered = sorted(values)
+                    e = best_of(3, bisect_all, ordered, values)
+                row.append(e / n * 1e9)
+            print('%-14s %9.0f ns %9.0f ns %9.0f ns' % (
+                '%s %s' % (name, op), row[0], row[1], row[2]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,494 @@
+"""
+    suite.py [-o FILE] [-k WORD] [--runs N] [--quick]
+    suite.py --compare OLD.json NEW.json
+
+    Run benchmarks of pyjalali hot paths and write their results as JSON, to
+    compare results of two commits later by ``--compare``.  Each benchmark
+    is run RUNS times over a fixed set of values; median, minimum and
+    maximum time per operation are kept.  Memory is kept as bytes per
+    object, measured by :mod:`tracemalloc` so only on Python 3, and import
+    time by :mod:`import_bench` in fresh interpreters, on Python 3.7 and
+    later.  ``-k`` runs only benchmarks whose names contain WORD.  Set
+    ``PYJALALI_BACKEND`` to ``ctypes`` to measure libjalali calls.  Run from
+    *sources* directory.
+
+    Shared values stay between 1970 and 2037, so commits with 32-bit
+    ``time_t`` and no conversion of dates before Epoch are measured too.
+    Benchmarks of wider ranges or of modules a commit lacks are skipped
+    there.
+"""
+
+from __future__ import print_function
+import argparse
+import datetime as std
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+SOURCES = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SOURCES)
+
+from pyjalali.datetime import date, datetime, datetime_from_ts, g2j, j2g
+from pyjalali.jalali import jalali_update
+from pyjalali.types import struct_jtm
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# values each timing benchmark works on
+COUNT = 10000
+
+_benchmarks = []
+
+
+def benchmark(unit='ns'):
+    """Register decorated function as benchmark.  Timing ones return a
+    function doing COUNT operations, or it and number of operations it does,
+    others return measured value in `unit` themselves."""
+    def register(func):
+        _benchmarks.append((func.__name__.replace('_', '.', 1), func, unit))
+        return func
+    return register
+
+
+def _values(first=1970, years=67, seed=1348):
+    """Return random Gregorian datetimes in `years` years from start of
+    `first`, same ones on each run."""
+    rand = random.Random(seed)
+    start = std.datetime(first, 1, 1)
+    return [start + std.timedelta(seconds=rand.randint(0, years * 365 * 86400),
+                                  microseconds=rand.randint(0, 999999))
+            for i in range(COUNT)]
+
+
+def _supported(func, *args):
+    """Return whether `func` accepts `args`, for benchmarks of ranges older
+    commits reject."""
+    try:
+        func(*args)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+_gregorian = _values()
+_jalali = [g2j(d) for d in _gregorian]
+
+
+@benchmark()
+def construct_date():
+    fields = [(d.year, d.month, d.day) for d in _jalali]
+    return lambda: [date(y, m, d) for y, m, d in fields]
+
+
+@benchmark()
+def construct_datetime():
+    fields = [(d.year, d.month, d.day, d.hour, d.minute, d.second,
+               d.microsecond) for d in _jalali]
+    return lambda: [datetime(*f) for f in fields]
+
+
+@benchmark()
+def convert_g2j():
+    return lambda: [g2j(d) for d in _gregorian]
+
+
+@benchmark()
+def convert_j2g():
+    return lambda: [j2g(d) for d in _jalali]
+
+
+@benchmark()
+def convert_g2j_wide():
+    values = _values(1900, 200)
+    if not _supported(lambda: [g2j(d) for d in values]):
+        return None
+    return lambda: [g2j(d) for d in values]
+
+
+@benchmark()
+def convert_j2g_wide():
+    values = _values(1900, 200)
+    if not _supported(lambda: [j2g(d) for d in [g2j(d) for d in values]]):
+        return None
+    values = [g2j(d) for d in values]
+    return lambda: [j2g(d) for d in values]
+
+
+@benchmark()
+def format_strftime():
+    return lambda: [d.strftime('%Y/%m/%d %H:%M:%S %a') for d in _jalali]
+
+
+@benchmark()
+def format_isoformat():
+    return lambda: [d.isoformat() for d in _jalali]
+
+
+@benchmark()
+def parse_strptime():
+    lines = [d.strftime('%Y/%m/%d %H:%M:%S') for d in _jalali]
+    strptime = datetime.strptime
+    return lambda: [strptime(s, '%Y/%m/%d %H:%M:%S') for s in lines]
+
+
+def _timestamps(low=0, high=2 ** 31 - 1):
+    return [random.Random(i).uniform(low, high) for i in range(COUNT)]
+
+
+def _wide_timestamps():
+    """Return timestamps of about 1425 to 2514, None if they are not read
+    right, as with 32-bit time_t."""
+    epoch = std.datetime(1970, 1, 1)
+    for ts in (-2 ** 34, 2 ** 34):
+        if not _supported(j2g, datetime_from_ts(ts, False)):
+            return None
+        if j2g(datetime_from_ts(ts, False)) != (
+                epoch + std.timedelta(seconds=ts)):
+            return None
+    return _timestamps(-2 ** 34, 2 ** 34)
+
+
+@benchmark()
+def timestamp_utc():
+    stamps = _timestamps()
+    return lambda: [datetime_from_ts(ts, False) for ts in stamps]
+
+
+@benchmark()
+def timestamp_local():
+    stamps = _timestamps()
+    return lambda: [datetime_from_ts(ts, True) for ts in stamps]
+
+
+@benchmark()
+def timestamp_utc_wide():
+    stamps = _wide_timestamps()
+    if stamps is None:
+        return None
+    return lambda: [datetime_from_ts(ts, False) for ts in stamps]
+
+
+@benchmark()
+def timestamp_local_wide():
+    stamps = _wide_timestamps()
+    if stamps is None:
+        return None
+    return lambda: [datetime_from_ts(ts, True) for ts in stamps]
+
+
+@benchmark()
+def timestamp_utc_us():
+    try:
+        from pyjalali.datetime import datetime_from_us
+    except ImportError:
+        return None
+    # int64 microseconds past 2038, as datetime64[us] values give them
+    stamps = [random.Random(i).randint(-2 ** 55, 2 ** 55)
+              for i in range(COUNT)]
+    return lambda: [datetime_from_us(us, False) for us in stamps]
+
+
+@benchmark()
+def arith_add_hours():
+    delta = std.timedelta(hours=5)
+    return lambda: [d + delta for d in _jalali]
+
+
+@benchmark()
+def arith_add_years():
+    delta = std.timedelta(days=36525)
+    return lambda: [d - delta for d in _jalali]
+
+
+@benchmark()
+def arith_difference():
+    pairs = list(zip(_jalali, _jalali[1:]))
+    return lambda: [a - b for a, b in pairs]
+
+
+@benchmark()
+def compare_sort():
+    return lambda: sorted(_jalali)
+
+
+@benchmark()
+def compare_set():
+    return lambda: set(_jalali)
+
+
+def _business_calendar():
+    try:
+        from pyjalali.business import BusinessCalendar
+    except ImportError:
+        return None
+    # about ten holidays a year, like official ones
+    rand = random.Random(1348)
+    first = date(1380, 1, 1).toordinal()
+    return BusinessCalendar(holidays=[
+        date.fromordinal(first + rand.randint(0, 40 * 365))
+        for i in range(400)])
+
+
+@benchmark()
+def business_offset():
+    cal = _business_calendar()
+    if cal is None:
+        return None
+    dates = [d.date() for d in _jalali]
+    return lambda: [cal.offset(d, 20) for d in dates]
+
+
+@benchmark()
+def business_count():
+    cal = _business_calendar()
+    if cal is None:
+        return None
+    pairs = list(zip([d.date() for d in _jalali], [d.date() for d in
+                                                   reversed(_jalali)]))
+    return lambda: [cal.count(a, b) for a, b in pairs]
+
+
+@benchmark()
+def calendar_year():
+    try:
+        from pyjalali.calendar import Calendar
+    except ImportError:
+        return None
+    cal = Calendar()
+    years = [d.year for d in _jalali[:100]]
+    return lambda: [cal.yeardatescalendar(y) for y in years], len(years)
+
+
+def _stamps():
+    return [random.Random(i).randint(-2 ** 31, 2 ** 31) for i in range(COUNT)]
+
+
+@benchmark()
+def period_month():
+    try:
+        from pyjalali.period import PeriodTable
+    except ImportError:
+        return None
+    table = PeriodTable('month')
+    stamps = _stamps()
+    return lambda: [table.bucket_id(ts) for ts in stamps]
+
+
+@benchmark()
+def period_month_array():
+    try:
+        import numpy
+        from pyjalali.period import PeriodTable
+    except ImportError:
+        return None
+    table = PeriodTable('month')
+    stamps = numpy.array(_stamps())
+    return lambda: table.bucket_ids(stamps)
+
+
+def _aware(tz):
+    return [d.replace(tzinfo=tz) for d in _jalali]
+
+
+@benchmark()
+def tz_utcoffset():
+    try:
+        from pyjalali.tz import TEHRAN
+    except ImportError:
+        return None
+    values = _aware(TEHRAN)
+    return lambda: [d.utcoffset() for d in values]
+
+
+@benchmark()
+def tz_astimezone():
+    try:
+        from pyjalali.tz import TEHRAN, UTC
+    except ImportError:
+        return None
+    values = _aware(UTC)
+    return lambda: [d.astimezone(TEHRAN) for d in values]
+
+
+def _update_years(count, years):
+    """Return benchmark updating `count` structures of random days in
+    `years`.  Zone fields are left alone where libjalali allows, since
+    resolving zones of days far apart would hide the calendar work."""
+    try:
+        from pyjalali.jalali import jalali_fill_zone
+    except ImportError:
+        jalali_fill_zone = None
+    rand = random.Random(1348)
+    jtms = []
+    for i in range(count):
+        jtm = struct_jtm()
+        jtm.tm_year = rand.choice(years)
+        jtm.tm_mon = rand.randint(0, 11)
+        jtm.tm_mday = rand.randint(1, 29)
+        jtms.append(jtm)
+
+    def run():
+        fill = jalali_fill_zone and jalali_fill_zone(0)
+        try:
+            for jtm in jtms:
+                jalali_update(jtm)
+        finally:
+            if jalali_fill_zone:
+                jalali_fill_zone(fill)
+    return run, len(jtms)
+
+
+@benchmark()
+def update_distant_years():
+    # years of the year-start index
+    return _update_years(COUNT, range(1, 10000))
+
+
+@benchmark()
+def update_unindexed_years():
+    # not indexed, costing a step per year from Epoch, fewer values do
+    return _update_years(COUNT // 10, range(-3000, 1))
+
+
+def _bytes_per_object(factory):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objs = factory()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    # list holding them isn't counted
+    return float(used - sys.getsizeof(objs)) / len(objs)
+
+
+@benchmark('bytes')
+def memory_date():
+    return _bytes_per_object(construct_date())
+
+
+@benchmark('bytes')
+def memory_datetime():
+    return _bytes_per_object(construct_datetime())
+
+
+@benchmark('us')
+def import_datetime():
+    if sys.version_info < (3, 7):
+        return None
+    from import_bench import import_times, median
+    return median(import_times('pyjalali.datetime')['pyjalali.datetime'][1]
+                  for i in range(5))
+
+
+def run_benchmark(func, unit, runs):
+    """Return result of benchmark `func`: median, minimum, maximum and all
+    runs, as time per operation for timing ones."""
+    if unit != 'ns':
+        value = func()
+        values = [] if value is None else [value]
+    else:
+        run, ops = func(), COUNT
+        if run is None:
+            return None
+        if isinstance(run, tuple):
+            run, ops = run
+        run()  # warm up caches
+        values = []
+        for i in range(runs):
+            s = time.time()
+            run()
+            values.append((time.time() - s) / ops * 1e9)
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {'unit': unit, 'median': ordered[len(ordered) // 2],
+            'min': ordered[0], 'max': ordered[-1], 'runs': values}
+
+
+def _commit():
+    try:
+        out = subprocess.Popen(['git', 'rev-parse', '--short', 'HEAD'],
+                               cwd=SOURCES, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE).communicate()[0]
+    except OSError:
+        return None
+    return out.decode().strip() or None
+
+
+def run_suite(runs, keyword=None):
+    results = {}
+    for name, func, unit in _benchmarks:
+        if keyword and keyword not in name:
+            continue
+        try:
+            result = run_benchmark(func, unit, runs)
+        except Exception as e:
+            # broken on this commit, others are still measured
+            print('%-24s %12s  %s: %s' % (name, 'failed',
+                                          e.__class__.__name__, e))
+            continue
+        if result is None:
+            print('%-24s %12s' % (name, 'skipped'))
+            continue
+        results[name] = result
+        print('%-24s %12.1f %s' % (name, result['median'], unit))
+    return {'commit': _commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'backend': os.environ.get('PYJALALI_BACKEND', 'python'),
+            'count': COUNT, 'runs': runs,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmarks': results}
+
+
+def compare(old, new):
+    """Print medians of benchmarks in `old` and `new` results, and ratio of
+    new to old."""
+    print('%-24s %17s %17s %8s' % ('', old.get('commit') or 'old',
+                                   new.get('commit') or 'new', 'new/old'))
+    for name in sorted(set(old['benchmarks']) | set(new['benchmarks'])):
+        a = old['benchmarks'].get(name)
+        b = new['benchmarks'].get(name)
+        cells = ['%11.1f %-5s' % (r['median'], r['unit']) if r else
+                 '%17s' % '-' for r in (a, b)]
+        ratio = '%7.2fx' % (b['median'] / a['median']) if a and b else ''
+        print('%-24s %s %s %8s' % (name, cells[0], cells[1], ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark pyjalali hot paths, results in JSON.')
+    parser.add_argument('-o', '--output',
+                        help='write results to this JSON file')
+    parser.add_argument('-k', dest='keyword',
+                        help='run only benchmarks with this in their name')
+    parser.add_argument('--runs', type=int, default=7,
+                        help='runs of each timing benchmark (default 7)')
+    parser.add_argument('--quick', action='store_true',
+                        help='three runs, for a rough picture')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files and exit')
+    args = parser.parse_args()
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        compare(old, new)
+        return
+    results = run_suite(3 if args.quick else args.runs, args.keyword)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
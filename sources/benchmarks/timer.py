@@ -0,0 +1,21 @@
+"""
+    timer.py
+
+    Timing helper shared by benchmark scripts, imported by them as a sibling
+    module.
+"""
+
+import time
+
+
+def best_of(repeat, func, *args):
+    """Return the least wall time in seconds of `repeat` calls of
+    ``func(*args)``."""
+    best = None
+    for i in range(repeat):
+        s = time.time()
+        func(*args)
+        e = time.time() - s
+        if best is None or e < best:
+            best = e
+    return best
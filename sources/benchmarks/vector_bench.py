@@ -0,0 +1,69 @@
+"""
+    vector_bench.py [COUNT]
+
+    Compare converting COUNT random timestamps of years 1300-1500 with
+    :func:`pyjalali.jtime.jgmtime` and :func:`pyjalali.jtime.jmktime` one at
+    a time against :mod:`pyjalali.vector`.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+from pyjalali import vector
+from pyjalali.jtime import jgmtime, jmktime
+from pyjalali.types import struct_jtm
+
+from timer import best_of
+
+
+def scalar_gmtime(ts):
+    return [jgmtime(t) for t in ts]
+
+
+def scalar_mktime(jtms):
+    for src in jtms:
+        jtm = struct_jtm()
+        jtm.tm_year, jtm.tm_mon, jtm.tm_mday = src
+        jmktime(jtm)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print('usage: vector_bench.py [COUNT]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 1000000
+    # scalar loops are timed on a sample, they'd take minutes otherwise
+    sample = min(n, 20000)
+
+    rand = numpy.random.RandomState(1348)
+    ts = rand.randint(-2 ** 31, 2 ** 32, n).astype(numpy.int64)
+    fields = vector.fields_from_timestamps(ts)
+    jtms = list(zip(fields.year[:sample].tolist(),
+                    (fields.month[:sample] - 1).tolist(),
+                    fields.day[:sample].tolist()))
+    pts = ts[:sample].tolist()
+
+    rows = [
+        ('gmtime', best_of(3, scalar_gmtime, pts) / sample,
+         best_of(3, vector.fields_from_timestamps, ts) / n),
+        ('mktime', best_of(3, scalar_mktime, jtms) / sample,
+         best_of(3, vector.timestamps_from_fields, fields.year, fields.month,
+                 fields.day, fields.hour, fields.minute,
+                 fields.second) / n),
+    ]
+
+    print('%d timestamps, %s backend' % (n, os.environ.get('PYJALALI_BACKEND',
+                                                            'python')))
+    print('%-8s %14s %14s %9s' % ('', 'scalar', 'vector', 'speedup'))
+    for name, scalar, vec in rows:
+        print('%-8s %11.1f ns %11.1f ns %8.0fx' % (name, scalar * 1e9,
+                                                   vec * 1e9, scalar / vec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+    zone_bench.py [COUNT [THREADS]]
+
+    Measure :func:`pyjalali.jalali.jalali_get_date` and
+    :func:`pyjalali.jalali.jalali_update` of COUNT days spread over a century,
+    filling zone fields from the offset cache and not filling them at all
+    (see :func:`~pyjalali.jalali.jalali_fill_zone`).  With THREADS, as many
+    threads share the work, which only runs in parallel through libjalali
+    since ctypes releases the GIL.  Set ``PYJALALI_BACKEND`` to ``ctypes`` to
+    measure libjalali calls.  Run from *sources* directory.
+"""
+
+from __future__ import print_function
+import os
+import random
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyjalali.jalali import (jalali_fill_zone, jalali_get_date, jalali_tzset,
+                             jalali_update)
+
+from timer import best_of
+
+
+def get_dates(days):
+    for d in days:
+        jalali_get_date(d)
+
+
+def update(jtms):
+    for jtm in jtms:
+        jtm.tm_mday += 1
+        jalali_update(jtm)
+
+
+def threaded(func, values, threads):
+    if threads == 1:
+        return func(values)
+    workers = [threading.Thread(target=func, args=(values[i::threads],))
+               for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+def main():
+    if len(sys.argv) > 3:
+        print('usage: zone_bench.py [COUNT [THREADS]]')
+        sys.exit(1)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    rand = random.Random(1348)
+    days = [rand.randint(-10000, 26500) for i in range(n)]
+    jtms = [jalali_get_date(d) for d in days]
+    jalali_tzset()
+
+    print('%d days, %d threads, %s backend' % (
+        n, threads, os.environ.get('PYJALALI_BACKEND', 'python')))
+    print('%-10s %14s %14s' % ('', 'fill zone', 'no zone'))
+    for name, func, values in (('get_date', get_dates, days),
+                               ('update', update, jtms)):
+        row = []
+        for fill in (True, False):
+            previous = jalali_fill_zone(fill)
+            row.append(best_of(3, threaded, func, values, threads) / n)
+            jalali_fill_zone(previous)
+        print('%-10s %11.1f ns %11.1f ns' % (name, row[0] * 1e9,
+                                             row[1] * 1e9))
+
+
+if __name__ == '__main__':
+    main()
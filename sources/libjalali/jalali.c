@@ -54,6 +54,10 @@ const int accumulated_jalali_month_len[] = {0,   31,  62,  93,  124, 155,
 
 extern char *tzname[2];
 
+void in_jalali_date(int p, struct jtm *j);
+static void in_jalali_zone(int p, struct jtm *j);
+static int in_jalali_normalize(struct jtm *jtm);
+
 /*
  * Jalali leap year indication function. The algorithm used here
  * is loosely based on the famous recurring 2820 years length period. This
@@ -163,22 +167,143 @@ int jalali_is_jleap(int year) {
   return 0;
 }
 
+/*
+ * Year-start index. year_start[i] holds the number of days from UTC Epoch to
+ * 1 Farvardin of year J_INDEX_FIRST_YEAR + i. The trailing entry marks the
+ * end of J_INDEX_LAST_YEAR, so every indexed year has a known length.
+ */
+#define J_INDEX_SIZE (J_INDEX_LAST_YEAR - J_INDEX_FIRST_YEAR + 2)
+
+static int year_start[J_INDEX_SIZE];
+
+/*
+ * State of the year-start index. One thread claims building it, and stores
+ * J_INDEX_READY with release order once all of year_start[] is written;
+ * readers load the state with acquire order, so seeing J_INDEX_READY they
+ * see the whole table on weakly ordered CPUs too. Threads finding it being
+ * built don't wait for it, they take the unindexed paths.
+ */
+#define J_INDEX_EMPTY 0
+#define J_INDEX_BUILDING 1
+#define J_INDEX_READY 2
+
+#if defined __GNUC__
+static long year_index_state = J_INDEX_EMPTY;
+#define J_INDEX_LOAD() __atomic_load_n(&year_index_state, __ATOMIC_ACQUIRE)
+#define J_INDEX_CLAIM()                                                        \
+  __sync_bool_compare_and_swap(&year_index_state, J_INDEX_EMPTY,               \
+                               J_INDEX_BUILDING)
+#define J_INDEX_PUBLISH()                                                      \
+  __atomic_store_n(&year_index_state, J_INDEX_READY, __ATOMIC_RELEASE)
+#elif defined _MSC_VER
+#include <intrin.h>
+static volatile long year_index_state = J_INDEX_EMPTY;
+/* Interlocked functions are full barriers on every target */
+#define J_INDEX_LOAD()                                                         \
+  _InterlockedCompareExchange(&year_index_state, J_INDEX_EMPTY, J_INDEX_EMPTY)
+#define J_INDEX_CLAIM()                                                        \
+  (_InterlockedCompareExchange(&year_index_state, J_INDEX_BUILDING,            \
+                               J_INDEX_EMPTY) == J_INDEX_EMPTY)
+#define J_INDEX_PUBLISH() _InterlockedExchange(&year_index_state, J_INDEX_READY)
+#else
+#include <stdatomic.h>
+static atomic_long year_index_state = J_INDEX_EMPTY;
+static int jalali_claim_year_index(void) {
+  long expected = J_INDEX_EMPTY;
+  return atomic_compare_exchange_strong(&year_index_state, &expected,
+                                        J_INDEX_BUILDING);
+}
+#define J_INDEX_LOAD()                                                         \
+  atomic_load_explicit(&year_index_state, memory_order_acquire)
+#define J_INDEX_CLAIM() jalali_claim_year_index()
+#define J_INDEX_PUBLISH()                                                      \
+  atomic_store_explicit(&year_index_state, J_INDEX_READY, memory_order_release)
+#endif
+
+static int jalali_year_length(int year) {
+  return jalali_is_jleap(year) ? JALALI_LEAP_YEAR_LENGTH_IN_DAYS
+                               : JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
+}
+
+/*
+ * Returns nonzero if the year-start index can be read, building it on first
+ * use. Zero while another thread builds it.
+ */
+static int jalali_year_index(void) {
+  int i;
+  int e = J_UTC_EPOCH_YEAR - J_INDEX_FIRST_YEAR;
+
+  if (J_INDEX_LOAD() == J_INDEX_READY)
+    return 1;
+  if (!J_INDEX_CLAIM())
+    return 0;
+
+  year_start[e] = -J_UTC_EPOCH_DIFF;
+  for (i = e + 1; i < J_INDEX_SIZE; i++)
+    year_start[i] =
+        year_start[i - 1] + jalali_year_length(J_INDEX_FIRST_YEAR + i - 1);
+  for (i = e - 1; i >= 0; i--)
+    year_start[i] =
+        year_start[i + 1] - jalali_year_length(J_INDEX_FIRST_YEAR + i);
+
+  J_INDEX_PUBLISH();
+  return 1;
+}
+
+/*
+ * Finds the year containing the day *p* days after UTC Epoch and replaces
+ * *p* with the day of that year. Indexed years are found by bisecting the
+ * year-start index, others by walking year by year from the epoch year.
+ */
+static int jalali_find_year(int *p) {
+  int lo, hi, mid;
+  int y = J_UTC_EPOCH_YEAR, f, d;
+
+  if (jalali_year_index() && *p >= year_start[0] &&
+      *p < year_start[J_INDEX_SIZE - 1]) {
+    lo = 0;
+    hi = J_INDEX_SIZE - 1;
+    /* Invariant: year_start[lo] <= *p < year_start[hi] */
+    while (hi - lo > 1) {
+      mid = lo + (hi - lo) / 2;
+      if (year_start[mid] <= *p)
+        lo = mid;
+      else
+        hi = mid;
+    }
+    *p -= year_start[lo];
+    return J_INDEX_FIRST_YEAR + lo;
+  }
+
+  *p += J_UTC_EPOCH_DIFF;
+  while (1) {
+    d = (*p >= 0) ? 1 : -1;
+    f = jalali_year_length((d > 0) ? y : y - 1);
+
+    if ((0 <= *p) && (*p < f))
+      break;
+
+    *p -= (d * f);
+    y += d;
+  }
+
+  return y;
+}
+
 /*
  * Creates absolute values for day, hour, minute and seconds from time_t.
  * Values are signed integers.
  */
 void jalali_create_time_from_secs(time_t t, struct ab_jtm *d) {
-  d->ab_days = (t >= 0) ? (t / (time_t)J_DAY_LENGTH_IN_SECONDS)
-                        : ((t - (time_t)J_DAY_LENGTH_IN_SECONDS + (time_t)1) /
-                           (time_t)J_DAY_LENGTH_IN_SECONDS);
+  time_t days = t / (time_t)J_DAY_LENGTH_IN_SECONDS;
 
-  if (t >= 0) {
-    t %= (time_t)J_DAY_LENGTH_IN_SECONDS;
-  } else {
-    t = (J_DAY_LENGTH_IN_SECONDS -
-         (abs(t - J_DAY_LENGTH_IN_SECONDS) % J_DAY_LENGTH_IN_SECONDS)) %
-        J_DAY_LENGTH_IN_SECONDS;
+  /* Floor division, staying in time_t for 64 bit timestamps */
+  t %= (time_t)J_DAY_LENGTH_IN_SECONDS;
+  if (t < 0) {
+    t += (time_t)J_DAY_LENGTH_IN_SECONDS;
+    days--;
   }
+  d->ab_days = (int)days;
 
   d->ab_hour = t / J_HOUR_LENGTH_IN_SECONDS;
   t %= J_HOUR_LENGTH_IN_SECONDS;
@@ -287,14 +412,16 @@ void jalali_get_jyear_info(struct jyinfo *year) {
  * 0 means 1 January 1970 (11 Dey 1348).
  */
 void jalali_get_date(int p, struct jtm *j) {
-  int porg = p;
-  time_t t;
-  struct tm lt;
-#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
-  struct timezone tz;
-  struct timeval tv;
-#endif
+  in_jalali_date(p, j);
+  in_jalali_zone(p, j);
+}
 
+/*
+ * Sets tm_year, tm_mon, tm_mday, tm_wday and tm_yday fields of j from day
+ * number p, leaving the others alone.  Not part of the API, jtime.c uses it
+ * for conversions which have their own zone.
+ */
+void in_jalali_date(int p, struct jtm *j) {
   int wd = (p + J_UTC_EPOCH_WDAY) % J_WEEK_LENGTH;
 
   if (wd < 0) {
@@ -303,29 +430,25 @@ void jalali_get_date(int p, struct jtm *j) {
     j->tm_wday = wd;
   }
 
-  int y = J_UTC_EPOCH_YEAR, f = 0;
-  p += J_UTC_EPOCH_DIFF;
-  int d;
-
-  while (1) {
-    d = (p >= 0) ? 1 : -1;
-    f = jalali_is_jleap(((d > 0) ? y : y - 1))
-            ? JALALI_LEAP_YEAR_LENGTH_IN_DAYS
-            : JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
-
-    if ((0 <= p) && (p < f))
-      break;
-
-    p -= (d * f);
-    y += d;
-  }
-
-  j->tm_year = y;
+  j->tm_year = jalali_find_year(&p);
   j->tm_yday = p;
 
   jalali_create_date_from_days(j);
-  tzset();
-  t = porg * J_DAY_LENGTH_IN_SECONDS;
+}
+
+/*
+ * Sets zone fields of j to those of local time at start of day p, asking
+ * localtime_r().
+ */
+static void in_jalali_localtime_zone(int p, struct jtm *j) {
+  time_t t;
+  struct tm lt;
+#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
+  struct timezone tz;
+  struct timeval tv;
+#endif
+
+  t = (time_t)p * J_DAY_LENGTH_IN_SECONDS;
   localtime_r(&t, &lt);
 
 #if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
@@ -341,6 +464,203 @@ void jalali_get_date(int p, struct jtm *j) {
   j->tm_isdst = lt.tm_isdst;
 }
 
+/*
+ * Zone offset cache. Days are grouped in chunks of J_ZONE_CHUNK_DAYS and
+ * intervals of days sharing zone fields are resolved once per chunk, then
+ * looked up by bisecting their first days. Zones are sampled every
+ * J_ZONE_STEP_DAYS and changes are bisected between samples, so a zone
+ * changing and changing back within that many days would go unnoticed.
+ * The cache is per thread, so it needs no locks, and chunks resolved before
+ * the last jalali_tzset() call are ignored. Chunks holding more than
+ * J_ZONE_CHUNK_INTERVALS intervals are not cached.
+ */
+#define J_ZONE_CHUNK_DAYS 1024
+#define J_ZONE_STEP_DAYS 8
+#define J_ZONE_CHUNK_INTERVALS 8
+#define J_ZONE_CACHE_SLOTS 64
+
+#if defined __GNUC__
+#define J_THREAD_LOCAL __thread
+#elif defined _MSC_VER
+#define J_THREAD_LOCAL __declspec(thread)
+#endif
+
+struct jzone_chunk {
+  int chunk;       /* chunk number, its first day divided by chunk length */
+  long generation; /* zone_generation when resolved, 0 for none */
+  int n;           /* number of intervals, 0 if not cached */
+  int first[J_ZONE_CHUNK_INTERVALS];
+  int isdst[J_ZONE_CHUNK_INTERVALS];
+  long int gmtoff[J_ZONE_CHUNK_INTERVALS];
+  const char *zone[J_ZONE_CHUNK_INTERVALS];
+};
+
+#ifdef J_THREAD_LOCAL
+static J_THREAD_LOCAL struct jzone_chunk zone_cache[J_ZONE_CACHE_SLOTS];
+#endif
+static volatile int zone_fill = 1;
+
+/*
+ * Generation of TZ, bumped by jalali_tzset(). Resolving a chunk takes it
+ * with acquire order before calling tzset(), so a chunk resolved while TZ
+ * changes is tagged with the older generation and resolved again.
+ */
+#if defined __GNUC__
+static long zone_generation = 1;
+#define J_ZONE_GENERATION() __atomic_load_n(&zone_generation, __ATOMIC_ACQUIRE)
+#define J_ZONE_NEXT_GENERATION()                                               \
+  __atomic_fetch_add(&zone_generation, 1, __ATOMIC_RELEASE)
+#elif defined _MSC_VER
+static volatile long zone_generation = 1;
+#define J_ZONE_GENERATION() _InterlockedCompareExchange(&zone_generation, 0, 0)
+#define J_ZONE_NEXT_GENERATION() _InterlockedIncrement(&zone_generation)
+#else
+static atomic_long zone_generation = 1;
+#define J_ZONE_GENERATION()                                                    \
+  atomic_load_explicit(&zone_generation, memory_order_acquire)
+#define J_ZONE_NEXT_GENERATION()                                               \
+  atomic_fetch_add_explicit(&zone_generation, 1, memory_order_release)
+#endif
+
+/*
+ * Resolves intervals of chunk c into z.
+ */
+#define SAME_ZONE(a, b)                                                        \
+  ((a).tm_gmtoff == (b).tm_gmtoff && (a).tm_isdst == (b).tm_isdst &&           \
+   (a).tm_zone == (b).tm_zone)
+
+static void jalali_resolve_zone_chunk(struct jzone_chunk *z, int c) {
+  struct jtm cur, next, mid_jtm;
+  int p, q, lo, hi, mid, n = 0;
+  int first = c * J_ZONE_CHUNK_DAYS;
+  int last = first + J_ZONE_CHUNK_DAYS - 1;
+  long generation = J_ZONE_GENERATION();
+
+  tzset();
+  in_jalali_localtime_zone(first, &cur);
+  p = first;
+  while (1) {
+    if (n == J_ZONE_CHUNK_INTERVALS) {
+      n = 0;
+      break;
+    }
+    z->first[n] = p;
+    z->isdst[n] = cur.tm_isdst;
+    z->gmtoff[n] = cur.tm_gmtoff;
+    z->zone[n] = cur.tm_zone;
+    n++;
+
+    /* find next sample with another zone */
+    do {
+      q = (last - p > J_ZONE_STEP_DAYS) ? p + J_ZONE_STEP_DAYS : last;
+      in_jalali_localtime_zone(q, &next);
+      if (!SAME_ZONE(cur, next))
+        break;
+      p = q;
+    } while (p < last);
+    if (p == last)
+      break;
+
+    /* Invariant: day lo has zone cur, day hi has zone next */
+    lo = p;
+    hi = q;
+    while (hi - lo > 1) {
+      mid = lo + (hi - lo) / 2;
+      in_jalali_localtime_zone(mid, &mid_jtm);
+      if (SAME_ZONE(cur, mid_jtm)) {
+        lo = mid;
+      } else {
+        hi = mid;
+        next = mid_jtm;
+      }
+    }
+    p = hi;
+    cur = next;
+  }
+
+  z->n = n;
+  z->chunk = c;
+  z->generation = generation;
+}
+
+/*
+ * Sets zone fields of j to those of local time at start of day p.
+ */
+static void in_jalali_zone(int p, struct jtm *j) {
+#ifdef J_THREAD_LOCAL
+  struct jzone_chunk *z;
+  int c, lo, hi, mid;
+#endif
+
+  if (!zone_fill)
+    return;
+
+#ifdef J_THREAD_LOCAL
+  /* floor division, chunks of negative days start before them */
+  c = (p >= 0) ? p / J_ZONE_CHUNK_DAYS : -((-p - 1) / J_ZONE_CHUNK_DAYS) - 1;
+  z = &zone_cache[c & (J_ZONE_CACHE_SLOTS - 1)];
+  if (z->chunk != c || z->generation != J_ZONE_GENERATION())
+    jalali_resolve_zone_chunk(z, c);
+
+  if (z->n) {
+    lo = 0;
+    hi = z->n;
+    /* Invariant: z->first[lo] <= p < z->first[hi] */
+    while (hi - lo > 1) {
+      mid = lo + (hi - lo) / 2;
+      if (z->first[mid] <= p)
+        lo = mid;
+      else
+        hi = mid;
+    }
+    j->tm_isdst = z->isdst[lo];
+    j->tm_gmtoff = z->gmtoff[lo];
+    j->tm_zone = z->zone[lo];
+    return;
+  }
+#endif
+
+  tzset();
+  in_jalali_localtime_zone(p, j);
+}
+
+/*
+ * Re-reads TZ by tzset() and forgets resolved zone offsets. Should be called
+ * after changing TZ, as dates are filled from cache otherwise.
+ */
+void jalali_tzset(void) {
+  tzset();
+  J_ZONE_NEXT_GENERATION();
+}
+
+/*
+ * Sets whether jalali_get_date(), jalali_update() and their array variants
+ * fill tm_isdst, tm_gmtoff and tm_zone fields, returning previous setting.
+ * Calendar only callers may turn it off to leave those fields alone.
+ */
+int jalali_fill_zone(int fill) {
+  int prev = zone_fill;
+
+  zone_fill = fill ? 1 : 0;
+  return prev;
+}
+
+/*
+ * Fills n broken-down dates of jtm from as many day numbers of days, so that
+ * a whole column of dates costs a single call from bindings.
+ */
+void jalali_get_date_n(const int *days, struct jtm *jtm, size_t n) {
+  size_t i;
+
+  if (!days || !jtm)
+    return;
+
+  for (i = 0; i < n; i++) {
+    in_jalali_date(days[i], &jtm[i]);
+    in_jalali_zone(days[i], &jtm[i]);
+  }
+}
+
 /*
  * Calculates UTC epoch difference of a desired date by measure of days.
  */
@@ -354,6 +674,10 @@ int jalali_get_diff(const struct jtm *j) {
   if (j->tm_yday > 365 || j->tm_yday < 0)
     return -1;
 
+  if (j->tm_year >= J_INDEX_FIRST_YEAR && j->tm_year <= J_INDEX_LAST_YEAR &&
+      jalali_year_index())
+    return year_start[j->tm_year - J_INDEX_FIRST_YEAR] + j->tm_yday;
+
   if (j->tm_year == J_UTC_EPOCH_YEAR) {
     p = j->tm_yday - J_UTC_EPOCH_DIFF;
     return p;
@@ -375,8 +699,8 @@ int jalali_get_diff(const struct jtm *j) {
                             : JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
   }
 
-  int r = jalali_is_jleap(s) ? JALALI_LEAP_YEAR_LENGTH_IN_DAYS - sd - 1
-                             : JALALI_NORMAL_YEAR_LENGTH_IN_DAYS - sd - 1;
+  /* Remaining days of the earlier of the two boundary years. */
+  int r = jalali_year_length((f > 0) ? J_UTC_EPOCH_YEAR : j->tm_year) - sd - 1;
 
   p += r + ed;
   p *= f;
@@ -398,43 +722,47 @@ int jalali_year_month_days(int year, int month) {
  * Updates a jalali date struct fields based on tm_year, tm_mon and tm_mday
  */
 void jalali_update(struct jtm *jtm) {
-  int dim; // number of days in current month
+  int p = in_jalali_normalize(jtm);
+
+  in_jalali_date(p, jtm);
+  in_jalali_zone(p, jtm);
+}
+
+/*
+ * Carries overflowing fields of jtm over to larger ones and returns its day
+ * number, for jalali_update() and jalali_update_n().
+ */
+static int in_jalali_normalize(struct jtm *jtm) {
   RECLUSTER(jtm->tm_min, jtm->tm_sec, J_MINUTE_LENGTH_IN_SECONDS);
   RECLUSTER(jtm->tm_hour, jtm->tm_min, J_HOUR_LENGTH_IN_MINUTES);
   RECLUSTER(jtm->tm_mday, jtm->tm_hour, J_DAY_LENGTH_IN_HOURS);
 
-  /* start by calculating a year based on month and change month and year till
-   * mday fit */
+  /* start by calculating a year based on month */
   RECLUSTER(jtm->tm_year, jtm->tm_mon, J_YEAR_LENGTH_IN_MONTHS);
 
-  if (jtm->tm_mday < 1) {
-    /* breaking months to days */
-    while (jtm->tm_mday < 1) {
-      if (jtm->tm_mon == 0) {
-        jtm->tm_mon = 11;
-        jtm->tm_year -= 1;
-      } else {
-        jtm->tm_mon -= 1;
-      }
-      jtm->tm_mday += jalali_year_month_days(jtm->tm_year, jtm->tm_mon);
-    }
-  } else {
-    /* clustering days as months */
-    while (jtm->tm_mday >
-           (dim = jalali_year_month_days(jtm->tm_year, jtm->tm_mon))) {
-      jtm->tm_mday -= dim;
-      if (jtm->tm_mon == 11) {
-        jtm->tm_mon = 0;
-        jtm->tm_year += 1;
-      } else {
-        jtm->tm_mon += 1;
-      }
-    }
-  }
+  /*
+   * Count days from the first day of month and let in_jalali_date carry
+   * them over months and years, computing tm_wday and tm_yday as well.
+   */
+  jtm->tm_yday = accumulated_jalali_month_len[jtm->tm_mon];
+  return jalali_get_diff(jtm) + jtm->tm_mday - 1;
+}
+
+/*
+ * Updates n broken-down dates of jtm in place, see jalali_update().
+ */
+void jalali_update_n(struct jtm *jtm, size_t n) {
+  size_t i;
+  int p;
 
-  /* date is normalized, compute tm_wday and tm_yday */
-  jalali_create_days_from_date(jtm);
-  jalali_get_date(jalali_get_diff(jtm), jtm);
+  if (!jtm)
+    return;
+
+  for (i = 0; i < n; i++) {
+    p = in_jalali_normalize(&jtm[i]);
+    in_jalali_date(p, &jtm[i]);
+    in_jalali_zone(p, &jtm[i]);
+  }
 }
 
 /*
@@ -22,6 +22,7 @@
 #ifndef JALALI_H
 #define JALALI_H
 
+#include <stddef.h>
 #include <time.h>
 
 #ifdef __cplusplus
@@ -79,10 +80,18 @@ extern void jalali_get_jyear_info(struct jyinfo *jyinfo);
 
 extern void jalali_get_date(int p, struct jtm *jtm);
 
+extern void jalali_get_date_n(const int *days, struct jtm *jtm, size_t n);
+
 extern int jalali_get_diff(const struct jtm *jtm);
 
 extern void jalali_update(struct jtm *jtm);
 
+extern void jalali_update_n(struct jtm *jtm, size_t n);
+
+extern void jalali_tzset(void);
+
+extern int jalali_fill_zone(int fill);
+
 extern void jalali_show_time(const struct jtm *j);
 
 extern int jalali_year_month_days(int year, int month);
@@ -72,4 +72,8 @@
 #define J_UTC_EPOCH_DIFF 286
 #define J_UTC_EPOCH_WDAY 5
 
+/* Range of years covered by the precomputed year-start index. */
+#define J_INDEX_FIRST_YEAR 1
+#define J_INDEX_LAST_YEAR 9999
+
 #endif /* JCONFIG_H */
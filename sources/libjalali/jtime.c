@@ -65,6 +65,7 @@ static struct jtm in_jtm;
 
 extern char *tzname[2];
 extern const int jalali_month_len[];
+extern void in_jalali_date(int p, struct jtm *j);
 
 void in_jasctime(const struct jtm *jtm, char *buf) {
   if (!jtm)
@@ -91,18 +92,17 @@ void in_jasctime(const struct jtm *jtm, char *buf) {
   }
 }
 
-void in_jlocaltime(const time_t *timep, struct jtm *result) {
-  if (!timep)
-    return;
-
+/*
+ * Conversions of in_jlocaltime() and in_jgmtime(), leaving tzset() to
+ * callers so that array variants call it once.
+ */
+static void in_jlocaltime_notzset(const time_t *timep, struct jtm *result) {
   struct tm t;
   struct jtm c_jtm;
   struct ab_jtm ab;
   long int gmtoff;
   time_t c;
 
-  tzset();
-
   localtime_r(timep, &t);
 
 #if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
@@ -121,8 +121,7 @@ void in_jlocaltime(const time_t *timep, struct jtm *result) {
   c = (*timep) + (time_t)gmtoff;
 
   jalali_create_time_from_secs(c, &ab);
-  jalali_get_date(ab.ab_days, &c_jtm);
-  jalali_create_date_from_days(&c_jtm);
+  in_jalali_date(ab.ab_days, &c_jtm);
   c_jtm.tm_sec = ab.ab_sec;
   c_jtm.tm_min = ab.ab_min;
   c_jtm.tm_hour = ab.ab_hour;
@@ -132,6 +131,31 @@ void in_jlocaltime(const time_t *timep, struct jtm *result) {
   memcpy(result ? result : &in_jtm, &c_jtm, sizeof(struct jtm));
 }
 
+static void in_jgmtime_notzset(const time_t *timep, struct jtm *result) {
+  struct jtm c_jtm;
+  struct ab_jtm ab;
+
+  jalali_create_time_from_secs(*timep, &ab);
+  in_jalali_date(ab.ab_days, &c_jtm);
+  c_jtm.tm_sec = ab.ab_sec;
+  c_jtm.tm_min = ab.ab_min;
+  c_jtm.tm_hour = ab.ab_hour;
+  c_jtm.tm_isdst = 0;
+
+  c_jtm.tm_zone = GMT_ZONE;
+  c_jtm.tm_gmtoff = 0;
+
+  memcpy(result ? result : &in_jtm, &c_jtm, sizeof(struct jtm));
+}
+
+void in_jlocaltime(const time_t *timep, struct jtm *result) {
+  if (!timep)
+    return;
+
+  tzset();
+  in_jlocaltime_notzset(timep, result);
+}
+
 void in_jctime(const time_t *timep, char *buf) {
   if (!timep)
     return;
@@ -146,27 +170,8 @@ void in_jgmtime(const time_t *timep, struct jtm *result) {
   if (!timep)
     return;
 
-  struct tm t;
-  struct jtm c_jtm;
-  struct ab_jtm ab;
-  time_t c;
   tzset();
-
-  gmtime_r(timep, &t);
-  c = *timep;
-
-  jalali_create_time_from_secs(c, &ab);
-  jalali_get_date(ab.ab_days, &c_jtm);
-  jalali_create_date_from_days(&c_jtm);
-  c_jtm.tm_sec = ab.ab_sec;
-  c_jtm.tm_min = ab.ab_min;
-  c_jtm.tm_hour = ab.ab_hour;
-  c_jtm.tm_isdst = 0;
-
-  c_jtm.tm_zone = GMT_ZONE;
-  c_jtm.tm_gmtoff = 0;
-
-  memcpy(result ? result : &in_jtm, &c_jtm, sizeof(struct jtm));
+  in_jgmtime_notzset(timep, result);
 }
 
 char *jasctime(const struct jtm *jtm) {
@@ -470,7 +475,7 @@ size_t jstrftime(char *s, size_t max, const char *format,
       case 's':
         memcpy(&t_j, jtm, sizeof(struct jtm));
         t = jmktime(&t_j);
-        snprintf(buf, MAX_BUF_SIZE, "%d", (int)t);
+        snprintf(buf, MAX_BUF_SIZE, "%lld", (long long)t);
         break;
 
         /* The second as a decimal number (range 00 to 59). */
@@ -838,6 +843,42 @@ struct jtm *jgmtime_r(const time_t *timep, struct jtm *result) {
   return result;
 }
 
+/*
+ * Array variants of jlocaltime_r() and jgmtime_r(), converting n timestamps
+ * into result[0..n-1].  Timestamps are taken as long long, so that callers
+ * may pass 64 bit values whatever the width of time_t.
+ */
+struct jtm *jlocaltime_n(const long long *times, struct jtm *result, size_t n) {
+  size_t i;
+  time_t t;
+
+  if (!times || !result)
+    return 0;
+
+  tzset();
+  for (i = 0; i < n; i++) {
+    t = (time_t)times[i];
+    in_jlocaltime_notzset(&t, &result[i]);
+  }
+
+  return result;
+}
+
+struct jtm *jgmtime_n(const long long *times, struct jtm *result, size_t n) {
+  size_t i;
+  time_t t;
+
+  if (!times || !result)
+    return 0;
+
+  for (i = 0; i < n; i++) {
+    t = (time_t)times[i];
+    in_jgmtime_notzset(&t, &result[i]);
+  }
+
+  return result;
+}
+
 char *jctime_r(const time_t *timep, char *buf) {
   if (!timep || !buf)
     return 0;
@@ -54,6 +54,12 @@ extern struct jtm *jgmtime_r(const time_t *timep, struct jtm *result);
 
 extern struct jtm *jlocaltime_r(const time_t *timep, struct jtm *result);
 
+extern struct jtm *jgmtime_n(const long long *times, struct jtm *result,
+                             size_t n);
+
+extern struct jtm *jlocaltime_n(const long long *times, struct jtm *result,
+                                size_t n);
+
 extern int jalali_to_farsi(char *buf, size_t n, int padding, char *pad, int d);
 
 #ifdef __cplusplus
@@ -11,20 +11,135 @@
     An implementation of standard :class:`python:datetime.date` and
     :class:`python:datetime.datetime` provided in module :mod:`.datetime`
     using libjalali tools.
+
+    Calendar arithmetic of :mod:`.jalali` and :mod:`.jtime` is done in pure
+    Python by :mod:`.pure`, so it runs even where libjalali isn't installed.
+    Likewise formats of :func:`.jstr.jstrftime` are compiled to Python by
+    :mod:`.formatting`.  Set environment variable ``PYJALALI_BACKEND`` to
+    ``ctypes`` to forward those calls to libjalali instead.  libjalali is
+    loaded on first call of one of its functions, calls raise
+    :class:`OSError` if it can't be loaded.  :mod:`.instrument` counts and
+    times those calls.
 """
 
 import os
 import sys
-import ctypes.util
-from ctypes import cdll
 
 # hardcoded libjalali version, binding revision
 __version__ = (0, 5, 0, 2)
 
-if sys.platform.startswith('win'):
-    libname = 'libjalali.dll'
-else:
-    libname = 'libjalali.so'
-_libj = cdll.LoadLibrary(os.path.join(os.environ.get('LIBJALALI_DIR', ''),
-                                      libname))
-del cdll, ctypes, sys, libname, os
+backend = os.environ.get('PYJALALI_BACKEND', 'python')
+if backend not in ('python', 'ctypes'):
+    raise ImportError("PYJALALI_BACKEND must be 'python' or 'ctypes', not %r"
+                      % backend)
+
+
+class _MissingLibrary(object):
+    """Stands for libjalali when it couldn't be loaded.  Functions looked up
+    from it raise :class:`OSError` when called, so modules binding libjalali
+    functions stay importable."""
+
+    def __init__(self, error):
+        self.error = error
+
+    def __getattr__(self, name):
+        error = self.error
+
+        def missing(*args):
+            raise OSError('libjalali function %s is not available: %s' %
+                          (name, error))
+        missing.__name__ = name
+        return missing
+
+
+class _Function(object):
+    """Prototype of libjalali function `name`, bound on its first call.
+    ``argtypes``, ``restype`` and ``errcheck`` set on it are passed to the
+    ctypes function then."""
+
+    __slots__ = ('_name', '_func', '_prototype')
+
+    def __init__(self, name):
+        self._name = name
+        self._func = None
+        self._prototype = {}
+
+    def __setattr__(self, name, value):
+        if name in ('argtypes', 'restype', 'errcheck'):
+            self._prototype[name] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        try:
+            return self._prototype[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __call__(self, *args):
+        func = self._func
+        if func is None:
+            func = self._bind()
+        return func(*args)
+
+    def _bind(self):
+        library = _load_library()
+        try:
+            func = getattr(library, self._name)
+        except AttributeError as e:
+            # loaded libjalali is older than this function
+            func = getattr(_MissingLibrary(e), self._name)
+        else:
+            for name, value in self._prototype.items():
+                setattr(func, name, value)
+        self._func = func
+        return func
+
+
+class _LazyLibrary(object):
+    """Stands for libjalali until one of its functions is called.  Looking up
+    a function gives a :class:`_Function`, so importing modules which bind
+    prototypes doesn't load the library, nor does using the pure Python
+    backend."""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        func = _Function(name)
+        setattr(self, name, func)
+        return func
+
+
+_loaded = []
+
+
+def _load_library():
+    """Load libjalali once and return it, or a :class:`_MissingLibrary` if it
+    couldn't be loaded."""
+    if not _loaded:
+        from ctypes import cdll
+        if sys.platform.startswith('win'):
+            libname = 'libjalali.dll'
+        else:
+            libname = 'libjalali.so'
+        path = os.path.join(os.environ.get('LIBJALALI_DIR', ''), libname)
+        try:
+            _loaded.append(cdll.LoadLibrary(path))
+        except OSError as e:
+            _loaded.append(_MissingLibrary(e))
+    return _loaded[0]
+
+
+_libj = _LazyLibrary()
+
+
+def _optional_function(name):
+    """Return libjalali function `name`, which raises :class:`OSError` when
+    called if loaded libjalali is older than it."""
+    return getattr(_libj, name)
+
+
+if os.environ.get('PYJALALI_INSTRUMENT'):
+    from pyjalali.instrument import enable
+    enable()
+    del enable
@@ -0,0 +1,307 @@
+"""
+    pyjalali.business
+    ~~~~~~~~~~~~~~~~~
+
+    Business days of Iranian working week.  A :class:`BusinessCalendar` has
+    a weekend, Friday by default, given as a mask of weekdays where bit 0 is
+    Shanbeh, and official holidays kept as a bitmap of days for each year.
+
+    Offsetting a date by business days and counting business days between
+    two dates take constant time.  Working weekdays before a day are counted
+    by arithmetic on its ordinal, and holidays by prefix sums over days of
+    years having some, which are built on first use after holidays change.
+    Methods ending in ``_array`` do the same over whole arrays of dates,
+    given as :class:`.vector.JalaliDateArray` or ordinals; NumPy is needed
+    only by them.
+
+    >>> from pyjalali.datetime import date
+    >>> nowruz = [date(1393, 1, day) for day in (1, 2, 3, 4, 12, 13)]
+    >>> cal = BusinessCalendar(holidays=nowruz)
+    >>> cal.is_business_day(date(1392, 12, 29)), cal.is_holiday(nowruz[1])
+    (True, True)
+    >>> cal.offset(date(1392, 12, 28), 2)
+    pyjalali.datetime.date(1393, 1, 5)
+    >>> cal.offset(date(1393, 1, 5), -2)
+    pyjalali.datetime.date(1392, 12, 28)
+    >>> cal.count(date(1392, 12, 1), date(1393, 2, 1))
+    46
+    >>> BusinessCalendar(THURSDAY | FRIDAY).offset(date(1392, 12, 28), 1)
+    pyjalali.datetime.date(1393, 1, 2)
+"""
+
+from __future__ import absolute_import
+
+from pyjalali import pure
+from pyjalali.datetime import date
+from pyjalali.pure import EPOCH_ORDINAL, EPOCH_WDAY
+
+
+__all__ = ('THURSDAY', 'FRIDAY', 'BusinessCalendar')
+
+# weekend masks, bit of each weekday with Shanbeh being 0
+THURSDAY = 1 << 5
+FRIDAY = 1 << 6
+
+# added to an ordinal, gives a number whose remainder by 7 is its weekday
+_SHIFT = EPOCH_WDAY - EPOCH_ORDINAL
+
+
+def _ordinal_year(ordinal):
+    """Return Jalali year of `ordinal` and ordinal of its first day."""
+    year = pure.days_to_date(ordinal - EPOCH_ORDINAL)[0]
+    return year, pure.date_to_days(year, 1, 1) + EPOCH_ORDINAL
+
+
+class _index(object):
+    """Business days of years from first to last one having holidays,
+    ordinals `start` to `end`: `prefix[i]` counts those before ordinal
+    ``start + i`` and `days` lists them."""
+    __slots__ = ('start', 'end', 'prefix', 'days', 'arrays')
+
+    def __init__(self, start, end, prefix, days):
+        self.start = start
+        self.end = end
+        self.prefix = prefix
+        self.days = days
+        self.arrays = None
+
+
+class BusinessCalendar(object):
+    """Business days of a week having `weekend` days off, a mask of
+    :data:`THURSDAY`, :data:`FRIDAY` or any other weekday bits, and days
+    in `holidays`.  Holidays are :class:`.datetime.date` objects, or
+    anything with a proleptic Gregorian ``toordinal`` method.
+    """
+
+    def __init__(self, weekend=FRIDAY, holidays=()):
+        if not 0 <= weekend < 0x7f:
+            raise ValueError('weekend must be a mask of some but not all '
+                             'weekdays')
+        self._weekend = weekend
+        working = [wday for wday in range(7) if not weekend >> wday & 1]
+        # working weekdays, and number of them before each weekday
+        self._working = working
+        self._before = [len([w for w in working if w < wday])
+                        for wday in range(8)]
+        self._bitmaps = {}
+        self._index = None
+        self.add_holidays(holidays)
+
+    def __repr__(self):
+        return '%s(weekend=%#x, holidays=%d)' % (
+            self.__class__.__name__, self._weekend,
+            sum(bin(b).count('1') for b in self._bitmaps.values()))
+
+    @property
+    def weekend(self):
+        """Mask of weekdays off."""
+        return self._weekend
+
+    def holidays(self, year):
+        """Return bitmap of holidays in `year`, bit 0 being 1 Farvardin."""
+        return self._bitmaps.get(year, 0)
+
+    def add_holidays(self, dates):
+        for d in dates:
+            self.add_holiday(d)
+
+    def add_holiday(self, d):
+        year, start = _ordinal_year(d.toordinal())
+        self._bitmaps[year] = (self._bitmaps.get(year, 0) |
+                               1 << d.toordinal() - start)
+        self._index = None
+
+    def remove_holiday(self, d):
+        year, start = _ordinal_year(d.toordinal())
+        bitmap = self._bitmaps.get(year, 0) & ~(1 << d.toordinal() - start)
+        if bitmap:
+            self._bitmaps[year] = bitmap
+        else:
+            self._bitmaps.pop(year, None)
+        self._index = None
+
+    def is_holiday(self, d):
+        """Return True if `d` is a holiday, working weekday or not."""
+        year, start = _ordinal_year(d.toordinal())
+        return bool(self._bitmaps.get(year, 0) >> d.toordinal() - start & 1)
+
+    def _get_index(self):
+        index = self._index
+        if index is not None:
+            return index
+        if not self._bitmaps:
+            index = self._index = _index(0, 0, [0], [])
+            return index
+        first, last = min(self._bitmaps), max(self._bitmaps)
+        start = pure.date_to_days(first, 1, 1) + EPOCH_ORDINAL
+        end = pure.date_to_days(last + 1, 1, 1) + EPOCH_ORDINAL
+        prefix = [0]
+        days = []
+        ordinal = start
+        weekend = self._weekend
+        for year in range(first, last + 1):
+            bitmap = self._bitmaps.get(year, 0)
+            for yday in range(pure.year_length(year)):
+                if not (bitmap >> yday & 1 or
+                        weekend >> (ordinal + _SHIFT) % 7 & 1):
+                    days.append(ordinal)
+                prefix.append(len(days))
+                ordinal += 1
+        index = self._index = _index(start, end, prefix, days)
+        return index
+
+    def _weekdays(self, ordinal):
+        """Return working weekdays before `ordinal`, from an arbitrary
+        origin."""
+        weeks, wday = divmod(ordinal + _SHIFT, 7)
+        return weeks * len(self._working) + self._before[wday]
+
+    def _nth_weekday(self, n):
+        """Return ordinal of working weekday having `n` ones before it."""
+        weeks, i = divmod(n, len(self._working))
+        return weeks * 7 + self._working[i] - _SHIFT
+
+    def _count(self, ordinal):
+        """Return business days from start of index to `ordinal`, negative
+        before it."""
+        index = self._get_index()
+        if ordinal < index.start:
+            return self._weekdays(ordinal) - self._weekdays(index.start)
+        if ordinal > index.end:
+            return (len(index.days) + self._weekdays(ordinal) -
+                    self._weekdays(index.end))
+        return index.prefix[ordinal - index.start]
+
+    def _nth(self, n):
+        """Return ordinal of business day having `n` ones before it since
+        start of index."""
+        index = self._get_index()
+        if n < 0:
+            return self._nth_weekday(self._weekdays(index.start) + n)
+        if n >= len(index.days):
+            return self._nth_weekday(self._weekdays(index.end) + n -
+                                     len(index.days))
+        return index.days[n]
+
+    def _is_business(self, ordinal):
+        index = self._get_index()
+        if index.start <= ordinal < index.end:
+            i = ordinal - index.start
+            return index.prefix[i + 1] != index.prefix[i]
+        return not self._weekend >> (ordinal + _SHIFT) % 7 & 1
+
+    def is_business_day(self, d):
+        return self._is_business(d.toordinal())
+
+    def offset(self, d, n, roll='forward'):
+        """Return :class:`.datetime.date` `n` business days after `d`, or
+        before it if `n` is negative.  If `d` isn't a business day, it's
+        first rolled to the next one, or previous one if `roll` is
+        ``'backward'``."""
+        ordinal = d.toordinal()
+        k = self._count(ordinal)
+        if not self._is_business(ordinal):
+            if roll == 'backward':
+                k -= 1
+            elif roll != 'forward':
+                raise ValueError("roll must be 'forward' or 'backward'")
+        return date.fromordinal(self._nth(k + n))
+
+    def count(self, start, end):
+        """Return number of business days from `start` up to but not
+        including `end`, negative if `end` is before `start`."""
+        return self._count(end.toordinal()) - self._count(start.toordinal())
+
+    def _arrays(self):
+        """Return index as NumPy arrays: prefix, days and whether each day
+        is a business day."""
+        import numpy
+        index = self._get_index()
+        if index.arrays is None:
+            prefix = numpy.array(index.prefix, dtype=numpy.int64)
+            # never read, keeps indexing an empty index valid
+            days = numpy.array(index.days + [index.end], dtype=numpy.int64)
+            index.arrays = prefix, days, numpy.diff(prefix) != 0
+        return index.arrays
+
+    def _weekdays_array(self, ordinals):
+        import numpy
+        weeks, wday = numpy.divmod(ordinals + _SHIFT, 7)
+        return (weeks * len(self._working) +
+                numpy.array(self._before, dtype=numpy.int64)[wday])
+
+    def _count_array(self, ordinals):
+        import numpy
+        index = self._get_index()
+        prefix = self._arrays()[0]
+        weekdays = self._weekdays_array(ordinals)
+        inside = prefix[numpy.clip(ordinals - index.start, 0,
+                                   index.end - index.start)]
+        return numpy.where(
+            ordinals < index.start,
+            weekdays - self._weekdays(index.start),
+            numpy.where(ordinals > index.end,
+                        len(index.days) + weekdays - self._weekdays(index.end),
+                        inside))
+
+    def _nth_array(self, n):
+        import numpy
+        index = self._get_index()
+        total = len(index.days)
+        before = numpy.where(n < 0, self._weekdays(index.start) + n,
+                             self._weekdays(index.end) + n - total)
+        weeks, i = numpy.divmod(before, len(self._working))
+        outside = (weeks * 7 + numpy.array(self._working,
+                                           dtype=numpy.int64)[i] - _SHIFT)
+        inside = self._arrays()[1][numpy.clip(n, 0, max(total - 1, 0))]
+        return numpy.where((n < 0) | (n >= total), outside, inside)
+
+    def is_business_day_array(self, dates):
+        """Return boolean array of whether each of `dates` is a business
+        day."""
+        import numpy
+        ordinals = _ordinals(dates)
+        index = self._get_index()
+        business = self._arrays()[2]
+        inside = (ordinals >= index.start) & (ordinals < index.end)
+        weekday_off = self._weekend >> (ordinals + _SHIFT) % 7 & 1
+        if not len(business):
+            return weekday_off == 0
+        return numpy.where(
+            inside, business[numpy.clip(ordinals - index.start, 0,
+                                        len(business) - 1)],
+            weekday_off == 0)
+
+    def offset_array(self, dates, n, roll='forward'):
+        """Return :class:`.vector.JalaliDateArray` of each of `dates`
+        offset by `n` business days, a number or array, as
+        :meth:`offset` does."""
+        from pyjalali.vector import JalaliDateArray
+        if roll not in ('forward', 'backward'):
+            raise ValueError("roll must be 'forward' or 'backward'")
+        ordinals = _ordinals(dates)
+        k = self._count_array(ordinals)
+        if roll == 'backward':
+            k = k - ~self.is_business_day_array(ordinals)
+        return JalaliDateArray(self._nth_array(k + n))
+
+    def count_array(self, starts, ends):
+        """Return array of business days between each of `starts` and
+        `ends`, as :meth:`count` does."""
+        return (self._count_array(_ordinals(ends)) -
+                self._count_array(_ordinals(starts)))
+
+
+def _ordinals(dates):
+    """Return int64 array of ordinals of `dates`, being a
+    :class:`.vector.JalaliDateArray`, array of ordinals or sequence of
+    dates."""
+    import numpy
+    from pyjalali.vector import JalaliDateArray
+    if isinstance(dates, JalaliDateArray):
+        return dates.values.astype(numpy.int64)
+    values = numpy.asarray(dates)
+    if values.dtype == object:
+        return numpy.array([d.toordinal() for d in values.ravel()],
+                           dtype=numpy.int64).reshape(values.shape)
+    return values.astype(numpy.int64)
@@ -0,0 +1,210 @@
+"""
+    pyjalali.calendar
+    ~~~~~~~~~~~~~~~~~
+
+    Month and year grids of Jalali calendar, like :mod:`python:calendar` of
+    standard library.  Weeks are computed from weekday of first day of a
+    month and its length, and kept per year, month and first weekday of
+    week, so they are shared by later calls.  Weekdays are 0 for Shanbeh to
+    6 for Jomeh, as :meth:`.datetime.date.weekday` returns.
+
+    Grids are tuples, which callers can't modify.  :meth:`Calendar.monthlayout`
+    and :meth:`Calendar.yearlayout` give them in dictionaries for
+    :func:`python:json.dumps`.
+
+    >>> monthrange(1391, 12)
+    (3, 30)
+    >>> for week in monthcalendar(1392, 1):
+    ...     print(week)
+    (0, 0, 0, 0, 0, 1, 2)
+    (3, 4, 5, 6, 7, 8, 9)
+    (10, 11, 12, 13, 14, 15, 16)
+    (17, 18, 19, 20, 21, 22, 23)
+    (24, 25, 26, 27, 28, 29, 30)
+    (31, 0, 0, 0, 0, 0, 0)
+    >>> c = Calendar(firstweekday=2)
+    >>> c.monthdayscalendar(1392, 1)[0]
+    (0, 0, 0, 1, 2, 3, 4)
+    >>> c.monthdatescalendar(1392, 1)[0][0]
+    pyjalali.datetime.date(1391, 12, 28)
+    >>> [len(row) for row in c.yeardayscalendar(1392, width=4)]
+    [4, 4, 4]
+"""
+
+from __future__ import absolute_import
+
+from pyjalali import pure
+from pyjalali.datetime import date
+from pyjalali.helpers import lru_cache
+from pyjalali.pure import EPOCH_ORDINAL, EPOCH_WDAY, jalali_is_jleap
+
+
+__all__ = ('LAYOUT_CACHE_SIZE', 'Calendar', 'isleap', 'layout_cache_info',
+           'monthcalendar', 'monthrange')
+
+# months kept for each of days and dates grids
+LAYOUT_CACHE_SIZE = 1024
+
+
+def _check_month(month):
+    if not 1 <= month <= 12:
+        raise ValueError('month value out of range [1, 12]')
+
+
+def isleap(year):
+    """Return True if Jalali `year` is leap."""
+    return jalali_is_jleap(year)
+
+
+def monthrange(year, month):
+    """Return weekday of first day of `month` in `year` and its number of
+    days."""
+    _check_month(month)
+    return ((pure.date_to_days(year, month, 1) + EPOCH_WDAY) % 7,
+            pure.month_days(year, month))
+
+
+def _month_days(year, month, firstweekday):
+    """Return weeks of month as 7-tuples of days of month, 0 for days of
+    other months."""
+    _check_month(month)
+    lead = (pure.date_to_days(year, month, 1) + EPOCH_WDAY -
+            firstweekday) % 7
+    cells = (0,) * lead + tuple(range(1, pure.month_days(year, month) + 1))
+    cells += (0,) * (-len(cells) % 7)
+    return tuple(cells[i:i + 7] for i in range(0, len(cells), 7))
+
+
+def _month_dates(year, month, firstweekday):
+    """Return weeks of month as 7-tuples of :class:`.datetime.date`, with
+    days of previous and next months filling first and last ones."""
+    weeks = _month_days_cached(year, month, firstweekday)
+    first = pure.date_to_days(year, month, 1) + EPOCH_ORDINAL
+    start = first - weeks[0].count(0)
+    fromordinal = date.fromordinal
+    return tuple(tuple(fromordinal(start + 7 * w + i) for i in range(7))
+                 for w in range(len(weeks)))
+
+
+_month_days_cached = lru_cache(LAYOUT_CACHE_SIZE)(_month_days)
+_month_dates_cached = lru_cache(LAYOUT_CACHE_SIZE)(_month_dates)
+
+
+def layout_cache_info():
+    """Return named tuple of hits, misses, maximum and current size of
+    month grids cache, like ``cache_info()`` of :func:`.helpers.lru_cache`.
+    """
+    return _month_days_cached.cache_info()
+
+
+class Calendar(object):
+    """Month and year grids whose weeks start at `firstweekday`, 0 being
+    Shanbeh."""
+
+    def __init__(self, firstweekday=0):
+        self.firstweekday = firstweekday
+
+    def getfirstweekday(self):
+        return self._firstweekday
+
+    def setfirstweekday(self, firstweekday):
+        self._firstweekday = firstweekday % 7
+
+    firstweekday = property(getfirstweekday, setfirstweekday)
+
+    def iterweekdays(self):
+        """Return iterator of weekdays in order of a week of this
+        calendar."""
+        for i in range(7):
+            yield (self._firstweekday + i) % 7
+
+    def itermonthdates(self, year, month):
+        """Return iterator of :class:`.datetime.date` objects of whole weeks
+        of `month`."""
+        for week in _month_dates_cached(year, month, self._firstweekday):
+            for d in week:
+                yield d
+
+    def itermonthdays(self, year, month):
+        """Like :meth:`itermonthdates` but giving days of month, 0 for days
+        of other months."""
+        for week in _month_days_cached(year, month, self._firstweekday):
+            for day in week:
+                yield day
+
+    def itermonthdays2(self, year, month):
+        """Like :meth:`itermonthdays` but giving tuples of day and
+        weekday."""
+        weekdays = tuple(self.iterweekdays())
+        for week in _month_days_cached(year, month, self._firstweekday):
+            for pair in zip(week, weekdays):
+                yield pair
+
+    def monthdatescalendar(self, year, month):
+        """Return weeks of `month` as 7-tuples of :class:`.datetime.date`
+        objects."""
+        return _month_dates_cached(year, month, self._firstweekday)
+
+    def monthdayscalendar(self, year, month):
+        """Return weeks of `month` as 7-tuples of days of month, 0 for days
+        of other months."""
+        return _month_days_cached(year, month, self._firstweekday)
+
+    def monthdays2calendar(self, year, month):
+        """Return weeks of `month` as 7-tuples of tuples of day and
+        weekday."""
+        weekdays = tuple(self.iterweekdays())
+        return tuple(tuple(zip(week, weekdays)) for week in
+                     _month_days_cached(year, month, self._firstweekday))
+
+    def _year(self, month_grid, year, width):
+        months = [month_grid(year, month) for month in range(1, 13)]
+        return tuple(tuple(months[i:i + width])
+                     for i in range(0, 12, width))
+
+    def yeardatescalendar(self, year, width=3):
+        """Return months of `year` as :meth:`monthdatescalendar` gives them,
+        in rows of `width` months."""
+        return self._year(self.monthdatescalendar, year, width)
+
+    def yeardayscalendar(self, year, width=3):
+        """Return months of `year` as :meth:`monthdayscalendar` gives them,
+        in rows of `width` months."""
+        return self._year(self.monthdayscalendar, year, width)
+
+    def yeardays2calendar(self, year, width=3):
+        """Return months of `year` as :meth:`monthdays2calendar` gives them,
+        in rows of `width` months."""
+        return self._year(self.monthdays2calendar, year, width)
+
+    def monthlayout(self, year, month):
+        """Return dictionary of `month` for JSON: year, month, number of
+        days, first weekday of week and weeks of days of month, 0 for days
+        of other months.
+
+        >>> Calendar(1).monthlayout(1392, 12) == {
+        ...     'year': 1392, 'month': 12, 'days': 29, 'firstweekday': 1,
+        ...     'weeks': ((0, 0, 0, 0, 1, 2, 3), (4, 5, 6, 7, 8, 9, 10),
+        ...               (11, 12, 13, 14, 15, 16, 17),
+        ...               (18, 19, 20, 21, 22, 23, 24),
+        ...               (25, 26, 27, 28, 29, 0, 0))}
+        True
+        """
+        weeks = _month_days_cached(year, month, self._firstweekday)
+        return {'year': year, 'month': month,
+                'days': pure.month_days(year, month),
+                'firstweekday': self._firstweekday, 'weeks': weeks}
+
+    def yearlayout(self, year):
+        """Return dictionary of `year` for JSON: year, whether it's leap,
+        first weekday of week and :meth:`monthlayout` of its months."""
+        return {'year': year, 'leap': isleap(year),
+                'firstweekday': self._firstweekday,
+                'months': [self.monthlayout(year, month)
+                           for month in range(1, 13)]}
+
+
+def monthcalendar(year, month):
+    """Return weeks of `month` in `year` starting at Shanbeh, see
+    :meth:`Calendar.monthdayscalendar`."""
+    return _month_days_cached(year, month, 0)
@@ -0,0 +1,249 @@
+"""
+    pyjalali.convert
+    ~~~~~~~~~~~~~~~~
+
+    Convert date columns of CSV files between Gregorian and Jalali
+    calendars, streaming them with constant memory::
+
+        python -m pyjalali.convert -c 0,3 -i '%Y-%m-%dT%H:%M:%S' \\
+            -f '%Y/%m/%d %H:%M' access.csv > access.jalali.csv
+        python -m pyjalali.convert --to-gregorian --header -c created \\
+            < jalali.csv > gregorian.csv
+
+    Gregorian dates are read by :meth:`python:datetime.datetime.strptime`
+    and written by :meth:`python:datetime.datetime.strftime`, Jalali ones by
+    :mod:`.jstr` formats through :mod:`.datetime`.  Gregorian input format
+    ``epoch`` reads POSIX timestamps in UTC, fractions of seconds kept to
+    microseconds.  Values which couldn't be converted are left as they are
+    and counted, unless ``--strict`` is given; they are reported by line of
+    input, header included.  Rows per second are reported on standard error
+    at end.
+
+    >>> convert = converter('%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M')
+    >>> convert('2013-11-23 23:46')
+    '1392/09/02 23:46'
+    >>> errors = []
+    >>> rows = [['a', '2013-03-21 00:00'], ['b', '2013-02-30 00:00']]
+    >>> list(convert_rows(rows, [1], convert, errors))
+    [['a', '1392/01/01 00:00'], ['b', '2013-02-30 00:00']]
+    >>> errors[0].row, errors[0].reason
+    (2, 'day is out of range for month')
+    >>> _gregorian_parser('epoch')('1364169600.5')
+    datetime.datetime(2013, 3, 25, 0, 0, 0, 500000)
+    >>> to_gregorian = converter('%Y/%m/%d', '%d %b %Y', to_gregorian=True)
+    >>> to_gregorian('1392/09/02')
+    '23 Nov 2013'
+"""
+
+from __future__ import absolute_import, print_function
+import argparse
+import csv
+import datetime as _std_dt_mod
+import io
+import sys
+from itertools import islice
+from time import time as _timestamp
+
+from pyjalali.datetime import datetime, g2j, j2g
+from pyjalali.formatting import _parse, compile_parser, row_error
+from pyjalali.helpers import lru_cache
+
+__all__ = ('converter', 'convert_rows', 'main')
+
+DEFAULT_FORMAT = '%Y-%m-%d %H:%M:%S'
+_DEFAULT_HELP = DEFAULT_FORMAT.replace('%', '%%')
+
+# rows converted and written at once
+_BATCH = 4096
+_BUFFER_SIZE = 1 << 20
+# distinct values remembered by a converter, dates of a file repeat a lot
+_CACHE_SIZE = 1 << 16
+_SHOWN_ERRORS = 10
+
+
+_EPOCH = _std_dt_mod.datetime(1970, 1, 1)
+
+
+def _from_epoch(s):
+    """Return UTC :class:`python:datetime.datetime` of POSIX timestamp
+    string `s`, split on the point to keep microseconds exact."""
+    seconds, _, fraction = s.strip().partition('.')
+    digits = seconds[1:] if seconds[:1] in ('+', '-') else seconds
+    if not digits.isdigit() or fraction and not fraction.isdigit():
+        raise ValueError('invalid timestamp %r' % s)
+    microseconds = int((fraction + '00000')[:6])
+    if seconds.startswith('-'):
+        microseconds = -microseconds
+    return _EPOCH + _std_dt_mod.timedelta(seconds=int(seconds),
+                                          microseconds=microseconds)
+
+
+def _gregorian_parser(format):
+    """Return function making :class:`python:datetime.datetime` of strings
+    in Gregorian `format`."""
+    if format == 'epoch':
+        return _from_epoch
+    if all(d in 'YmdHMS%' for _, d in _parse(format) if d):
+        # numeric fields read the same in both calendars, compiled
+        # parser is several times faster than strptime
+        parse = compile_parser(format)
+
+        def gregorian(s):
+            fields = parse(s)
+            if fields is None:
+                raise ValueError('time data %r does not match format %r' %
+                                 (s, format))
+            y, mo, d, H, M, S = fields[:6]
+            return _std_dt_mod.datetime(1900 if y is None else y,
+                                        1 if mo is None else mo,
+                                        1 if d is None else d,
+                                        H or 0, M or 0, S or 0)
+        return gregorian
+    return lambda s: _std_dt_mod.datetime.strptime(s, format)
+
+
+def converter(input_format=DEFAULT_FORMAT, output_format=DEFAULT_FORMAT,
+              to_gregorian=False):
+    """Return function converting a Gregorian date string in `input_format`
+    to Jalali one in `output_format`, or a Jalali one to Gregorian if
+    `to_gregorian` is true.  It raises :class:`ValueError` for strings it
+    can't convert.
+    """
+    if to_gregorian:
+        def convert(s):
+            return j2g(datetime.strptime(s, input_format)).strftime(
+                output_format)
+    else:
+        parse = _gregorian_parser(input_format)
+
+        def convert(s):
+            return g2j(parse(s)).strftime(output_format)
+    return lru_cache(_CACHE_SIZE)(convert)
+
+
+def convert_rows(rows, columns, convert, errors, strict=False, start=1):
+    """Yield `rows`, lists of strings, with `columns` indexes converted by
+    `convert`.  Failures are appended to `errors` as
+    :class:`.formatting.row_error` and the value is kept, or if `strict`,
+    :class:`ValueError` is raised.  Rows are numbered from `start`, line of
+    the first one in input.
+    """
+    for row, values in enumerate(rows, start):
+        for c in columns:
+            if c >= len(values):
+                continue
+            try:
+                values[c] = convert(values[c])
+            except (ValueError, OverflowError) as e:
+                if strict:
+                    raise ValueError('row %d, column %d: %s' % (row, c, e))
+                errors.append(row_error(row, values[c], str(e)))
+        yield values
+
+
+def _open(path, mode, encoding):
+    """Open `path`, standard input or output if it's '-', for csv module of
+    running Python."""
+    if path == '-':
+        path = (sys.stdin if 'r' in mode else sys.stdout).fileno()
+    if sys.version_info[0] < 3:
+        return io.open(path, mode + 'b', buffering=_BUFFER_SIZE,
+                       closefd=not isinstance(path, int))
+    return io.open(path, mode, buffering=_BUFFER_SIZE, encoding=encoding,
+                   newline='', closefd=not isinstance(path, int))
+
+
+def _columns(spec, header):
+    res = []
+    for name in spec.split(','):
+        if name.isdigit():
+            res.append(int(name))
+        elif header is not None and name in header:
+            res.append(header.index(name))
+        else:
+            raise ValueError('unknown column %r' % name)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pyjalali.convert',
+        description='Convert date columns of CSV files between Gregorian '
+                    'and Jalali calendars.')
+    parser.add_argument('files', nargs='*', default=['-'], metavar='FILE',
+                        help='input files, standard input if none or -')
+    parser.add_argument('-c', '--columns', default='0',
+                        help='comma separated indexes, or names with '
+                             '--header, of columns to convert (default 0)')
+    parser.add_argument('-d', '--delimiter', default=',',
+                        help='field delimiter (default ,)')
+    parser.add_argument('--header', action='store_true',
+                        help='first row of each file is a header, the '
+                             "first file's is copied as is")
+    parser.add_argument('-g', '--to-gregorian', action='store_true',
+                        help='convert Jalali dates to Gregorian')
+    parser.add_argument('-i', '--input-format', default=DEFAULT_FORMAT,
+                        help='format of input dates, epoch for Gregorian '
+                             'timestamps (default %s)' % _DEFAULT_HELP)
+    parser.add_argument('-f', '--output-format', default=DEFAULT_FORMAT,
+                        help='format of output dates (default %s)' %
+                             _DEFAULT_HELP)
+    parser.add_argument('-o', '--output', default='-',
+                        help='output file, standard output by default')
+    parser.add_argument('--encoding', default='utf-8',
+                        help='encoding of files (default utf-8)')
+    parser.add_argument('--strict', action='store_true',
+                        help='stop at first value which can not be '
+                             'converted')
+    args = parser.parse_args(argv)
+    if args.to_gregorian and args.input_format == 'epoch':
+        parser.error('epoch input format is for Gregorian timestamps')
+    delimiter = str(args.delimiter)
+
+    convert = converter(args.input_format, args.output_format,
+                        args.to_gregorian)
+    errors = []
+    count = error_count = 0
+    start = _timestamp()
+    out = _open(args.output, 'w', args.encoding)
+    try:
+        writer = csv.writer(out, delimiter=delimiter, lineterminator='\n')
+        for path in args.files:
+            with _open(path, 'r', args.encoding) as f:
+                reader = csv.reader(f, delimiter=delimiter)
+                header = next(reader, None) if args.header else None
+                try:
+                    columns = _columns(args.columns, header)
+                except ValueError as e:
+                    parser.error(str(e))
+                if header is not None and path == args.files[0]:
+                    writer.writerow(header)
+                rows = convert_rows(reader, columns, convert, errors,
+                                    args.strict, reader.line_num + 1)
+                while True:
+                    batch = list(islice(rows, _BATCH))
+                    if not batch:
+                        break
+                    writer.writerows(batch)
+                    count += len(batch)
+                    # first errors are shown, others only counted
+                    for e in errors[:max(_SHOWN_ERRORS - error_count, 0)]:
+                        sys.stderr.write('%s: row %d, %r: %s\n' % (
+                            path, e.row, e.text, e.reason))
+                    error_count += len(errors)
+                    del errors[:]
+    except ValueError as e:
+        sys.stderr.write('%s\n' % e)
+        return 1
+    finally:
+        out.flush()
+        if args.output != '-':
+            out.close()
+    elapsed = max(_timestamp() - start, 1e-9)
+    sys.stderr.write('%d rows in %.2f s, %.0f rows/s, %d errors\n' % (
+        count, elapsed, count / elapsed, error_count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,93 +5,162 @@
     High level API for libjalali.
 
     .. Note ::
-        * There is no `iso_calendar` or `to_ordinal` or `fromordinal` method
-          here.  Implementing them is easy, just forward to
-          :attr:`.datetime.gregorian` but those methods are not related to
-          Jalali really.
+        * There is no `iso_calendar` method here.  Implementing it is easy,
+          just forward to :attr:`.datetime.gregorian` but it is not related
+          to Jalali really.
+        * Ordinals of :meth:`.date.toordinal` are the proleptic Gregorian
+          ordinals of standard :mod:`python:datetime`, so both calendars
+          convert through them.
 """
 
 from __future__ import absolute_import
 import datetime as _std_dt_mod
-from time import time as _timestamp, mktime, strftime
-
-from pyjalali.jalali import (jalali_update, jalali_create_days_from_date,
-                             jalali_year_month_days)
-from pyjalali.jtime import jctime, jgmtime, jlocaltime, jmktime
-from pyjalali.jstr import jstrftime, jstrptime
+from time import time as _timestamp, strftime
+
+from pyjalali.jtime import jctime, jlocaltime, jmktime
+from pyjalali.formatting import (_complete, compile_format, compile_parser,
+                                  strptime_fields)
+from pyjalali.helpers import lru_cache
+from pyjalali.pure import (EPOCH_ORDINAL, EPOCH_WDAY, INDEX_FIRST_YEAR,
+                           INDEX_LAST_YEAR, _year_starts,
+                           accumulated_month_lengths, days_before_year,
+                           days_to_date, month_days)
 from pyjalali.types import struct_jtm, jtm_to_struct_time
-from pyjalali.helpers import normalize_jtm
 
 
 __all__ = ('date', 'datetime', 'j2g', 'g2j', 'now', 'utcnow',
            'jalali_from_gregorian', 'gregorian_from_jalali',
-           'datetime_from_ts')
+           'datetime_from_ts', 'datetime_from_us', 'conversion_cache_info',
+           'set_conversion_cache_size', 'DatePool')
+
+# days kept by converters, most recently used ones
+CONVERSION_CACHE_SIZE = 4096
+# days shared by a DatePool before it starts over
+DATE_POOL_SIZE = 1 << 16
+
+
+def _ordinal_of(year, month, day):
+    """Return ordinal of given date, checking its fields."""
+    if not 1 <= month <= 12:
+        raise ValueError('month value out of range [1, 12]')
+    # all months have at least 29 days
+    if not 1 <= day <= 29 and not 1 <= day <= month_days(year, month):
+        raise ValueError('day is out of range for month')
+    if _year_starts and INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+        start = _year_starts[year - INDEX_FIRST_YEAR]
+    else:
+        start = days_before_year(year)
+    return (EPOCH_ORDINAL + start + accumulated_month_lengths[month - 1] +
+            day - 1)
+
+
+def _make_jtm(ordinal, year, month, day, seconds=0):
+    """Return a new :class:`.types.struct_jtm` from fields of a date."""
+    days = ordinal - EPOCH_ORDINAL
+    hour, seconds = divmod(seconds, 3600)
+    return struct_jtm(seconds % 60, seconds // 60, hour, day, month - 1, year,
+                      (days + EPOCH_WDAY) % 7, days - days_before_year(year))
+
+
+def _new_date(ordinal, year, month, day):
+    """Make :class:`.date` from already checked fields."""
+    d = object.__new__(date)
+    d._ordinal = ordinal
+    d._year = year
+    d._month = month
+    d._day = day
+    return d
+
+
+def _new_datetime(ordinal, year, month, day, seconds, microsecond, tzinfo):
+    """Make :class:`.datetime` from already checked fields."""
+    d = object.__new__(datetime)
+    d._ordinal = ordinal
+    d._year = year
+    d._month = month
+    d._day = day
+    d._seconds = seconds
+    d.microsecond = microsecond
+    d.tzinfo = tzinfo
+    d._key = (ordinal * 86400 + seconds) * 1000000 + microsecond
+    d._utc_key = None
+    return d
+
+
+class _constant(object):
+    """Class attribute `name` made by `make` on first access, it's kept on
+    the class then.  Making some constants needs the year index of
+    :mod:`.pure`, which is better not built on import."""
+
+    def __init__(self, name, make):
+        self.name = name
+        self.make = make
+
+    def __get__(self, obj, cls):
+        value = self.make()
+        setattr(cls, self.name, value)
+        return value
 
 
 class date(object):
-    __have_yday_wday = False
-    __hash_val = None
+    # A date is its proleptic Gregorian ordinal, year, month and day are kept
+    # too for cheap access.  Broken-down structure needed by libjalali is
+    # made on demand by jtm property.
+    __slots__ = ('_ordinal', '_year', '_month', '_day')
 
     def __init__(self, year, month, day):
-        if not 1 <= month <= 12:
-            raise ValueError('month value out of range [1, 12]')
-        if day > jalali_year_month_days(year, month - 1):
-            raise ValueError('day is out of range for month')
-        self.__jtm = struct_jtm()
-        self.__jtm.tm_year = year
-        self.__jtm.tm_mon = month - 1
-        self.__jtm.tm_mday = day
+        self._ordinal = _ordinal_of(year, month, day)
+        self._year = year
+        self._month = month
+        self._day = day
+
+    def __reduce__(self):
+        return self.__class__, (self._year, self._month, self._day)
 
     def __add__(self, delta):
         if isinstance(delta, _std_dt_mod.timedelta):
-            njtm = self.__jtm.copy()
-            njtm.tm_mday += delta.days
-            normalize_jtm(njtm)
-            return date(njtm.tm_year, njtm.tm_mon + 1, njtm.tm_mday)
+            return date.fromordinal(self._ordinal + delta.days)
         raise TypeError('Unsupported operand type for +: %s and %s' %
                         (self.__class__.__name__, delta.__class__.__name__))
 
     def __eq__(self, jdate):
         if isinstance(jdate, date):
-            return (self.year == jdate.year and self.month == jdate.month and
-                    self.day == jdate.day)
-            raise TypeError('Unsupported operand type for ==: %s and %s' %
-                            (self.__class__.__name__,
-                             jdate.__class__.__name__))
+            return self._ordinal == jdate._ordinal
+        return NotImplemented
+
+    def __ne__(self, jdate):
+        if isinstance(jdate, date):
+            return self._ordinal != jdate._ordinal
+        return NotImplemented
 
     def __hash__(self):
-        if self.__hash_val is None:
-            self.__hash_val = hash((self.year, self.month, self.day, 101))
-        return self.__hash_val
+        return hash(self._ordinal)
 
-    def __lt__(self, jdate):
+    def _other_ordinal(self, jdate, op):
         if isinstance(jdate, date):
-            if self.year < jdate.year:
-                return True
-            elif self.year != jdate.year:
-                return False
-            if self.month < jdate.month:
-                return True
-            elif self.month != jdate.month:
-                return False
-            return True if self.day < jdate.day else False
-        raise TypeError('Unsupported operand type for <: %s and %s' %
-                        (self.__class__.__name__, jdate.__class__.__name__))
+            return jdate._ordinal
+        raise TypeError('Unsupported operand type for %s: %s and %s' %
+                        (op, self.__class__.__name__,
+                         jdate.__class__.__name__))
+
+    def __lt__(self, jdate):
+        return self._ordinal < self._other_ordinal(jdate, '<')
+
+    def __le__(self, jdate):
+        return self._ordinal <= self._other_ordinal(jdate, '<=')
+
+    def __gt__(self, jdate):
+        return self._ordinal > self._other_ordinal(jdate, '>')
+
+    def __ge__(self, jdate):
+        return self._ordinal >= self._other_ordinal(jdate, '>=')
 
     def __sub__(self, delta_or_date):
         if isinstance(delta_or_date, _std_dt_mod.timedelta):
-            delta = delta_or_date
-            njtm = self.__jtm.copy()
-            njtm.tm_mday -= delta.days
-            normalize_jtm(njtm)
-            return date(njtm.tm_year, njtm.tm_mon + 1, njtm.tm_mday)
+            return date.fromordinal(self._ordinal - delta_or_date.days)
         if isinstance(delta_or_date, date):
-            jd = delta_or_date
-            onjtm = jd.jtm.copy()
-            self._compute_yday_wday_if_necessary()
-            jalali_create_days_from_date(onjtm)
-            dx = self.__jtm.tm_yday - onjtm.tm_yday
-            return _std_dt_mod.timedelta(days=dx)
+            return _std_dt_mod.timedelta(
+                days=self._ordinal - delta_or_date._ordinal)
         raise TypeError('Unsupported operand type for -: %s and %s' %
                         (self.__class__.__name__,
                          delta_or_date.__class__.__name__))
@@ -99,9 +168,9 @@ class date(object):
     def __repr__(self):
         return '%s.%s(%d, %d, %d)' % (self.__module__,
                                       self.__class__.__name__,
-                                      self.year,
-                                      self.month,
-                                      self.day)
+                                      self._year,
+                                      self._month,
+                                      self._day)
 
     def __str__(self):
         return self.isoformat()
@@ -109,42 +178,34 @@ class date(object):
     def __format__(self, format):
         return self.strftime(format)
 
-    def _compute_yday_wday_if_necessary(self):
-        if not self.__have_yday_wday:
-            njtm = self.__jtm.copy()
-            jalali_update(njtm)
-            self.__jtm.tm_wday = njtm.tm_wday
-            self.__jtm.tm_yday = njtm.tm_yday
-            self.__have_yday_wday = True
-
     @property
     def jtm(self):
-        """Broken-down jalali time structure for this date"""
-        return self.__jtm
+        """Broken-down jalali time structure for this date.  A new one is
+        made on each access, changing it doesn't affect the date."""
+        return _make_jtm(self._ordinal, self._year, self._month, self._day)
 
     @property
     def year(self):
-        return self.__jtm.tm_year
+        return self._year
 
     @property
     def month(self):
-        return self.__jtm.tm_mon + 1
+        return self._month
 
     def ctime(self):
         """Return a string representing the date, ``date(1392, 8, 2).ctime() ==
         'Thu Aba 02 00:00:00 1392'``"""
-        njtm = self.__jtm.copy()
-        return jctime(jmktime(njtm))
+        return jctime(jmktime(self.jtm))
 
     @property
     def day(self):
-        return self.__jtm.tm_mday
+        return self._day
 
     def replace(self, **kw):
         """Return new date object where values for supplied keyword keywrod
         arguments reset: ``date(1392, 2, 8).replace(month=9) == date(1392, 9,
         8)```"""
-        d = dict(year=self.year, month=self.month, day=self.day)
+        d = dict(year=self._year, month=self._month, day=self._day)
         d.update(**kw)
         return date(**d)
 
@@ -153,25 +214,46 @@ class date(object):
         """Return current local date"""
         return date.fromtimestamp(_timestamp())
 
+    @classmethod
+    def intern(self, year, month, day):
+        """Return the shared instance of given date from default
+        :class:`.DatePool`.
+
+        >>> date.intern(1392, 9, 2) is date.intern(1392, 9, 2)
+        True
+        """
+        return _pool.date(year, month, day)
+
     def timetuple(self):
         """Return a :class:`time.struct_time` from this date.  DST flag is
         -1"""
-        njtm = self.__jtm.copy()
-        jalali_update(njtm)
+        njtm = self.jtm
         njtm.tm_isdst = -1
         return jtm_to_struct_time(njtm)
 
     @classmethod
     def fromtimestamp(self, ts):
         """Return the local date corresponding to the POSIX timestamp"""
-        jtm = jlocaltime(int(ts))
+        jtm = jlocaltime(int(ts // 1))
         return date(jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday)
 
+    @classmethod
+    def fromordinal(self, ordinal):
+        """Return the date corresponding to the proleptic Gregorian ordinal,
+        where January 1 of year 1 has ordinal 1.
+
+        >>> date.fromordinal(735195)
+        pyjalali.datetime.date(1392, 9, 2)
+        """
+        if ordinal < 1:
+            raise ValueError('ordinal must be >= 1')
+        return _new_date(ordinal, *days_to_date(ordinal - EPOCH_ORDINAL))
+
     def isoformat(self):
         """Return a string representing the date in ISO 8601 format,
         `YYYY-MM-DD`.  For example ``date(1392, 8, 2).isoformat() ==
         1392-08-02'``"""
-        return self.strftime('%Y-%m-%d')
+        return '%d-%02d-%02d' % (self._year, self._month, self._day)
 
     def isoweekday(self):
         """Return the day of the week as an integer, where Shanbeh is 1"""
@@ -187,128 +269,198 @@ class date(object):
             which might defined in your platform too but for other intentions.
             Check list of libjalali's formatting directives.
         """
-        self._compute_yday_wday_if_necessary()
-        return jstrftime(format, self.__jtm)
+        render = compile_format(format)
+        return render(*self._format_fields(render.uses_zone))
+
+    def _format_fields(self, uses_zone):
+        days = self._ordinal - EPOCH_ORDINAL
+        return (self._year, self._month, self._day, 0, 0, 0,
+                (days + EPOCH_WDAY) % 7, days - days_before_year(self._year),
+                0, 0, None)
+
+    def toordinal(self):
+        """Return the proleptic Gregorian ordinal of the date, same as
+        ``self.gregorian.toordinal()`` would be.
+
+        >>> date(1392, 9, 2).toordinal()
+        735195
+        >>> date(1, 1, 1).toordinal()
+        226898
+        """
+        return self._ordinal
 
     def weekday(self):
         """Return the day of the week as an integer, where Shanbeh is 0"""
-        self._compute_yday_wday_if_necessary()
-        return self.__jtm.tm_wday
+        return (self._ordinal - EPOCH_ORDINAL + EPOCH_WDAY) % 7
 
 
-date.min = date(1, 1, 1)
-date.max = date(9999, 12, 29)
+date.min = _constant('min', lambda: date(1, 1, 1))
+date.max = _constant('max', lambda: date(9999, 12, 29))
 date.resolution = _std_dt_mod.timedelta(days=1)
 
 
 class datetime(object):
-    __hash_val = None
-    tzinfo = None  # let be here, might be invoked before init carelessly
+    # Like date, plus seconds passed since start of the day.  Comparisons and
+    # hashing use _key, microseconds since start of ordinal 0, made on
+    # construction and shifted to UTC into _utc_key for aware datetimes on
+    # first need.  So like standard datetimes, these must not be changed.
+    __slots__ = ('_ordinal', '_year', '_month', '_day', '_seconds',
+                 'microsecond', 'tzinfo', '_key', '_utc_key', '__gregorian')
 
     def __init__(self, year, month, day, hour=None, minute=None, second=None,
                  microsecond=0, tzinfo=None):
         if not isinstance(microsecond, int):
             raise TypeError
-        self.__date = date(year, month, day)
-        self.__jtm = self.__date.jtm
+        self._ordinal = _ordinal_of(year, month, day)
+        self._year = year
+        self._month = month
+        self._day = day
+        seconds = 0
         if hour is not None:
             if not 0 <= hour <= 23:
                 raise ValueError('hour must be in 0..23')
-            self.__jtm.tm_hour = hour
+            seconds = hour * 3600
         if minute is not None:
             if not 0 <= minute <= 59:
                 raise ValueError('minute must be in 0..59')
-            self.__jtm.tm_min = minute
+            seconds += minute * 60
         if second is not None:
             if not 0 <= second <= 59:
                 raise ValueError('second must be in 0..59')
-            self.__jtm.tm_sec = second
+            seconds += second
+        self._seconds = seconds
         self.microsecond = microsecond
         self.tzinfo = tzinfo
+        self._key = (self._ordinal * 86400 + seconds) * 1000000 + microsecond
+        self._utc_key = None
+
+    def __reduce__(self):
+        return self.__class__, (self._year, self._month, self._day, self.hour,
+                                self.minute, self.second, self.microsecond,
+                                self.tzinfo)
 
     def __add__(self, delta):
+        """Shift by a :class:`python:datetime.timedelta`, in constant time
+        whatever its length.
+
+        >>> datetime(1392, 12, 29, 23, 30) + _std_dt_mod.timedelta(minutes=45)
+        pyjalali.datetime.datetime(1393, 1, 1, 0, 15, 0, 0)
+        """
         if isinstance(delta, _std_dt_mod.timedelta):
-            njtm = self.__jtm.copy()
-            njtm.tm_sec += delta.seconds
-            njtm.tm_mday += delta.days
-            ms = normalize_jtm(njtm, self.microsecond + delta.microseconds)
-            return datetime_from_jtm(njtm, ms, self.tzinfo)
+            return self._shifted(delta.days, delta.seconds,
+                                 delta.microseconds)
         raise TypeError('Unsupported operand type for +: %s and %s' %
                         (self.__class__.__name__, delta.__class__.__name__))
 
-    def __eq__(self, jdt):
-        if isinstance(jdt, datetime):
-            if (jdt.tzinfo is None) != (self.tzinfo is None):
+    __radd__ = __add__
+
+    def _shifted(self, days, seconds, microseconds):
+        """Return datetime `days`, `seconds` and `microseconds` after this
+        one, by arithmetic on its ordinal and seconds of the day."""
+        microsecond = self.microsecond + microseconds
+        seconds += self._seconds
+        if not 0 <= microsecond < 1000000:
+            carry, microsecond = divmod(microsecond, 1000000)
+            seconds += carry
+        if not 0 <= seconds < 86400:
+            carry, seconds = divmod(seconds, 86400)
+            days += carry
+        if not days:
+            return _new_datetime(self._ordinal, self._year, self._month,
+                                 self._day, seconds, microsecond, self.tzinfo)
+        ordinal = self._ordinal + days
+        day = self._day + days
+        # all months have at least 29 days
+        if 1 <= day <= 29:
+            return _new_datetime(ordinal, self._year, self._month, day,
+                                 seconds, microsecond, self.tzinfo)
+        if not date.min._ordinal <= ordinal <= date.max._ordinal:
+            raise OverflowError('date value out of range')
+        return _new_datetime(ordinal, *days_to_date(ordinal - EPOCH_ORDINAL) +
+                             (seconds, microsecond, self.tzinfo))
+
+    def _utc(self):
+        """Return sort key of this aware datetime, shifted to UTC."""
+        key = self._utc_key
+        if key is None:
+            offset = self.utcoffset()
+            key = self._key
+            if offset is not None:
+                key -= ((offset.days * 86400 + offset.seconds) * 1000000 +
+                        offset.microseconds)
+            self._utc_key = key
+        return key
+
+    def _keys(self, dt, op):
+        """Return sort keys of this datetime and `dt` to compare by `op`,
+        where their tzinfo aren't the same."""
+        if isinstance(dt, datetime):
+            if (self.tzinfo is None) != (dt.tzinfo is None):
                 raise TypeError("can't compare offset-naive and offset-aware"
-                                "datetime")
-            if jdt.tzinfo != self.tzinfo:
-                return (self.replace(tzinfo=None) - self.utcoffset()) == \
-                       (jdt.replace(tzinfo=None) - jdt.utcoffset())
-            return (self.year == jdt.year and self.month == jdt.month and
-                    self.day == jdt.day and self.hour == jdt.hour and
-                    self.minute == jdt.minute and self.second == jdt.second
-                    and self.microsecond == jdt.microsecond)
-        raise TypeError('Unsupported operand type for ==: %s and %s' %
-                        (self.__class__.__name__, jdt.__class__.__name__))
+                                " datetimes")
+            return self._utc(), dt._utc()
+        raise TypeError('Unsupported operand type for %s: %s and %s' %
+                        (op, self.__class__.__name__, dt.__class__.__name__))
+
+    # Datetimes of same tzinfo, naive ones included, compare by their local
+    # key, like standard ones.  Objects of other types fail at _key lookup.
+
+    def __eq__(self, jdt):
+        try:
+            if self.tzinfo is jdt.tzinfo:
+                return self._key == jdt._key
+        except AttributeError:
+            pass
+        a, b = self._keys(jdt, '==')
+        return a == b
+
+    def __ne__(self, jdt):
+        return not self == jdt
 
     def __hash__(self):
-        # tzinfo shoudn't count, two date with different zone's should produce
-        # same hash but if one is aware and one is naive it should be different
-        if self.__hash_val is None:
-            if self.tzinfo is None:
-                d = self
-            else:
-                d = self - self.utcoffset()
-            # yes, who cares?
-            str = '%d%d%d%d%d%d%d%d' % (d.year, d.month, d.day, d.hour,
-                                        d.minute, d.second, d.microsecond,
-                                        d.tzinfo is None)
-            self.__hash_val = hash(str)
-        return self.__hash_val
+        # tzinfo shouldn't count, same instants in different zones are equal
+        if self.tzinfo is None:
+            return hash(self._key)
+        return hash(self._utc())
 
     def __lt__(self, dt):
-        if isinstance(dt, datetime):
-            d1 = self
-            d2 = dt
-            if (d1.tzinfo or d2.tzinfo) is None:
-                if d1.year < d2.year:
-                    return True
-                if d1.year != d2.year:
-                    return False
-                if d1.month < d2.month:
-                    return True
-                if d1.month != d2.month:
-                    return False
-                if d1.day < d2.day:
-                    return True
-                elif d1.day != d2.day:
-                    return False
-                if d1.hour < d2.hour:
-                    return True
-                elif d1.hour != d2.hour:
-                    return False
-                if d1.minute < d2.minute:
-                    return True
-                elif d1.minute != d2.minute:
-                    return False
-                if d1.second < d2.second:
-                    return True
-                elif d1.second != d2.second:
-                    return False
-                return True if d1.microsecond < d2.microsecond else False
-            if not (d1.tzinfo and d2.tzinfo):
-                raise TypeError("can't compare offset-naive and offset-aware"
-                                "datetimes")
-            if d1.tzinfo is not None:
-                d1 = d1.replace(tzinfo=None) - d1.utcoffset()
-            if d2.tzinfo is not None:
-                d2 = d2.replace(tzinfo=None) - d2.utcoffset()
-            return d1 < d2
+        try:
+            if self.tzinfo is dt.tzinfo:
+                return self._key < dt._key
+        except AttributeError:
+            pass
         if isinstance(dt, _std_dt_mod.datetime):
             # It might seem stupid but pytz needs this anyway
             return self.gregorian < dt
-        raise TypeError('Unsupported operand type for <: %s and %s' %
-                        (self.__class__.__name__, dt.__class__.__name__))
+        a, b = self._keys(dt, '<')
+        return a < b
+
+    def __le__(self, dt):
+        try:
+            if self.tzinfo is dt.tzinfo:
+                return self._key <= dt._key
+        except AttributeError:
+            pass
+        a, b = self._keys(dt, '<=')
+        return a <= b
+
+    def __gt__(self, dt):
+        try:
+            if self.tzinfo is dt.tzinfo:
+                return self._key > dt._key
+        except AttributeError:
+            pass
+        a, b = self._keys(dt, '>')
+        return a > b
+
+    def __ge__(self, dt):
+        try:
+            if self.tzinfo is dt.tzinfo:
+                return self._key >= dt._key
+        except AttributeError:
+            pass
+        a, b = self._keys(dt, '>=')
+        return a >= b
 
     def __repr__(self):
         fmt = '%s.%s(%r, %r, %r, %r, %r, %r, %r%%s' % \
@@ -329,13 +481,18 @@ class datetime(object):
         return self.isoformat(' ')
 
     def __sub__(self, delta_or_jdt):
+        """Shift back by a :class:`python:datetime.timedelta`, or return
+        difference to another datetime as one.
+
+        >>> print(datetime(1393, 1, 1, 0, 15) - datetime(1392, 12, 29, 23, 30))
+        0:45:00
+        >>> print(datetime(1393, 1, 1) - datetime(1391, 1, 1))
+        731 days, 0:00:00
+        """
         if isinstance(delta_or_jdt, _std_dt_mod.timedelta):
             delta = delta_or_jdt
-            njtm = self.__jtm.copy()
-            njtm.tm_sec -= delta.seconds
-            njtm.tm_mday -= delta.days
-            ms = normalize_jtm(njtm, self.microsecond - delta.microseconds)
-            return datetime_from_jtm(njtm, ms, self.tzinfo)
+            return self._shifted(-delta.days, -delta.seconds,
+                                 -delta.microseconds)
         if isinstance(delta_or_jdt, _std_dt_mod.datetime):
             raise TypeError("It doesn't make sense subtract Gregorian date "
                             "from Jalali date")
@@ -344,18 +501,11 @@ class datetime(object):
             if (self.tzinfo is None) != (jdt.tzinfo is None):
                 raise TypeError("can't subtract offset-naive and offset-aware"
                                 "datetimes")
-            if self.tzinfo != jdt.tzinfo:
-                return (self.replace(tzinfo=None) - self.utcoffset()) - \
-                       (jdt.replace(tzinfo=None) - jdt.utcoffset())
-            self.__date._compute_yday_wday_if_necessary()
-            onjtm = jdt.jtm.copy()
-            jalali_create_days_from_date(onjtm)
-            dx = _std_dt_mod.timedelta(days=self.__jtm.tm_yday-onjtm.tm_yday,
-                                       hours=self.hour - jdt.hour,
-                                       minutes=self.minute - jdt.minute,
-                                       seconds=self.second - jdt.second,
-                                       microseconds=(self.microsecond -
-                                                     jdt.microsecond))
+            dx = _std_dt_mod.timedelta(self._ordinal - jdt._ordinal,
+                                       self._seconds - jdt._seconds,
+                                       self.microsecond - jdt.microsecond)
+            if self.tzinfo is not jdt.tzinfo and self.tzinfo != jdt.tzinfo:
+                return dx - self.utcoffset() + jdt.utcoffset()
             return dx
         raise TypeError('Unsupported operand type for -: %s and %s' %
                         (self.__class__.__name__,
@@ -376,7 +526,10 @@ class datetime(object):
         if self.tzinfo is None:
             raise ValueError('astimezone() cannot be applied to naive-offset '
                              'datetime')
-        utc = (self - self.utcoffset()).replace(tzinfo=None)
+        offset = self.utcoffset()
+        utc = self._shifted(-offset.days, -offset.seconds,
+                            -offset.microseconds)
+        utc.tzinfo = None
         return tz.fromutc(utc)
 
     def dst(self):
@@ -397,33 +550,35 @@ class datetime(object):
         """Return Gregorian :class:`python:datetime.datetime` object
         corresponding to this datetime.  Result will cached for future uses.
         """
-        if getattr(self, '__gregorian', None) is None:
+        try:
+            return self.__gregorian
+        except AttributeError:
             self.__gregorian = gregorian_from_jalali(self)
-        return self.__gregorian
+            return self.__gregorian
 
     @property
     def year(self):
-        return self.__jtm.tm_year
+        return self._year
 
     @property
     def month(self):
-        return self.__jtm.tm_mon + 1
+        return self._month
 
     @property
     def day(self):
-        return self.__jtm.tm_mday
+        return self._day
 
     @property
     def hour(self):
-        return self.__jtm.tm_hour
+        return self._seconds // 3600
 
     @property
     def minute(self):
-        return self.__jtm.tm_min
+        return self._seconds // 60 % 60
 
     @property
     def second(self):
-        return self.__jtm.tm_sec
+        return self._seconds % 60
 
     @classmethod
     def combine(self, date, time):
@@ -442,11 +597,11 @@ class datetime(object):
         >>> datetime(1392, 9, 1, 12, 32, 14, 992).ctime()
         'Jom Aza 01 12:32:14 1392'
         """
-        return jctime(jmktime(self.__jtm.copy()))
+        return jctime(jmktime(self.jtm))
 
     def date(self):
         """Return :class:`.date` object with same year, month and day."""
-        return self.__date.replace()
+        return _new_date(self._ordinal, self._year, self._month, self._day)
 
     @classmethod
     def fromtimestamp(self, ts, tz=None):
@@ -458,13 +613,31 @@ class datetime(object):
         """
         return datetime_from_ts(ts, True, tz)
 
+    @classmethod
+    def fromtimestamp_us(self, us, tz=None):
+        """Like :meth:`fromtimestamp` but taking integer microseconds since
+        UTC Epoch, see :func:`datetime_from_us`."""
+        return datetime_from_us(us, True, tz)
+
+    @classmethod
+    def fromordinal(self, ordinal):
+        """Return the datetime corresponding to the proleptic Gregorian
+        ordinal, where January 1 of year 1 has ordinal 1.  The hour, minute,
+        second and microsecond of the result are all 0, and :attr:`.tzinfo`
+        is None.
+        """
+        d = date.fromordinal(ordinal)
+        return datetime(d.year, d.month, d.day)
+
     def __format__(self, format):
         return self.strftime(format)
 
     @property
     def jtm(self):
-        """Broken-down jalali time structure for this date"""
-        return self.__jtm
+        """Broken-down jalali time structure for this datetime.  A new one is
+        made on each access, changing it doesn't affect the datetime."""
+        return _make_jtm(self._ordinal, self._year, self._month, self._day,
+                         self._seconds)
 
     def isoformat(self, sep='T'):
         """
@@ -476,21 +649,24 @@ class datetime(object):
         >>> datetime(1392, 9, 1, 12, 32, 14, 992).isoformat(' ')
         '1392-09-01 12:32:14.992'
         """
-        format = '%Y-%m-%d'+sep+'%H:%M:%S'
+        seconds = self._seconds
+        res = '%d-%02d-%02d%s%02d:%02d:%02d' % (
+            self._year, self._month, self._day, sep, seconds // 3600,
+            seconds // 60 % 60, seconds % 60)
         if self.microsecond != 0:
-            format += '.%d' % self.microsecond
+            res += '.%d' % self.microsecond
         utcoff = self.utcoffset()
         if utcoff is not None:
             if utcoff.total_seconds() >= 0:
                 sign = '+'
             else:
                 sign = '-'
-            format += '%s%s' % (sign, str(utcoff).rsplit(':', 1)[0])
-        return self.strftime(format)
+            res += '%s%s' % (sign, str(utcoff).rsplit(':', 1)[0])
+        return res
 
     def isoweekday(self):
         """Return the day of the week as an integer, where Shanbeh is 1"""
-        return self.__date.isoweekday()
+        return self.weekday() + 1
 
     @classmethod
     def now(self, tz=None):
@@ -514,19 +690,30 @@ class datetime(object):
         """Return a string representing the date and time, controlled by an
         explicit format string.
         """
-        self.__date._compute_yday_wday_if_necessary()
-        if self.tzinfo is not None:
-            njtm = self.__jtm.copy()
-            njtm.tm_gmtoff = int(self.utcoffset().total_seconds())
-            njtm.tm_zone = self.tzname()
-            return jstrftime(format, njtm)
-        return jstrftime(format, self.jtm)
+        render = compile_format(format)
+        return render(*self._format_fields(render.uses_zone))
+
+    def _format_fields(self, uses_zone):
+        days = self._ordinal - EPOCH_ORDINAL
+        seconds = self._seconds
+        gmtoff, zone = 0, None
+        if uses_zone and self.tzinfo is not None:
+            gmtoff = int(self.utcoffset().total_seconds())
+            zone = self.tzname()
+        return (self._year, self._month, self._day, seconds // 3600,
+                seconds // 60 % 60, seconds % 60, (days + EPOCH_WDAY) % 7,
+                days - days_before_year(self._year), 0, gmtoff, zone)
 
     @classmethod
     def strptime(self, date_str, format):
         """Return a datetime corresponding to `date_str`, parsed according to
-        `format`."""
-        return datetime_from_jtm(jstrptime(format, date_str))
+        `format`, see :mod:`.formatting` for directives.  Raise
+        :class:`ValueError` if `date_str` doesn't match.
+
+        >>> datetime.strptime('1392/09/02 23:46', '%Y/%m/%d %H:%M')
+        pyjalali.datetime.datetime(1392, 9, 2, 23, 46, 0, 0)
+        """
+        return datetime(*strptime_fields(format, date_str))
 
     def timetuple(self):
         """Return a :class:`time.struct_time` from this date. The tm_isdst
@@ -535,8 +722,7 @@ class datetime(object):
         returns a non-zero value, tm_isdst is set to 1; else tm_isdst is set
         to 0."""
 
-        njtm = self.__jtm.copy()
-        jalali_update(njtm)
+        njtm = self.jtm
         if self.dst() is None:
             njtm.tm_isdst = -1
         elif self.dst() == 0:
@@ -550,9 +736,7 @@ class datetime(object):
             d = self
         else:
             d = self.replace(tzinfo=None) - self.utcoffset()
-        njtm = d.jtm.copy()
-        jalali_update(njtm)
-        return jtm_to_struct_time(njtm)
+        return jtm_to_struct_time(d.jtm)
 
     def time(self):
         """Return :class:`python:datetime.time` object with same hour, minute,
@@ -571,6 +755,10 @@ class datetime(object):
         """Return the current local datetime, with :attr:`~.tzinfo` None."""
         return now()
 
+    def toordinal(self):
+        """Return the proleptic Gregorian ordinal of the date."""
+        return self._ordinal
+
     def tzname(self):
         """If tzinfo is None, returns None, else returns
         ``self.tzinfo.tzname(self)``, raises an exception if the latter
@@ -623,6 +811,12 @@ class datetime(object):
         timestamp, with :attr:`~.tzinfo` None."""
         return datetime_from_ts(ts, False)
 
+    @classmethod
+    def utcfromtimestamp_us(self, us):
+        """Like :meth:`utcfromtimestamp` but taking integer microseconds
+        since UTC Epoch, see :func:`datetime_from_us`."""
+        return datetime_from_us(us, False)
+
     @classmethod
     def utcnow(self):
         """Return the current UTC date and time, with :attr:`~.tzinfo` None.
@@ -632,15 +826,92 @@ class datetime(object):
 
     def weekday(self):
         """Return the day of the week as an integer, where Shanbeh is 0."""
-        return self.__date.weekday()
+        return (self._ordinal - EPOCH_ORDINAL + EPOCH_WDAY) % 7
 
 
-datetime.min = datetime(1, 1, 1)
+datetime.min = _constant('min', lambda: datetime(1, 1, 1))
 #XXX: not sure, ask ashkan
-datetime.max = datetime(9999, 12, 29, 23, 59, 59)
+datetime.max = _constant('max', lambda: datetime(9999, 12, 29, 23, 59, 59))
 datetime.resolution = _std_dt_mod.timedelta(seconds=1)
 
 
+class DatePool(object):
+    """Table of shared :class:`.date` instances, one per day, for code making
+    same dates over and over.  Dates are checked and made only first time
+    their day is asked, later they cost a dictionary lookup.  When `maxsize`
+    days are kept, table starts over empty; dates given out stay valid.
+
+    >>> pool = DatePool()
+    >>> pool.date(1392, 9, 2) is pool.g2j(_std_dt_mod.date(2013, 11, 23))
+    True
+    >>> d = pool.strptime('1392/09/02 23:46', '%Y/%m/%d %H:%M')
+    >>> d is pool.fromordinal(735195)
+    True
+    >>> len(pool)
+    1
+    """
+
+    def __init__(self, maxsize=DATE_POOL_SIZE):
+        self.maxsize = maxsize
+        self._by_ordinal = {}
+        self._by_fields = {}
+
+    def __len__(self):
+        return len(self._by_ordinal)
+
+    def _add(self, d):
+        if len(self._by_ordinal) >= self.maxsize:
+            self.clear()
+        self._by_ordinal[d._ordinal] = d
+        self._by_fields[d._year, d._month, d._day] = d
+        return d
+
+    def clear(self):
+        """Forget all dates."""
+        self._by_ordinal.clear()
+        self._by_fields.clear()
+
+    def date(self, year, month, day):
+        """Return shared ``date(year, month, day)``."""
+        d = self._by_fields.get((year, month, day))
+        if d is None:
+            ordinal = _ordinal_of(year, month, day)
+            d = self._by_ordinal.get(ordinal)
+            if d is None:
+                d = self._add(_new_date(ordinal, year, month, day))
+        return d
+
+    def fromordinal(self, ordinal):
+        """Return shared date of proleptic Gregorian `ordinal`, see
+        :meth:`.date.fromordinal`."""
+        d = self._by_ordinal.get(ordinal)
+        if d is None:
+            d = self._add(date.fromordinal(ordinal))
+        return d
+
+    def g2j(self, date_or_datetime):
+        """Return shared Jalali date of Gregorian
+        :class:`python:datetime.date` or day of
+        :class:`python:datetime.datetime`."""
+        return self.fromordinal(date_or_datetime.toordinal())
+
+    def fromtimestamp(self, ts):
+        """Return shared local date of POSIX timestamp `ts`, see
+        :meth:`.date.fromtimestamp`."""
+        jtm = jlocaltime(int(ts // 1))
+        return self.date(jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday)
+
+    def strptime(self, date_str, format):
+        """Return shared date of `date_str` parsed by `format`, like
+        :meth:`.datetime.strptime`; time fields are ignored."""
+        year, month, day = _complete(compile_parser(format)(date_str), format,
+                                     date_str)[:3]
+        return self.date(year, month, day)
+
+
+_pool = DatePool()
+
+
 def now(timezone=None):
     """See :meth:`.datetime.now`."""
     return datetime_from_ts(_timestamp(), True, tz=timezone)
@@ -654,20 +925,75 @@ def utcnow():
 def datetime_from_ts(ts, local, tz=None):
     """Return :class:`.datetime` from provided timestamp `ts`.
 
-    :param int ts: timestamp
+    :param ts: timestamp, int or float
     :param bool local: if True, return local date else return date in UTC
     :param `datetime.tzinfo` tz: if provided, make timezone aware datetime
         discarding effect of local parameter
     """
-    uts = int(ts % 1 * 1000000)
-    tts = int(ts)
+    return _datetime_from_secs(int(ts // 1), int(ts % 1 * 1000000), local,
+                               tz)
+
+
+def datetime_from_us(us, local, tz=None):
+    """Return :class:`.datetime` from `us`, integer microseconds since UTC
+    Epoch like int64 values of ``datetime64[us]`` arrays, without going
+    through a float.  Other arguments are those of :func:`datetime_from_ts`.
+
+    >>> datetime_from_us(4102444800123456, False)
+    pyjalali.datetime.datetime(1478, 10, 12, 0, 0, 0, 123456)
+    >>> datetime_from_us(-1, False)
+    pyjalali.datetime.datetime(1348, 10, 10, 23, 59, 59, 999999)
+    """
+    seconds, microsecond = divmod(int(us), 1000000)
+    return _datetime_from_secs(seconds, microsecond, local, tz)
+
+
+def _datetime_from_secs(seconds, microsecond, local, tz):
     if local and tz is None:
-        jtm = jlocaltime(tts)
-    else:
-        if local:
-            return tz.fromutc(datetime.utcfromtimestamp(ts))
-        jtm = jgmtime(tts)
-    return datetime_from_jtm(jtm, uts, tz)
+        return datetime_from_jtm(jlocaltime(seconds), microsecond)
+    # UTC by arithmetic on days since Epoch, for any time_t
+    days, seconds = divmod(seconds, 86400)
+    ordinal = days + EPOCH_ORDINAL
+    if not date.min._ordinal <= ordinal <= date.max._ordinal:
+        raise OverflowError('timestamp out of range')
+    utc = _new_datetime(ordinal, *days_to_date(days) +
+                        (seconds, microsecond, None))
+    if local:
+        return tz.fromutc(utc)
+    utc.tzinfo = tz
+    return utc
+
+
+def _convert_day(ordinal):
+    """Return Jalali year, month and day and Gregorian
+    :class:`python:datetime.date` of proleptic Gregorian `ordinal`."""
+    return (days_to_date(ordinal - EPOCH_ORDINAL),
+            _std_dt_mod.date.fromordinal(ordinal))
+
+
+_converted_day = lru_cache(CONVERSION_CACHE_SIZE)(_convert_day)
+
+
+def conversion_cache_info():
+    """Return named tuple of hits, misses, maximum and current size of days
+    cache of converters, like ``cache_info()`` of :func:`.helpers.lru_cache`.
+
+    >>> _ = g2j(_std_dt_mod.date(1900, 1, 1)), j2g(date(1278, 10, 11))
+    >>> conversion_cache_info().hits > 0
+    True
+    """
+    return _converted_day.cache_info()
+
+
+def set_conversion_cache_size(maxsize):
+    """Make converters keep at most `maxsize` recently converted days, 0 to
+    not cache at all.  Cached days and counters are cleared.  Return
+    previous size.
+    """
+    global _converted_day
+    previous = _converted_day.cache_info().maxsize
+    _converted_day = lru_cache(maxsize)(_convert_day)
+    return previous
 
 
 def jalali_from_gregorian(date_or_datetime):
@@ -684,24 +1010,21 @@ def jalali_from_gregorian(date_or_datetime):
     pyjalali.datetime.datetime(1392, 1, 2, 0, 12, 0, 0)
     >>> jalali_from_gregorian(_dt(2013, 3, 21))
     pyjalali.datetime.date(1392, 1, 1)
+    >>> jalali_from_gregorian(_dt(1900, 1, 1))
+    pyjalali.datetime.date(1278, 10, 11)
     """
     if isinstance(date_or_datetime, _std_dt_mod.datetime):
-        gdate = date_or_datetime.date()
-        time = date_or_datetime.time()
-    elif isinstance(date_or_datetime, _std_dt_mod.date):
-        gdate = date_or_datetime
-        time = None
-    else:
-        raise TypeError('Expected Gregorian %s or %s instance, not %s' %
-                        (_std_dt_mod.datetime.__name__,
-                         _std_dt_mod.date.__name__,
-                         date_or_datetime.__class__.__name__))
-    if gdate < _std_dt_mod.date(1970, 1, 1):
-        raise ValueError("Can't convert dates before Epoch")
-    jdate = date.fromtimestamp(mktime(gdate.timetuple()))
-    if time is None:
-        return jdate
-    return datetime.combine(jdate, time)
+        gdt = date_or_datetime
+        ordinal = gdt.toordinal()
+        return _new_datetime(ordinal, *_converted_day(ordinal)[0] +
+                             (gdt.hour * 3600 + gdt.minute * 60 + gdt.second,
+                              gdt.microsecond, gdt.tzinfo))
+    if isinstance(date_or_datetime, _std_dt_mod.date):
+        ordinal = date_or_datetime.toordinal()
+        return _new_date(ordinal, *_converted_day(ordinal)[0])
+    raise TypeError('Expected Gregorian %s or %s instance, not %s' %
+                    (_std_dt_mod.datetime.__name__, _std_dt_mod.date.__name__,
+                     date_or_datetime.__class__.__name__))
 
 
 def gregorian_from_jalali(date_or_datetime):
@@ -716,25 +1039,21 @@ def gregorian_from_jalali(date_or_datetime):
     datetime.datetime(2013, 9, 21, 22, 30)
     >>> gregorian_from_jalali(date(1392, 6, 30))
     datetime.date(2013, 9, 21)
+    >>> gregorian_from_jalali(date(1278, 10, 11))
+    datetime.date(1900, 1, 1)
     """
     if isinstance(date_or_datetime, datetime):
-        jdate = date_or_datetime.date()
-        time = date_or_datetime.timetz()
-    elif isinstance(date_or_datetime, date):
-        jdate = date_or_datetime
-        time = None
-    else:
-        raise TypeError('Expected Jalali %s or %s instance, not %s' %
-                        (datetime.__name__, date.__name__,
-                         date_or_datetime.__class__.__name__))
-    if jdate < date(1348, 10, 11):
-        raise ValueError("Can't convert dates before Epoch")
-    # to stop dst changes from bugging conversion, just convert date
-    njtm = jdate.jtm.copy()
-    gdate = _std_dt_mod.date.fromtimestamp(jmktime(njtm))
-    if time is None:
-        return gdate
-    return _std_dt_mod.datetime.combine(gdate, time)
+        jdt = date_or_datetime
+        gdate = _converted_day(jdt._ordinal)[1]
+        seconds = jdt._seconds
+        return _std_dt_mod.datetime(gdate.year, gdate.month, gdate.day,
+                                    seconds // 3600, seconds // 60 % 60,
+                                    seconds % 60, jdt.microsecond, jdt.tzinfo)
+    if isinstance(date_or_datetime, date):
+        return _converted_day(date_or_datetime._ordinal)[1]
+    raise TypeError('Expected Jalali %s or %s instance, not %s' %
+                    (datetime.__name__, date.__name__,
+                     date_or_datetime.__class__.__name__))
 
 
 def datetime_from_jtm(jtm, microsecond=0, tz=None):
@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+"""
+    pyjalali.formatting
+    ~~~~~~~~~~~~~~~~~~~
+
+    :func:`.jstr.jstrftime` and :func:`.jstr.jstrptime` formats compiled
+    to Python.
+
+    A format is parsed once into a template for the ``%`` operator and the
+    fields each directive needs, the resulting render function is kept in
+    a LRU cache keyed by format.  Directives and their output are those of
+    libjalali's :func:`jstrftime`, except that nothing is truncated, ``%s``
+    isn't limited to 32 bits and missing zone name renders empty.
+
+    Render functions take fields of a date as positional arguments:
+    year, month (1-12), day, hour, minute, second, weekday and day of year
+    (both 0 based like :class:`.types.struct_jtm`), DST flag, offset from
+    UTC in seconds and zone name.
+
+    >>> render = compile_format('%A %d %B %Y, %H:%M')
+    >>> render(1392, 9, 2, 23, 46, 0, 0, 248, 0, 0, None)
+    'Saturday 02 Aazar 1392, 23:46'
+    >>> from pyjalali.datetime import date
+    >>> format_many('%Y/%m/%d %a', [date(1392, 9, 2), date(1392, 12, 29)])
+    ['1392/09/02 Sat', '1392/12/29 Thu']
+    >>> from pyjalali.jtime import jgmtime
+    >>> res = jstrftime(b'%F %T %z %Z', jgmtime(0))
+    >>> res == b'1348-10-11 00:00:00 +0000 UTC'
+    True
+
+    For parsing a format is turned into a regular expression and a function
+    building date fields from its groups, cached the same way.  Directives
+    are those libjalali's :func:`jstrptime` knows, ``%%`` matches ``%`` and
+    other directives match anything up to what follows them.  Unlike
+    libjalali numbers must be only digits and the whole string must match.
+
+    >>> values, errors = parse_many('%Y/%m/%d %H:%M', ['1392/09/02 23:46',
+    ...                                                 '1392/13/01 00:00',
+    ...                                                 '1392-09-02'])
+    >>> values
+    [pyjalali.datetime.datetime(1392, 9, 2, 23, 46, 0, 0), None, None]
+    >>> errors[0].row, errors[0].reason
+    (1, 'month value out of range [1, 12]')
+    >>> errors[1].reason
+    "time data '1392-09-02' does not match format '%Y/%m/%d %H:%M'"
+    >>> columns, errors = parse_many('%d %B %y', ['2 Aazar 92'], columns=True)
+    >>> [list(a) for a in columns]
+    [[1392], [9], [2], [0], [0], [0]]
+"""
+
+from __future__ import absolute_import
+from array import array
+from collections import namedtuple
+
+from pyjalali.helpers import lru_cache
+from pyjalali.pure import (DAY_SECONDS, _day_zone, _month_from_yday,
+                           date_to_days, jlocaltime, month_days, year_length)
+from pyjalali.types import struct_jtm
+
+__all__ = ('compile_format', 'compile_parser', 'date_columns', 'format_many',
+           'jstrftime', 'jstrptime', 'parse_many', 'row_error',
+           'strptime_fields')
+
+
+_tables = {
+    'days': ('Saturday', 'Sunday', 'Monday', 'Tuesday', 'Wednesday',
+             'Thursday', 'Friday'),
+    'days_3': ('Sat', 'Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri'),
+    'months': ('Farvardin', 'Ordibehesht', 'Khordaad', 'Tir', 'Mordaad',
+               'Shahrivar', 'Mehr', 'Aabaan', 'Aazar', 'Dey', 'Bahman',
+               'Esfand'),
+    'months_3': ('Far', 'Ord', 'Kho', 'Tir', 'Mor', 'Sha', 'Meh', 'Aba',
+                 'Aza', 'Dey', 'Bah', 'Esf'),
+    'days_fa': ('Shanbeh', 'Yek-Shanbeh', 'Do-Shanbeh', 'Seh-Shanbeh',
+                'Chahaar-Shanbeh', 'Panj-Shanbeh', 'Jomeh'),
+    'days_3_fa': ('Sha', 'Yek', 'Dos', 'Ses', 'Cha', 'Pan', 'Jom'),
+    'fa_days': (u'شنبه', u'یکشنبه', u'دوشنبه', u'سه شنبه', u'چهارشنبه',
+                u'پنجشنبه', u'جمعه'),
+    'fa_days_3': (u'شنب', u'یکش', u'دوش', u'سهش', u'چها', u'پنج', u'جمع'),
+    'fa_months': (u'فروردین', u'اردیبهشت', u'خرداد', u'تیر', u'مرداد',
+                  u'شهریور', u'مهر', u'آبان', u'آذر', u'دی', u'بهمن',
+                  u'اسفند'),
+    'fa_months_3': (u'فرو', u'ارد', u'خرد', u'تیر', u'مرد', u'شهر', u'مهر',
+                    u'آبا', u'آذر', u'دی ', u'بهم', u'اسف'),
+    'fa_digits': u'۰۱۲۳۴۵۶۷۸۹',
+    'fa_zones': (u'زمان زمستانی', u'زمان تابستانی'),
+    'fa_gmt': u'گرینویچ',
+    'fa_ampm': (u'ق.ظ', u'ب.ظ'),
+    'ampm': ('AM', 'PM'),
+    'ampm_lower': ('am', 'pm'),
+}
+
+# Directive to (template, arguments) where arguments are expressions on
+# render function parameters y, mo, d, H, M, S, w, j, dst, off and zone.
+_HOUR12 = '12 if H == 12 else H % 12'
+_PM = 'not 0 <= H < 12'
+_directives = {
+    'a': ('%s', '_days_3[w]'),
+    'A': ('%s', '_days[w]'),
+    'b': ('%s', '_months_3[mo - 1]'),
+    'B': ('%s', '_months[mo - 1]'),
+    'c': ('%s %d %s %d %02d:%02d:%02d %s',
+          '_days_3_fa[w], d, _months_3[mo - 1], y, H, M, S, _zone(zone)'),
+    'C': ('%d', '(y // 100 if y >= 0 else -(-y // 100)) + 1'),
+    'd': ('%02d', 'd'),
+    'D': ('%d/%02d/%02d', 'y, mo, d'),
+    'e': ('%2d', 'd'),
+    'E': (u'%s %s %s %s، ساعت %s:%s:%s - %s',
+          '_fa_days[w], _farsi(d, 2), _fa_months[mo - 1], _farsi(y, 0), '
+          '_farsi(H, 2), _farsi(M, 2), _farsi(S, 2), _fa_zone(zone, dst)'),
+    'F': ('%d-%02d-%02d', 'y, mo, d'),
+    'g': ('%s', '_fa_days_3[w]'),
+    'G': ('%s', '_fa_days[w]'),
+    'v': ('%s', '_fa_months_3[mo - 1]'),
+    'V': ('%s', '_fa_months[mo - 1]'),
+    'h': ('%s', '_days_3_fa[w]'),
+    'q': ('%s', '_days_fa[w]'),
+    'H': ('%02d', 'H'),
+    'I': ('%02d', _HOUR12),
+    'j': ('%03d', 'j + 1'),
+    'k': ('%2d', 'H'),
+    'l': ('%2d', _HOUR12),
+    'm': ('%02d', 'mo'),
+    'M': ('%02d', 'M'),
+    'n': ('\n', ''),
+    'O': ('%s', '_fa_ampm[%s]' % _PM),
+    'p': ('%s', '_ampm[%s]' % _PM),
+    'P': ('%s', '_ampm_lower[%s]' % _PM),
+    'r': ('%02d:%02d:%02d %s', '%s, M, S, _ampm[%s]' % (_HOUR12, _PM)),
+    'R': ('%02d:%02d', 'H, M'),
+    's': ('%d', '_mktime(y, mo, d, H, M, S)'),
+    'S': ('%02d', 'S'),
+    't': ('\t', ''),
+    'T': ('%02d:%02d:%02d', 'H, M, S'),
+    'u': ('%d', 'w + 1'),
+    # like libjalali, weekday of 1 Farvardin isn't looked up
+    'U': ('%02d', '(j + w) // 7'),
+    'w': ('%d', 'w'),
+    'W': ('%s/%s/%s', '_farsi(y, 0), _farsi(mo, 2), _farsi(d, 2)'),
+    'x': ('%02d/%02d/%d', 'd, mo, y'),
+    'X': ('%s:%s:%s', '_farsi(H, 2), _farsi(M, 2), _farsi(S, 2)'),
+    'y': ('%02d', 'y % 100 if y >= 0 else -(-y % 100)'),
+    'Y': ('%d', 'y'),
+    'z': ('%s%02d%02d',
+          "'+' if off > -3600 else '-', abs(off) // 3600, "
+          "abs(off) % 3600 // 60"),
+    'Z': ('%s', '_zone(zone)'),
+    '%': ('%%', ''),
+}
+# directives needing offset, zone name or DST flag
+_ZONE_DIRECTIVES = 'cEszZ'
+
+_PARAMETERS = 'y, mo, d, H, M, S, w, j, dst, off, zone'
+
+
+def _mktime(year, month, day, hour, minute, second):
+    # libjalali's jmktime takes offset of local time, not the given one
+    days = date_to_days(year, month, day)
+    return (days * DAY_SECONDS + hour * 3600 + minute * 60 + second -
+            _day_zone(days)[1])
+
+
+def _namespace(encode):
+    """Return globals of render functions, with strings converted by
+    `encode`."""
+    ns = {'_mktime': _mktime}
+    for name, value in _tables.items():
+        if isinstance(value, tuple):
+            ns['_' + name] = tuple(encode(v) for v in value)
+        else:
+            ns['_' + name] = encode(value)
+    digits, zones, gmt = ns['_fa_digits'], ns['_fa_zones'], ns['_fa_gmt']
+    width = len(digits) // 10
+    digits = [digits[i:i + width] for i in range(0, len(digits), width)]
+    empty, minus = digits[0][:0], encode('-')
+    # two digit numbers padded by zero, as hour, minute, month and day are
+    two = tuple(digits[i // 10] + digits[i % 10] for i in range(100))
+
+    def farsi(n, padding):
+        if padding == 2 and 0 <= n < 100:
+            return two[n]
+        m = abs(n)
+        s = empty
+        while m >= 100:
+            m, r = divmod(m, 100)
+            s = two[r] + s
+        if m:
+            s = (two[m] if m >= 10 else digits[m]) + s
+        count = len(str(abs(n))) + (n < 0) if n else 0
+        if n < 0:
+            s = minus + s
+        return digits[0] * (padding - count) + s
+
+    def zone_name(zone):
+        if zone is None:
+            return encode('')
+        if isinstance(zone, bytes) and not isinstance(encode(''), bytes):
+            return zone.decode('utf-8')
+        if not isinstance(zone, bytes) and isinstance(encode(''), bytes):
+            return zone.encode('utf-8')
+        return zone
+
+    def fa_zone(zone, dst):
+        if zone is not None and zone_name(zone) == encode('UTC'):
+            return gmt
+        return zones[dst > 0]
+
+    ns.update(_farsi=farsi, _zone=zone_name, _fa_zone=fa_zone)
+    return ns
+
+
+def _to_text(s):
+    return s if isinstance(s, type(u'')) else s.decode('utf-8')
+
+
+def _to_bytes(s):
+    return s.encode('utf-8') if isinstance(s, type(u'')) else s
+
+
+_text_namespace = _namespace(_to_text)
+# on Python 2, str formats render to str
+_bytes_namespace = _namespace(_to_bytes) if bytes is str else None
+
+
+def _parse(format):
+    """Yield (literal, directive) pairs of `format`, directive being empty
+    after trailing literal or a lone ``%`` at end."""
+    start, n = 0, len(format)
+    i = format.find('%')
+    while i != -1:
+        yield format[start:i], format[i + 1:i + 2]
+        start = i + 2
+        i = format.find('%', start)
+    if start < n:
+        yield format[start:], ''
+
+
+@lru_cache(256)
+def compile_format(format):
+    """Return render function of `format`, see module documentation.  Result
+    is a string of same type as `format`.  Attribute ``uses_zone`` of the
+    function tells if offset, zone name or DST flag affect its output.
+
+    >>> compile_format('%Y-%m-%d') is compile_format('%Y-%m-%d')
+    True
+    """
+    if isinstance(format, bytes) and bytes is not str:
+        render = compile_format(format.decode('utf-8'))
+
+        def encoded(*fields):
+            return render(*fields).encode('utf-8')
+        encoded.uses_zone = render.uses_zone
+        return encoded
+    if isinstance(format, bytes):
+        ns, encode = _bytes_namespace, _to_bytes
+    else:
+        ns, encode = _text_namespace, _to_text
+    template, args, uses_zone = [], [], False
+    for literal, directive in _parse(format):
+        template.append(literal.replace('%', '%%'))
+        # unknown directives render nothing, like libjalali's
+        if directive and directive in _directives:
+            fragment, arg = _directives[directive]
+            template.append(encode(fragment))
+            if arg:
+                args.append(arg)
+            uses_zone = uses_zone or directive in _ZONE_DIRECTIVES
+    template = encode('').join(template)
+    if args:
+        source = 'def render(%s):\n    return %r %% (%s,)\n' % (
+            _PARAMETERS, template, ', '.join(args))
+        scope = {}
+        exec(source, ns, scope)
+        render = scope['render']
+    else:
+        text = template % ()
+
+        def render(*fields):
+            return text
+    render.uses_zone = uses_zone
+    return render
+
+
+def _fields_of(value, uses_zone):
+    try:
+        return value._format_fields(uses_zone)
+    except AttributeError:
+        return (value.tm_year, value.tm_mon + 1, value.tm_mday, value.tm_hour,
+                value.tm_min, value.tm_sec, value.tm_wday, value.tm_yday,
+                value.tm_isdst, value.tm_gmtoff, value.tm_zone)
+
+
+def jstrftime(format, jtm):
+    """Return string representation of given time according to format, like
+    libjalali's :func:`jstrftime`.
+
+    :param string format: format of date representation
+    :param `pyjalali.types.struct_jtm` jtm: broken-down jalali time
+    """
+    return compile_format(format)(*_fields_of(jtm, True))
+
+
+def format_many(format, values):
+    """Return list of `values` formatted by `format`.  Values could be
+    :class:`.datetime.date`, :class:`.datetime.datetime` or
+    :class:`.types.struct_jtm` objects, mixed together.
+    """
+    render = compile_format(format)
+    uses_zone = render.uses_zone
+    return [render(*_fields_of(v, uses_zone)) for v in values]
+
+
+class row_error(namedtuple('row_error', 'row text reason')):
+    """A line :func:`parse_many` couldn't parse, `row` being its index."""
+    __slots__ = ()
+
+
+class date_columns(namedtuple('date_columns',
+                              'year month day hour minute second')):
+    """Parsed dates by field, each one an :class:`array.array` of ``'i'``
+    type.  Rows which couldn't be parsed are zero in all of them."""
+    __slots__ = ()
+
+
+def _localtime(timestamp):
+    jtm = jlocaltime(timestamp)
+    return (jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday, jtm.tm_hour,
+            jtm.tm_min, jtm.tm_sec, jtm.tm_wday, jtm.tm_yday)
+
+
+class _numbers(dict):
+    """Integer values of digit strings, filled on lookup.  Looking up is
+    cheaper than calling :func:`int` and short numbers repeat a lot."""
+
+    def __missing__(self, key):
+        value = self[key] = int(key)
+        return value
+
+
+_parse_namespace = {'_localtime': _localtime, '_n': _numbers()}
+
+
+def _names(table):
+    """Return regular expression matching names of `table`, whose lower
+    cased names map to their indexes in ``_<table>`` of parse functions."""
+    import re
+    names = _tables[table]
+    _parse_namespace['_' + table] = dict((n.lower(), i)
+                                         for i, n in enumerate(names))
+    return '(%s)' % '|'.join(re.escape(n) for n in
+                             sorted(names, key=len, reverse=True))
+
+
+# Directive to (pattern, statement) where statement sets some of y, mo, d,
+# H, M, S, w and j from matched group %(g)s.  Filled on first use, so
+# importing doesn't need re module.
+_parse_directives = {}
+
+
+def _build_parse_directives():
+    _parse_directives.update({
+        'a': (_names('days_3'), 'w = _days_3[%(g)s.lower()]'),
+        'A': (_names('days'), 'w = _days[%(g)s.lower()]'),
+        'b': (_names('months_3'), 'mo = _months_3[%(g)s.lower()] + 1'),
+        'B': (_names('months'), 'mo = _months[%(g)s.lower()] + 1'),
+        'h': (_names('days_3_fa'), 'w = _days_3_fa[%(g)s.lower()]'),
+        'q': (_names('days_fa'), 'w = _days_fa[%(g)s.lower()]'),
+        'd': (r'(\d{1,2})', 'd = _n[%(g)s]'),
+        'e': (r'( ?\d{1,2})', 'd = _n[%(g)s]'),
+        'H': (r'(\d{1,2})', 'H = _n[%(g)s]'),
+        'j': (r'(\d{1,3})', 'j = _n[%(g)s] - 1'),
+        'm': (r'(\d{1,2})', 'mo = _n[%(g)s]'),
+        'M': (r'(\d{1,2})', 'M = _n[%(g)s]'),
+        's': (r'(-?\d+)',
+              'y, mo, d, H, M, S, w, j = _localtime(int(%(g)s))'),
+        'S': (r'(\d{1,2})', 'S = _n[%(g)s]'),
+        # two digit years from 19 are taken as 13xx, others as 14xx
+        'y': (r'(\d\d)', 'y = _n[%(g)s]\n    y += 1300 if y >= 19 else 1400'),
+        'Y': (r'(-?\d{1,4})', 'y = _n[%(g)s]'),
+    })
+    return _parse_directives
+
+
+@lru_cache(256)
+def compile_parser(format):
+    """Return parse function of `format`.  It takes a string and returns
+    tuple of year, month (1-12), day, hour, minute, second, weekday and day
+    of year (0 based), fields not given by the string being None, or None
+    if the string doesn't match.
+
+    >>> compile_parser('%Y/%m/%d')('1392/09/02')
+    (1392, 9, 2, None, None, None, None, None)
+    """
+    if isinstance(format, bytes) and bytes is not str:
+        parse_text = compile_parser(format.decode('utf-8'))
+
+        def parse(string):
+            if isinstance(string, bytes):
+                string = string.decode('utf-8')
+            return parse_text(string)
+        return parse
+    import re
+    directives = _parse_directives or _build_parse_directives()
+    pattern, statements = [], []
+    for literal, directive in _parse(format):
+        pattern.append(re.escape(literal))
+        if directive == '%':
+            pattern.append('%')
+        elif directive in directives:
+            regex, statement = directives[directive]
+            pattern.append(regex)
+            statements.append(statement % {'g': 'g[%d]' % len(statements)})
+        else:
+            pattern.append('.*?')
+    source = ('def build(g):\n'
+              '    y = mo = d = H = M = S = w = j = None\n'
+              '    %s\n'
+              '    return y, mo, d, H, M, S, w, j\n' %
+              '\n    '.join(statements))
+    scope = {}
+    exec(source, _parse_namespace, scope)
+    build = scope['build']
+    match = re.compile(''.join(pattern) + r'\Z', re.IGNORECASE).match
+
+    def parse(string):
+        m = match(string)
+        return None if m is None else build(m.groups())
+    return parse
+
+
+_jtm_fields = ('tm_year', 'tm_mon', 'tm_mday', 'tm_hour', 'tm_min', 'tm_sec',
+               'tm_wday', 'tm_yday')
+
+
+def jstrptime(format, date_str):
+    """Return :class:`.types.struct_jtm` from date_str according to format
+    and rest of date_str, which is empty or None if it didn't match.  Fields
+    not given by date_str are zero, like libjalali's :func:`jstrptime`.
+
+    :param string format: format of string representation
+    :param string date_str: string representation
+    """
+    fields = compile_parser(format)(date_str)
+    jtm = struct_jtm()
+    if fields is None:
+        return jtm, None
+    for name, value in zip(_jtm_fields, fields):
+        if value is not None:
+            setattr(jtm, name, value)
+    if fields[1] is not None:
+        jtm.tm_mon -= 1
+    return jtm, date_str[:0]
+
+
+def _check(year, month, day, hour, minute, second):
+    # same checks and messages as pyjalali.datetime.datetime's
+    if not 1 <= month <= 12:
+        raise ValueError('month value out of range [1, 12]')
+    if not 1 <= day <= 29 and not 1 <= day <= month_days(year, month):
+        raise ValueError('day is out of range for month')
+    if not 0 <= hour <= 23:
+        raise ValueError('hour must be in 0..23')
+    if not 0 <= minute <= 59:
+        raise ValueError('minute must be in 0..59')
+    if not 0 <= second <= 59:
+        raise ValueError('second must be in 0..59')
+
+
+def strptime_fields(format, date_str):
+    """Return year, month, day, hour, minute and second of `date_str` parsed
+    by `format`.  Year defaults to 1, month and day to 1 or to those of day
+    of year if given, time to midnight.  Raise :class:`ValueError` if
+    date_str doesn't match or fields are out of range.
+    """
+    fields = _complete(compile_parser(format)(date_str), format, date_str)
+    _check(*fields)
+    return fields
+
+
+def _complete(fields, format, date_str):
+    """Return parsed `fields` with defaults, see :func:`strptime_fields`."""
+    if fields is None:
+        raise ValueError('time data %r does not match format %r' %
+                         (date_str, format))
+    year, month, day, hour, minute, second, _, yday = fields
+    if year is None:
+        year = 1
+    if yday is not None and month is None and day is None:
+        if not 0 <= yday < year_length(year):
+            raise ValueError('day of year is out of range for year')
+        month, day = _month_from_yday(yday)
+        month += 1
+    return (year, 1 if month is None else month, 1 if day is None else day,
+            hour or 0, minute or 0, second or 0)
+
+
+def parse_many(format, lines, columns=False):
+    """Parse each line of `lines` by `format`, like
+    :meth:`.datetime.datetime.strptime` does.  Trailing newline of lines is
+    ignored.  Return pair of parsed values and list of :class:`row_error`
+    for lines which couldn't be parsed.  Values are a list of
+    :class:`.datetime.datetime` objects, None for failed rows, or if
+    `columns` is true, :class:`date_columns`.
+    """
+    parse = compile_parser(format)
+    errors = []
+    if columns:
+        # fields of rows one after another, split to columns at end
+        flat = array('i')
+        add = flat.extend
+    else:
+        from pyjalali.datetime import datetime
+        res = []
+        add = res.append
+    for row, line in enumerate(lines):
+        line = line.rstrip(b'\r\n' if isinstance(line, bytes) else '\r\n')
+        try:
+            fields = _complete(parse(line), format, line)
+            if columns:
+                _check(*fields)
+                add(fields)
+            else:
+                add(datetime(*fields))
+        except ValueError as e:
+            errors.append(row_error(row, line, str(e)))
+            add((0,) * 6 if columns else None)
+    if columns:
+        res = date_columns(*(flat[i::6] for i in range(6)))
+    return res, errors
@@ -26,8 +26,18 @@
     (1393, 0, 1)
     >>> _normalized_date(1390, 10, 365+60)
     (1391, 11, 30)
+
+    >>> square = lru_cache(2)(lambda x: x * x)
+    >>> square(2), square(3), square(2), square(4), square(3)
+    (4, 9, 4, 16, 9)
+    >>> square.cache_info()
+    CacheInfo(hits=1, misses=4, maxsize=2, currsize=2)
 """
 
+from collections import namedtuple
+from functools import update_wrapper
+from threading import Lock
+
 from pyjalali.jalali import jalali_is_jleap, jalali_update
 from pyjalali.types import struct_jtm
 
@@ -60,3 +70,69 @@ def normalize_jtm(jtm, microsecond=0):
     jtm.tm_sec, microsecond = normalized_pair(jtm.tm_sec, microsecond, 1000000)
     jalali_update(jtm)
     return microsecond
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+def _lru_cache(maxsize=128):
+    """Decorator keeping results of at most `maxsize` most recently used
+    argument tuples of wrapped function, like :func:`functools.lru_cache`
+    of Python 3.  Only positional arguments are supported.
+    """
+    def decorating(func):
+        cache = {}
+        # circular doubly linked list of [prev, next, key, result], oldest
+        # next to root
+        root = []
+        root[:] = [root, root, None, None]
+        stats = [0, 0]
+        lock = Lock()
+
+        def wrapper(*args):
+            with lock:
+                link = cache.get(args)
+                if link is not None:
+                    prev, nxt, _, result = link
+                    prev[1] = nxt
+                    nxt[0] = prev
+                    last = root[0]
+                    last[1] = root[0] = link
+                    link[0] = last
+                    link[1] = root
+                    stats[0] += 1
+                    return result
+                stats[1] += 1
+            result = func(*args)
+            with lock:
+                if args in cache:
+                    return result
+                last = root[0]
+                link = [last, root, args, result]
+                last[1] = root[0] = cache[args] = link
+                if len(cache) > maxsize:
+                    oldest = root[1]
+                    root[1] = oldest[1]
+                    oldest[1][0] = root
+                    del cache[oldest[2]]
+            return result
+
+        def cache_info():
+            return CacheInfo(stats[0], stats[1], maxsize, len(cache))
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                root[:] = [root, root, None, None]
+                stats[:] = [0, 0]
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return update_wrapper(wrapper, func)
+    return decorating
+
+
+try:
+    from functools import lru_cache
+except ImportError:  # Python 2
+    lru_cache = _lru_cache
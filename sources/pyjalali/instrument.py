@@ -0,0 +1,162 @@
+"""
+    pyjalali.instrument
+    ~~~~~~~~~~~~~~~~~~~
+
+    Count and time calls crossing into libjalali.  All ctypes bindings of
+    :mod:`.jalali`, :mod:`.jtime` and :mod:`.jstr` are called through one
+    prototype class, whose call method is swapped for a timed one by
+    :func:`enable` and back by :func:`disable`, so nothing is paid while
+    instrumentation is off.  It's also enabled on import when environment
+    variable ``PYJALALI_INSTRUMENT`` is set to a non-empty value.  Default
+    python backend doesn't call libjalali, so calls are recorded only with
+    ``ctypes`` backend or when bindings are called directly.
+
+    :func:`snapshot` returns process-wide :class:`call_stats` per libjalali
+    function.  :func:`profile` records calls of current thread in a block
+    only, enabling instrumentation meanwhile::
+
+        with profile() as p:
+            handle(request)
+        log(p.snapshot())
+
+    Latency histograms have :data:`HISTOGRAM_BUCKETS` buckets.  Bucket 0
+    counts calls taking less than a microsecond, bucket k those taking
+    2**(k - 1) to 2**k microseconds, last one all longer calls.
+
+    >>> from pyjalali.jalali import _jalali_is_jleap
+    >>> with profile() as p:
+    ...     try:
+    ...         _ = _jalali_is_jleap(1391)
+    ...     except OSError:  # libjalali isn't installed
+    ...         pass
+    >>> p.snapshot()['jalali_is_jleap'].calls
+    1
+"""
+
+from __future__ import absolute_import
+import threading
+from collections import namedtuple
+import time as _time
+
+from pyjalali import _Function
+
+__all__ = ('HISTOGRAM_BUCKETS', 'call_stats', 'disable', 'enable', 'enabled',
+           'profile', 'reset', 'snapshot')
+
+HISTOGRAM_BUCKETS = 24
+
+_clock = getattr(_time, 'perf_counter', _time.time)
+_plain_call = _Function.__dict__['__call__']
+_lock = threading.Lock()
+_local = threading.local()
+# libjalali function name to [calls, seconds, histogram]
+_stats = {}
+# nested enable() calls and active profiles, timed calls are on while any
+_users = {'enable': 0, 'profile': 0}
+
+
+class call_stats(namedtuple('call_stats', 'calls seconds histogram')):
+    """Calls of a libjalali function, their total time in seconds and tuple
+    of their counts in latency buckets."""
+    __slots__ = ()
+
+    @property
+    def mean(self):
+        """Mean seconds per call."""
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+def _bucket(seconds):
+    return min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+
+
+def _add(stats, name, seconds):
+    entry = stats.get(name)
+    if entry is None:
+        entry = stats[name] = [0, 0.0, [0] * HISTOGRAM_BUCKETS]
+    entry[0] += 1
+    entry[1] += seconds
+    entry[2][_bucket(seconds)] += 1
+
+
+def _timed_call(self, *args):
+    func = self._func
+    if func is None:
+        func = self._bind()
+    start = _clock()
+    try:
+        return func(*args)
+    finally:
+        seconds = _clock() - start
+        with _lock:
+            _add(_stats, self._name, seconds)
+        for p in getattr(_local, 'profiles', ()):
+            _add(p._stats, self._name, seconds)
+
+
+def _snapshot(stats):
+    return dict((name, call_stats(calls, seconds, tuple(histogram)))
+                for name, (calls, seconds, histogram) in stats.items())
+
+
+def _use(user, delta):
+    with _lock:
+        _users[user] = max(_users[user] + delta, 0)
+        on = _users['enable'] or _users['profile']
+        _Function.__call__ = _timed_call if on else _plain_call
+
+
+def enable():
+    """Start recording libjalali calls.  Calls of :func:`enable` and
+    :func:`disable` nest."""
+    _use('enable', 1)
+
+
+def disable():
+    """Stop recording libjalali calls started by :func:`enable`, recorded
+    ones are kept until :func:`reset`."""
+    _use('enable', -1)
+
+
+def enabled():
+    """Return True if libjalali calls are being recorded."""
+    return bool(_users['enable'] or _users['profile'])
+
+
+def snapshot():
+    """Return dictionary of libjalali function names to :class:`call_stats`
+    of all calls recorded in process."""
+    with _lock:
+        return _snapshot(_stats)
+
+
+def reset():
+    """Forget calls recorded in process."""
+    with _lock:
+        _stats.clear()
+
+
+class profile(object):
+    """Context manager recording libjalali calls made by current thread
+    inside its block.  Profiles nest, an outer one sees calls of inner ones
+    too."""
+
+    def __init__(self):
+        self._stats = {}
+
+    def __enter__(self):
+        profiles = getattr(_local, 'profiles', None)
+        if profiles is None:
+            profiles = _local.profiles = []
+        profiles.append(self)
+        _use('profile', 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        _use('profile', -1)
+        _local.profiles.remove(self)
+
+    def snapshot(self):
+        """Return dictionary of libjalali function names to
+        :class:`call_stats` of calls recorded by this profile."""
+        return _snapshot(self._stats)
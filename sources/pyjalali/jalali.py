@@ -5,14 +5,17 @@
     libjalali custom functions.
 """
 
-from pyjalali import _libj
-from pyjalali.types import struct_ab_jtm, struct_jtm, struct_jyinfo, time_t
-from ctypes import POINTER, byref, c_int
+from pyjalali import _libj, _optional_function, backend
+from pyjalali.types import (c_array, jtm_array, struct_ab_jtm, struct_jtm,
+                            struct_jyinfo, time_t)
+from ctypes import POINTER, byref, c_int, c_size_t
 
-__all__ = ('jalali_create_date_from_days', 'jalali_create_date_from_days',
+__all__ = ('jalali_create_date_from_days', 'jalali_create_days_from_date',
            'jalali_create_secs_from_time', 'jalali_create_time_from_secs',
-           'jalali_get_date', 'jalali_get_diff', 'jalali_get_jyear_info',
-           'jalali_year_month_days', 'jalali_is_jleap', 'jalali_update')
+           'jalali_get_date', 'jalali_get_date_n', 'jalali_get_diff',
+           'jalali_get_jyear_info', 'jalali_fill_zone', 'jalali_tzset',
+           'jalali_year_month_days', 'jalali_is_jleap', 'jalali_update',
+           'jalali_update_n')
 
 
 _jalali_is_jleap = _libj.jalali_is_jleap
@@ -40,7 +43,7 @@ def jalali_create_secs_from_time(ab_jtm):
     :class:`.types.struct_ab_jtm`.
     """
     #XXX: ret sanity check
-    return _jalali_create_secs_from_time(bref(ab_jtm)).value
+    return _jalali_create_secs_from_time(byref(ab_jtm))
 
 
 _jalali_create_date_from_days = _libj.jalali_create_date_from_days
@@ -89,6 +92,26 @@ def jalali_get_date(days):
     return res
 
 
+_jalali_get_date_n = _optional_function('jalali_get_date_n')
+_jalali_get_date_n.argtypes = (POINTER(c_int), POINTER(struct_jtm), c_size_t)
+def jalali_get_date_n(days, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` of dates `days`
+    days after UTC Epoch, which may be a ctypes array of `c_int`, a buffer of
+    such integers like ``array('i')``, read in place, or other iterable.
+    They are written into `out`, ctypes array or writable buffer of
+    structures, if given.
+
+    >>> [(j.tm_year, j.tm_mon + 1, j.tm_mday)
+    ...  for j in jalali_get_date_n([0, 16032])]
+    [(1348, 10, 11), (1392, 9, 2)]
+    """
+    days = c_array(days, c_int)
+    n = len(days)
+    out = jtm_array(n, out)
+    _jalali_get_date_n(days, out, n)
+    return out
+
+
 _jalali_get_diff = _libj.jalali_get_diff
 _jalali_get_diff.argtypes = (POINTER(struct_jtm),)
 def jalali_get_diff(jtm, silent=False):
@@ -112,6 +135,40 @@ def jalali_update(jtm):
     _jalali_update(byref(jtm))
 
 
+_jalali_update_n = _optional_function('jalali_update_n')
+_jalali_update_n.argtypes = (POINTER(struct_jtm), c_size_t)
+def jalali_update_n(jtms):
+    """Update :class:`.types.struct_jtm` objects of ctypes array or writable
+    buffer `jtms` in place, as :func:`jalali_update` does.
+    """
+    jtms = c_array(jtms, struct_jtm, writable=True)
+    _jalali_update_n(jtms, len(jtms))
+
+
+_jalali_tzset = _optional_function('jalali_tzset')
+_jalali_tzset.argtypes = ()
+def jalali_tzset():
+    """Re-read ``TZ`` environment variable and forget zone offsets of days
+    libjalali cached.  Should be called after changing ``TZ``, as
+    :func:`jalali_get_date` and :func:`jalali_update` fill zone fields from
+    the cache otherwise.
+    """
+    _jalali_tzset()
+
+
+_jalali_fill_zone = _optional_function('jalali_fill_zone')
+_jalali_fill_zone.argtypes = (c_int,)
+_jalali_fill_zone.restype = c_int
+def jalali_fill_zone(fill):
+    """Set whether :func:`jalali_get_date`, :func:`jalali_update` and their
+    array variants fill :attr:`~.types.struct_jtm.tm_isdst`,
+    :attr:`~.types.struct_jtm.tm_gmtoff` and
+    :attr:`~.types.struct_jtm.tm_zone` fields, and return previous setting.
+    Calendar only callers may turn it off to leave those fields alone.
+    """
+    return _jalali_fill_zone(int(bool(fill))) == 1
+
+
 _jalali_year_month_days = _libj.jalali_year_month_days
 _jalali_year_month_days.argtypes = (c_int, c_int)
 _jalali_year_month_days.restype = c_int
@@ -120,3 +177,17 @@ def jalali_year_month_days(year, month):
     Month number starts at zero
     """
     return _jalali_year_month_days(year, month)
+
+
+# Calendar arithmetic doesn't need to cross into C, serve it from pure Python
+# implementation unless ctypes backend is asked for explicitly.
+if backend == 'python':
+    from pyjalali.pure import (jalali_create_date_from_days,
+                               jalali_create_days_from_date,
+                               jalali_create_secs_from_time,
+                               jalali_create_time_from_secs, jalali_get_date,
+                               jalali_get_date_n, jalali_get_diff,
+                               jalali_get_jyear_info, jalali_fill_zone,
+                               jalali_tzset, jalali_is_jleap,
+                               jalali_update, jalali_update_n,
+                               jalali_year_month_days)
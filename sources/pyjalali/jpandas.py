@@ -0,0 +1,335 @@
+"""
+    pyjalali.jpandas
+    ~~~~~~~~~~~~~~~~
+
+    Jalali datetimes in pandas.  :class:`JalaliDtype`, named ``'jalali'``,
+    is a column type whose :class:`JalaliArray` keeps naive datetimes as
+    int64 microseconds since Epoch, like
+    :class:`.vector.JalaliDatetimeArray`, elements being
+    :class:`.datetime.datetime` objects.  Importing this module registers
+    it, and ``jalali`` accessor of Series which gives Jalali fields of
+    ``datetime64`` or ``jalali`` Series, computed over whole column by
+    :mod:`.vector`.  Missing values are ``NaT``.  pandas and NumPy are
+    needed only by this module.
+
+    >>> import pandas
+    >>> s = pandas.Series(pandas.to_datetime(['2013-03-20 23:00',
+    ...                                       '2013-06-22 08:30', None]))
+    >>> s.jalali.year.tolist(), s.jalali.month.tolist()
+    ([1391, 1392, <NA>], [12, 4, <NA>])
+    >>> s.jalali.quarter.tolist()
+    [4, 2, <NA>]
+    >>> s.jalali.strftime('%Y/%m/%d %H:%M').tolist()
+    ['1391/12/30 23:00', '1392/04/01 08:30', None]
+    >>> j = s.astype('jalali')
+    >>> j[1]
+    pyjalali.datetime.datetime(1392, 4, 1, 8, 30, 0, 0)
+    >>> j.astype('datetime64[us]').equals(s.astype('datetime64[us]'))
+    True
+    >>> pandas.array(j.astype('int64'), dtype='jalali').equals(j.array)
+    True
+    >>> j.astype(str).tolist()
+    ['1391-12-30 23:00:00', '1392-04-01 08:30:00', 'NaT']
+    >>> (j < j[1]).tolist()
+    [True, False, False]
+    >>> j[(j >= datetime(1392, 1, 1)) & (j < datetime(1393, 1, 1))].tolist()
+    [pyjalali.datetime.datetime(1392, 4, 1, 8, 30, 0, 0)]
+    >>> s[:2].groupby([s.jalali.year, s.jalali.quarter]).size().to_dict()
+    {(1391, 4): 1, (1392, 2): 1}
+"""
+
+from __future__ import absolute_import
+import numbers
+import operator
+
+import numpy
+import pandas
+from pandas.api.extensions import (ExtensionArray, ExtensionDtype,
+                                   register_extension_dtype,
+                                   register_series_accessor, take)
+
+from pyjalali.datetime import datetime, g2j
+from pyjalali.vector import JalaliDatetimeArray
+
+__all__ = ('JalaliDtype', 'JalaliArray', 'JalaliAccessor')
+
+# int64 standing for NaT, same as NumPy's
+_NAT = numpy.iinfo(numpy.int64).min
+
+
+@register_extension_dtype
+class JalaliDtype(ExtensionDtype):
+    """pandas type of naive Jalali datetimes, see :class:`JalaliArray`."""
+
+    name = 'jalali'
+    type = datetime
+    kind = 'M'
+    na_value = pandas.NaT
+
+    @classmethod
+    def construct_array_type(cls):
+        return JalaliArray
+
+    @property
+    def _is_numeric(self):
+        return False
+
+
+def _microseconds(values):
+    """Return int64 microseconds since Epoch of `values`, NaT being _NAT.
+    Values could be a datetime64 array or Series, Jalali or Gregorian
+    datetimes, integers taken as microseconds since Epoch like
+    ``astype('int64')`` gives, or None or NaT for missing ones."""
+    if isinstance(values, JalaliArray):
+        return values._data
+    if isinstance(values, (pandas.Series, pandas.Index)):
+        values = values.array
+    if isinstance(values, pandas.arrays.DatetimeArray):
+        if values.tz is not None:
+            # wall time in zone of values
+            values = values.tz_localize(None)
+        return numpy.asarray(values, dtype='datetime64[us]').view(
+            numpy.int64)
+    values = numpy.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[us]').view(numpy.int64)
+    if values.dtype.kind in 'iu':
+        return values.astype(numpy.int64)
+    res = numpy.empty(len(values), dtype=numpy.int64)
+    unbox = JalaliDatetimeArray._unbox
+    for i, v in enumerate(values.tolist()):
+        if (v is None or v is pandas.NaT or v is pandas.NA or
+                (isinstance(v, float) and v != v)):
+            res[i] = _NAT
+        elif isinstance(v, numbers.Integral) and not isinstance(v, bool):
+            res[i] = v
+        elif isinstance(v, datetime):
+            res[i] = unbox(v.replace(tzinfo=None) if v.tzinfo else v)
+        else:
+            v = pandas.Timestamp(v)
+            if v.tzinfo is not None:
+                v = v.tz_localize(None)
+            res[i] = unbox(g2j(v.to_pydatetime()))
+    return res
+
+
+class JalaliArray(ExtensionArray):
+    """pandas array of naive Jalali datetimes, kept as int64 microseconds
+    since Epoch.  Made from Jalali or Gregorian datetimes,
+    ``datetime64`` arrays or strings pandas can parse as Gregorian dates.
+    """
+
+    def __init__(self, values, copy=False):
+        values = (numpy.array(values, dtype=numpy.int64) if copy else
+                  numpy.asarray(values, dtype=numpy.int64))
+        if values.ndim != 1:
+            raise ValueError('expected one dimensional array')
+        self._data = values
+
+    @classmethod
+    def _from_sequence(cls, scalars, dtype=None, copy=False):
+        return cls(_microseconds(scalars), copy=copy)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls(values)
+
+    @property
+    def dtype(self):
+        return JalaliDtype()
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def __len__(self):
+        return len(self._data)
+
+    def _box(self, v):
+        return pandas.NaT if v == _NAT else JalaliDatetimeArray._box(v)
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            return self._box(int(self._data[item]))
+        item = pandas.api.indexers.check_array_indexer(self, item)
+        return JalaliArray(self._data[item])
+
+    def __setitem__(self, key, value):
+        if not self._data.flags.writeable:
+            raise ValueError('Cannot modify read-only array')
+        if pandas.api.types.is_list_like(value):
+            value = _microseconds(value)
+        else:
+            value = _microseconds([value])[0]
+        key = pandas.api.indexers.check_array_indexer(self, key)
+        self._data[key] = value
+
+    def __iter__(self):
+        box = self._box
+        return (box(v) for v in self._data.tolist())
+
+    def _compare(self, other, op):
+        """Return boolean array of `op` applied to microseconds of values
+        and `other`, False where either is missing."""
+        if isinstance(other, (pandas.Series, pandas.Index,
+                              pandas.DataFrame)):
+            return NotImplemented
+        if not pandas.api.types.is_list_like(other):
+            other = [other]
+        other = _microseconds(other)
+        res = op(self._data, other)
+        res &= self._data != _NAT
+        res &= other != _NAT
+        return res
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        res = self._compare(other, operator.eq)
+        return res if res is NotImplemented else ~res
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def isna(self):
+        return self._data == _NAT
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        if allow_fill:
+            fill_value = (_NAT if fill_value is None or
+                          fill_value is pandas.NaT else
+                          _microseconds([fill_value])[0])
+        return JalaliArray(take(self._data, indices, allow_fill=allow_fill,
+                                fill_value=fill_value))
+
+    def copy(self):
+        return JalaliArray(self._data.copy())
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls(numpy.concatenate([a._data for a in to_concat]))
+
+    def _values_for_factorize(self):
+        return self._data, _NAT
+
+    def _values_for_argsort(self):
+        return self._data
+
+    def astype(self, dtype, copy=True):
+        dtype = pandas.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, JalaliDtype):
+            return self.copy() if copy else self
+        if isinstance(dtype, pandas.StringDtype):
+            # NaT for str, like DatetimeArray, missing for string
+            na = None if dtype.na_value is pandas.NA else 'NaT'
+            texts = [na if v is pandas.NaT else str(v) for v in self]
+            return dtype.construct_array_type()._from_sequence(
+                numpy.array(texts, dtype=object), dtype=dtype)
+        if isinstance(dtype, ExtensionDtype):
+            return super(JalaliArray, self).astype(dtype, copy=copy)
+        if dtype.kind == 'M':
+            return self._data.view('datetime64[us]').astype(dtype)
+        if dtype.kind in 'iu':
+            return self._data.astype(dtype, copy=copy)
+        if dtype.kind == 'O':
+            return numpy.array(list(self), dtype=object)
+        if dtype.kind in 'US':
+            return numpy.array([str(v) for v in self], dtype=dtype)
+        return super(JalaliArray, self).astype(dtype, copy=copy)
+
+    def _reduce(self, name, skipna=True, **kwargs):
+        if name not in ('min', 'max'):
+            return super(JalaliArray, self)._reduce(name, skipna=skipna,
+                                                    **kwargs)
+        values = self._data[self._data != _NAT]
+        if not len(values) or (not skipna and len(values) < len(self)):
+            return pandas.NaT
+        return self._box(int(getattr(values, name)()))
+
+    def _formatter(self, boxed=False):
+        return str
+
+    def to_vector(self):
+        """Return values as :class:`.vector.JalaliDatetimeArray`, failing if
+        some are missing."""
+        if self.isna().any():
+            raise ValueError('NaT can not be converted')
+        return JalaliDatetimeArray(self._data)
+
+
+@register_series_accessor('jalali')
+class JalaliAccessor(object):
+    """``Series.jalali``, Jalali fields of ``datetime64`` or ``jalali``
+    Series.  Fields are Series of the same index, of nullable ``Int32`` type
+    since some values could be missing."""
+
+    def __init__(self, series):
+        if not (isinstance(series.dtype, JalaliDtype) or
+                pandas.api.types.is_datetime64_any_dtype(series.dtype)):
+            raise AttributeError('jalali accessor needs datetime64 or jalali '
+                                 'values, not %s' % series.dtype)
+        self._series = series
+        data = _microseconds(series)
+        self._mask = data == _NAT
+        self._array = JalaliDatetimeArray(numpy.where(self._mask, 0, data))
+
+    def _field(self, values):
+        return pandas.Series(pandas.arrays.IntegerArray(
+            numpy.asarray(values, dtype=numpy.int32), self._mask.copy()),
+            index=self._series.index, name=self._series.name)
+
+    @property
+    def year(self):
+        return self._field(self._array.year)
+
+    @property
+    def month(self):
+        return self._field(self._array.month)
+
+    @property
+    def day(self):
+        return self._field(self._array.day)
+
+    @property
+    def quarter(self):
+        return self._field((self._array.month + 2) // 3)
+
+    @property
+    def hour(self):
+        return self._field(self._array.hour)
+
+    @property
+    def minute(self):
+        return self._field(self._array.minute)
+
+    @property
+    def second(self):
+        return self._field(self._array.second)
+
+    @property
+    def weekday(self):
+        """Day of week, Shanbeh being 0."""
+        return self._field(self._array.weekday)
+
+    def strftime(self, format):
+        """Return Series of strings formatted by `format`, see
+        :mod:`.formatting`, None for missing values."""
+        texts = self._array.strftime(format).astype(object)
+        texts[self._mask] = None
+        return pandas.Series(texts, index=self._series.index,
+                             name=self._series.name, dtype=object)
+
+    def to_jalali(self):
+        """Return Series of :class:`JalaliDtype`."""
+        return pandas.Series(JalaliArray(_microseconds(self._series)),
+                             index=self._series.index, name=self._series.name)
@@ -5,7 +5,7 @@
     String formatting and deformatting
 """
 
-from pyjalali import _libj
+from pyjalali import _libj, backend
 from pyjalali.types import struct_jtm
 from ctypes import POINTER, byref
 from ctypes import c_char_p, c_int, create_string_buffer
@@ -39,3 +39,9 @@ def jstrftime(format, jtm):
     res = create_string_buffer(n)
     _jstrftime(res, n, format, byref(jtm))
     return res.value
+
+
+# Formats are compiled to Python and used without crossing into C, unless
+# ctypes backend is asked for explicitly.
+if backend == 'python':
+    from pyjalali.formatting import jstrftime, jstrptime
@@ -5,14 +5,23 @@
     Time functions.
 
     Functions `jasctime`, `jctime`, `jgmtime` and `jlocaltime` are forwarded
-    to reentrant backends.
+    to reentrant backends.  `jgmtime_n` and `jlocaltime_n` convert whole
+    arrays of timestamps by a single call of libjalali.
 """
 
-from pyjalali import _libj
-from pyjalali.types import struct_jtm, time_t, time_t_p
-from ctypes import POINTER, byref, c_char_p, create_string_buffer
+from pyjalali import _libj, _optional_function, backend
+from pyjalali.types import c_array, jtm_array, struct_jtm, time_t, time_t_p
+from ctypes import (POINTER, byref, c_char_p, c_longlong, c_size_t,
+                    create_string_buffer)
 
-__all__ = ('jasctime', 'jctime', 'jgmtime', 'jlocaltime', 'jmktime')
+__all__ = ('jasctime', 'jctime', 'jgmtime', 'jgmtime_n', 'jlocaltime',
+           'jlocaltime_n', 'jmktime')
+
+
+def _text(value):
+    """Return `value` from a C buffer as :class:`str`, like the pure
+    backend gives."""
+    return value if str is bytes else value.decode('ascii')
 
 
 _jasctime_r = _libj.jasctime_r
@@ -25,7 +34,7 @@ def jasctime(jtm, retain_nl=False):
     """
     res = create_string_buffer(26)
     _jasctime_r(byref(jtm), res)
-    return res.value if retain_nl else res.value[:-1]
+    return _text(res.value if retain_nl else res.value[:-1])
 
 
 _jctime_r = _libj.jctime_r
@@ -38,7 +47,7 @@ def jctime(timestamp, retain_nl=False):
     """
     res = create_string_buffer(26)
     _jctime_r(byref(time_t(timestamp)), res)
-    return res.value if retain_nl else res.value[:-1]
+    return _text(res.value if retain_nl else res.value[:-1])
 
 
 _jgmtime_r = _libj.jgmtime_r
@@ -62,6 +71,43 @@ def jlocaltime(timestamp):
     return res
 
 
+_jgmtime_n = _optional_function('jgmtime_n')
+_jgmtime_n.argtypes = (POINTER(c_longlong), POINTER(struct_jtm), c_size_t)
+def jgmtime_n(timestamps, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` from `timestamps`
+    expressed in UTC.
+
+    :param timestamps: ctypes array of `c_longlong` or buffer of 64 bit
+        integers, like a numpy ``int64`` array, read in place, or other
+        iterable
+    :param out: ctypes array of :class:`.types.struct_jtm` or writable
+        buffer to fill, a new array is made if None
+
+    >>> [(j.tm_year, j.tm_mon + 1, j.tm_mday, j.tm_hour)
+    ...  for j in jgmtime_n([0, 1385352000])]
+    [(1348, 10, 11, 0), (1392, 9, 4, 4)]
+    """
+    timestamps = c_array(timestamps, c_longlong)
+    n = len(timestamps)
+    out = jtm_array(n, out)
+    _jgmtime_n(timestamps, out, n)
+    return out
+
+
+_jlocaltime_n = _optional_function('jlocaltime_n')
+_jlocaltime_n.argtypes = (POINTER(c_longlong), POINTER(struct_jtm), c_size_t)
+def jlocaltime_n(timestamps, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` from `timestamps`
+    according to local zone and dst settings.  Arguments are those of
+    :func:`jgmtime_n`.
+    """
+    timestamps = c_array(timestamps, c_longlong)
+    n = len(timestamps)
+    out = jtm_array(n, out)
+    _jlocaltime_n(timestamps, out, n)
+    return out
+
+
 _jmktime = _libj.jmktime
 _jmktime.argtypes = (POINTER(struct_jtm),)
 _jmktime.restype = time_t
@@ -71,3 +117,8 @@ def jmktime(jtm):
     :param `pyjalali.types.struct_jtm` jtm
     """
     return _jmktime(byref(jtm))
+
+
+if backend == 'python':
+    from pyjalali.pure import (jasctime, jctime, jgmtime, jgmtime_n,
+                               jlocaltime, jlocaltime_n, jmktime)
@@ -0,0 +1,256 @@
+"""
+    pyjalali.period
+    ~~~~~~~~~~~~~~~
+
+    Bucketing timestamps by Jalali days, weeks, months, quarters or years.
+    A :class:`PeriodTable` keeps seconds since UTC Epoch of every boundary
+    of its period in a zone, from midnight of the first day of each one,
+    and finds period of a timestamp by bisecting them, or of a whole array
+    by :func:`numpy.searchsorted`, so no date object is made.  Tables cover
+    years around timestamps given so far, and grow when later ones fall
+    outside.
+
+    Periods are numbered so that numbers don't depend on tables: days since
+    Epoch for days, ``year * 12 + month - 1`` for months, ``year * 4 +
+    quarter - 1`` for quarters, the year itself for years.  Weeks start at
+    Shanbeh, week 0 being the one holding 1348/10/11.  Zone is a
+    :class:`python:datetime.tzinfo`, or None for UTC.
+
+    >>> floor(1364169600, 'month')  # 1392/01/05 00:00 UTC
+    1363824000
+    >>> table = PeriodTable('month')
+    >>> divmod(table.bucket_id(1364169600), 12)
+    (1392, 0)
+    >>> table.bounds(1392 * 12)
+    (1363824000, 1366502400)
+    >>> table.start_date(1392 * 12 + 11)
+    pyjalali.datetime.date(1392, 12, 1)
+    >>> bucket_ids([1363824000, 1363823999, 1364169600], 'quarter').tolist()
+    [5568, 5567, 5568]
+"""
+
+from __future__ import absolute_import
+import datetime as _std_datetime
+from bisect import bisect_right
+
+from pyjalali import pure
+from pyjalali.pure import DAY_SECONDS, EPOCH_WDAY
+
+
+__all__ = ('PERIODS', 'PeriodTable', 'bucket_ids', 'floor')
+
+PERIODS = ('day', 'week', 'month', 'quarter', 'year')
+
+# years a new table covers on both sides of the first timestamp
+_MARGIN_YEARS = 20
+
+_EPOCH = _std_datetime.datetime(1970, 1, 1)
+# days of Gregorian years 1 to 9999 zones are asked for, offsets of nearest
+# ones are taken outside
+_ZONE_DAYS = ((_std_datetime.datetime(1, 1, 2) - _EPOCH).days,
+              (_std_datetime.datetime(9999, 12, 30) - _EPOCH).days)
+
+
+def _day_ids(first, last):
+    """Return first day number and days starting days of years `first` to
+    `last` and the next one."""
+    start = pure.date_to_days(first, 1, 1)
+    return start, list(range(start, pure.date_to_days(last + 1, 1, 1) + 1))
+
+
+def _week_ids(first, last):
+    start = (pure.date_to_days(first, 1, 1) + EPOCH_WDAY) // 7
+    end = (pure.date_to_days(last + 1, 1, 1) + EPOCH_WDAY) // 7 + 1
+    return start, [week * 7 - EPOCH_WDAY for week in range(start, end + 1)]
+
+
+# months in periods counted by months
+_month_steps = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def _months(step):
+    def ids(first, last):
+        days = [pure.date_to_days(year, month, 1)
+                for year in range(first, last + 1)
+                for month in range(1, 13, step)]
+        days.append(pure.date_to_days(last + 1, 1, 1))
+        return first * 12 // step, days
+    return ids
+
+
+_boundaries = dict((period, _months(step))
+                   for period, step in _month_steps.items())
+_boundaries.update(day=_day_ids, week=_week_ids)
+
+
+class PeriodTable(object):
+    """Boundaries of `period`, one of :data:`PERIODS`, in zone `tz`.
+    Timestamps are seconds since UTC Epoch, integers or floats.
+    """
+
+    def __init__(self, period, tz=None):
+        if period not in _boundaries:
+            raise ValueError('period must be one of %s' % ', '.join(PERIODS))
+        self.period = period
+        self.tz = tz
+        # years covered, first id and starts of periods and of next one
+        self._years = None
+        self._first_id = 0
+        self._days = []
+        self._starts = []
+        self._array = None
+
+    def __repr__(self):
+        return '%s(%r, tz=%r)' % (self.__class__.__name__, self.period,
+                                  self.tz)
+
+    def _midnight(self, days):
+        """Return timestamp of midnight starting day `days` in zone."""
+        if self.tz is None:
+            return days * DAY_SECONDS
+        offset = self.tz.utcoffset(_EPOCH + _std_datetime.timedelta(
+            days=min(max(days, _ZONE_DAYS[0]), _ZONE_DAYS[1])))
+        return days * DAY_SECONDS - offset.days * DAY_SECONDS - offset.seconds
+
+    def _build(self, first, last):
+        self._first_id, self._days = _boundaries[self.period](first, last)
+        self._starts = [self._midnight(d) for d in self._days]
+        self._years = first, last
+        self._array = None
+
+    def _cover(self, low, high):
+        """Make table cover timestamps `low` to `high`."""
+        starts = self._starts
+        if starts and starts[0] <= low and high < starts[-1]:
+            return
+        # a day of margin for zone offsets
+        first = pure.days_to_date(int(low // DAY_SECONDS) - 1)[0]
+        last = pure.days_to_date(int(high // DAY_SECONDS) + 1)[0]
+        if self._years is None:
+            first -= _MARGIN_YEARS
+            last += _MARGIN_YEARS
+        else:
+            # grow by at least as many years as covered, so growing is rare
+            span = self._years[1] - self._years[0] + 1
+            if first < self._years[0]:
+                first = min(first, self._years[0] - span)
+            first = min(first, self._years[0])
+            if last > self._years[1]:
+                last = max(last, self._years[1] + span)
+            last = max(last, self._years[1])
+        self._build(first, last)
+
+    def _index(self, ts):
+        self._cover(ts, ts)
+        return bisect_right(self._starts, ts) - 1
+
+    def bucket_id(self, ts):
+        """Return number of period holding timestamp `ts`."""
+        i = self._index(ts)
+        return self._first_id + i
+
+    def floor(self, ts):
+        """Return timestamp of start of period holding `ts`."""
+        i = self._index(ts)
+        return self._starts[i]
+
+    def ceil(self, ts):
+        """Return timestamp of start of period after the one holding
+        `ts`."""
+        i = self._index(ts)
+        return self._starts[i + 1]
+
+    def _position(self, bucket_id):
+        """Return index of period `bucket_id` in table, covering it."""
+        i = bucket_id - self._first_id
+        if not self._starts or not 0 <= i < len(self._starts) - 1:
+            if self.period == 'day':
+                days = bucket_id
+            elif self.period == 'week':
+                days = bucket_id * 7 - EPOCH_WDAY
+            else:
+                year, months = divmod(
+                    bucket_id * _month_steps[self.period], 12)
+                days = pure.date_to_days(year, months + 1, 1)
+            ts = days * DAY_SECONDS
+            self._cover(ts, ts)
+            i = bucket_id - self._first_id
+        return i
+
+    def bounds(self, bucket_id):
+        """Return timestamps of start of period `bucket_id` and of the next
+        one."""
+        i = self._position(bucket_id)
+        return self._starts[i], self._starts[i + 1]
+
+    def start_date(self, bucket_id):
+        """Return :class:`.datetime.date` of first day of period
+        `bucket_id`."""
+        from pyjalali.datetime import date
+        i = self._position(bucket_id)
+        return date.fromordinal(self._days[i] + pure.EPOCH_ORDINAL)
+
+    def _starts_array(self):
+        if self._array is None:
+            import numpy
+            self._array = numpy.array(self._starts, dtype=numpy.int64)
+        return self._array
+
+    def _indices(self, values):
+        import numpy
+        from pyjalali.vector import timestamps
+        values = numpy.asarray(values)
+        if values.dtype.kind != 'f':
+            values = timestamps(values)
+        if values.size:
+            self._cover(values.min(), values.max())
+        return numpy.searchsorted(self._starts_array(), values,
+                                  side='right') - 1
+
+    def bucket_ids(self, values):
+        """Return :class:`numpy.int64` array of numbers of periods holding
+        each of `values`, timestamps or a :class:`numpy.datetime64`
+        array."""
+        i = self._indices(values)
+        return i + self._first_id
+
+    def floor_array(self, values):
+        """Return array of timestamps of start of periods holding each of
+        `values`."""
+        i = self._indices(values)
+        return self._starts_array()[i]
+
+    def bounds_array(self, bucket_ids):
+        """Return arrays of timestamps of start and end of periods
+        `bucket_ids`."""
+        import numpy
+        bucket_ids = numpy.asarray(bucket_ids, dtype=numpy.int64)
+        if bucket_ids.size:
+            self._position(int(bucket_ids.min()))
+            self._position(int(bucket_ids.max()))
+        i = bucket_ids - self._first_id
+        starts = self._starts_array()
+        return starts[i], starts[i + 1]
+
+
+# tables shared by module level functions, by period and zone
+_tables = {}
+
+
+def _table(period, tz):
+    table = _tables.get((period, tz))
+    if table is None:
+        table = _tables[period, tz] = PeriodTable(period, tz)
+    return table
+
+
+def floor(ts, period, tz=None):
+    """Return timestamp of start of `period` holding timestamp `ts` in zone
+    `tz`, see :meth:`PeriodTable.floor`."""
+    return _table(period, tz).floor(ts)
+
+
+def bucket_ids(values, period, tz=None):
+    """Return numbers of `period` holding each of `values` in zone `tz`, see
+    :meth:`PeriodTable.bucket_ids`."""
+    return _table(period, tz).bucket_ids(values)
@@ -0,0 +1,544 @@
+"""
+    pyjalali.pure
+    ~~~~~~~~~~~~~
+
+    Pure Python implementation of libjalali calendar arithmetic.
+
+    Functions named after libjalali ones behave like their counterparts in
+    :mod:`.jalali` and :mod:`.jtime`, and serve those modules unless
+    environment variable ``PYJALALI_BACKEND`` is set to ``ctypes``.  Integer
+    helpers work on number of days since UTC Epoch (0 is 1348/10/11) and
+    1-based months like :mod:`.datetime` does.
+
+    >>> jalali_is_jleap(1399), jalali_is_jleap(1400)
+    (True, False)
+    >>> date_to_days(1348, 10, 11), days_to_date(0)
+    (0, (1348, 10, 11))
+    >>> days_to_date(date_to_days(1391, 12, 30) + 1)
+    (1392, 1, 1)
+    >>> month_days(1399, 12), month_days(1400, 12)
+    (30, 29)
+"""
+
+from __future__ import absolute_import
+from bisect import bisect_right
+import time as _time
+from time import localtime, timezone, tzname
+
+from ctypes import c_int, c_longlong
+
+from pyjalali.types import c_array, jtm_array, struct_ab_jtm, struct_jtm
+
+
+__all__ = ('jalali_create_date_from_days', 'jalali_create_days_from_date',
+           'jalali_create_secs_from_time', 'jalali_create_time_from_secs',
+           'jalali_get_date', 'jalali_get_date_n', 'jalali_get_diff',
+           'jalali_get_jyear_info', 'jalali_fill_zone', 'jalali_tzset',
+           'jalali_year_month_days', 'jalali_is_jleap', 'jalali_update',
+           'jalali_update_n', 'jasctime',
+           'jctime', 'jgmtime', 'jgmtime_n', 'jlocaltime', 'jlocaltime_n',
+           'jmktime',
+           'date_to_days', 'days_before_year', 'days_to_date', 'month_days',
+           'weekday')
+
+
+# values of libjalali's jconfig.h
+LEAP_BASE = 475
+LEAP_PERIOD = 2820
+NORMAL_CYCLE_LENGTH = 128
+LAST_CYCLE_START = 2688
+TOTAL_LEAPS_IN_PERIOD = 683
+CYCLE_PATTERNS = (0, 29, 62, 95)
+
+EPOCH_YEAR = 1348
+EPOCH_DIFF = 286
+EPOCH_WDAY = 5
+# proleptic Gregorian ordinal of UTC Epoch, as of datetime.date.toordinal
+EPOCH_ORDINAL = 719163
+
+INDEX_FIRST_YEAR = 1
+INDEX_LAST_YEAR = 9999
+
+DAY_SECONDS = 86400
+
+month_lengths = (31, 31, 31, 31, 31, 31, 30, 30, 30, 30, 30, 29)
+accumulated_month_lengths = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276,
+                             306, 336)
+
+jalali_months_3 = ('Far', 'Ord', 'Kho', 'Tir', 'Mor', 'Sha', 'Meh', 'Aba',
+                   'Aza', 'Dey', 'Bah', 'Esf')
+jalali_days_3_fa = ('Sha', 'Yek', 'Dos', 'Ses', 'Cha', 'Pan', 'Jom')
+
+# leap years from 1200 to 1499 are listed by libjalali instead of computed
+_listed_leap_years = frozenset(
+    [1200 + y for y in (10, 14, 18, 22, 26, 30, 34, 38, 43, 47, 51, 55, 59,
+                        63, 67, 71, 76, 80, 84, 88, 92, 96)] +
+    [1300 + y for y in (0, 4, 9, 13, 17, 21, 25, 29, 33, 37, 42, 46, 50, 54,
+                        58, 62, 66, 70, 75, 79, 83, 87, 91, 95, 99)] +
+    [1400 + y for y in (3, 8, 12, 16, 20, 24, 28, 32, 36, 41, 45, 49, 53, 57,
+                        61, 65, 69, 74, 78, 82, 86, 90, 94)])
+
+
+def jalali_is_jleap(year):
+    """Return True if given year is leap year else False."""
+    if 1200 <= year <= 1499:
+        return year in _listed_leap_years
+    pr = (year - LEAP_BASE) % LEAP_PERIOD
+    if pr > LAST_CYCLE_START:
+        pr -= LAST_CYCLE_START
+    else:
+        pr %= NORMAL_CYCLE_LENGTH
+    for start in reversed(CYCLE_PATTERNS):
+        if pr >= start:
+            pr -= start
+            return pr != 0 and pr % 4 == 0
+
+
+def year_length(year):
+    return 366 if jalali_is_jleap(year) else 365
+
+
+# Days from UTC Epoch to 1 Farvardin of each year in [INDEX_FIRST_YEAR,
+# INDEX_LAST_YEAR + 1], filled on first use.
+_year_starts = []
+
+
+def _build_year_index():
+    starts = [0] * (INDEX_LAST_YEAR - INDEX_FIRST_YEAR + 2)
+    e = EPOCH_YEAR - INDEX_FIRST_YEAR
+    starts[e] = -EPOCH_DIFF
+    for i in range(e + 1, len(starts)):
+        starts[i] = starts[i - 1] + year_length(INDEX_FIRST_YEAR + i - 1)
+    for i in range(e - 1, -1, -1):
+        starts[i] = starts[i + 1] - year_length(INDEX_FIRST_YEAR + i)
+    _year_starts[:] = starts
+    return _year_starts
+
+
+def days_before_year(year):
+    """Return number of days from UTC Epoch to 1 Farvardin of `year`."""
+    starts = _year_starts or _build_year_index()
+    i = year - INDEX_FIRST_YEAR
+    if 0 <= i < len(starts):
+        return starts[i]
+    if i < 0:
+        return starts[0] - sum(map(year_length,
+                                   range(year, INDEX_FIRST_YEAR)))
+    return starts[-1] + sum(map(year_length,
+                                range(INDEX_LAST_YEAR + 1, year)))
+
+
+def _year_from_days(days):
+    """Return year containing the day `days` since UTC Epoch and number of
+    days passed from its start."""
+    starts = _year_starts or _build_year_index()
+    if starts[0] <= days < starts[-1]:
+        i = bisect_right(starts, days) - 1
+        return INDEX_FIRST_YEAR + i, days - starts[i]
+    if days < starts[0]:
+        year, start = INDEX_FIRST_YEAR, starts[0]
+        while days < start:
+            year -= 1
+            start -= year_length(year)
+    else:
+        year, start = INDEX_LAST_YEAR + 1, starts[-1]
+        while days >= start + year_length(year):
+            start += year_length(year)
+            year += 1
+    return year, days - start
+
+
+def _month_from_yday(yday):
+    mon = bisect_right(accumulated_month_lengths, yday) - 1
+    return mon, yday - accumulated_month_lengths[mon] + 1
+
+
+def month_days(year, month):
+    """Return number of days in `month` (1-12) of `year`."""
+    if month == 12 and jalali_is_jleap(year):
+        return 30
+    return month_lengths[month - 1]
+
+
+def date_to_days(year, month, day):
+    """Return number of days since UTC Epoch for given date.  Month should be
+    in range 1 to 12, `day` is allowed to overflow its month."""
+    if _year_starts and INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+        start = _year_starts[year - INDEX_FIRST_YEAR]
+    else:
+        start = days_before_year(year)
+    return start + accumulated_month_lengths[month - 1] + day - 1
+
+
+def days_to_date(days):
+    """Return (year, month, day) of date `days` days after UTC Epoch."""
+    year, yday = _year_from_days(days)
+    mon, mday = _month_from_yday(yday)
+    return year, mon + 1, mday
+
+
+def weekday(days):
+    """Return day of the week, where Shanbeh is 0, of date `days` days after
+    UTC Epoch."""
+    return (days + EPOCH_WDAY) % 7
+
+
+def _local_zone(timestamp):
+    """Return (isdst, gmtoff, zone) of local time at `timestamp`."""
+    try:
+        lt = localtime(timestamp)
+    except (ValueError, OverflowError, OSError):
+        return 0, -timezone, tzname[0]
+    try:
+        return lt.tm_isdst, lt.tm_gmtoff, lt.tm_zone
+    except AttributeError:  # no tm_gmtoff and tm_zone before Python 3.3
+        from calendar import timegm
+        return lt.tm_isdst, timegm(lt) - timestamp, tzname[lt.tm_isdst > 0]
+
+
+# zone names as bytes, to be stored in struct_jtm.tm_zone
+_zone_names = {}
+
+
+def _zone_name(zone):
+    try:
+        return _zone_names[zone]
+    except KeyError:
+        name = zone if isinstance(zone, bytes) else zone.encode('utf-8')
+        return _zone_names.setdefault(zone, name)
+
+
+def _set_zone(jtm, isdst, gmtoff, zone):
+    jtm.tm_isdst = isdst
+    jtm.tm_gmtoff = gmtoff
+    jtm.tm_zone = _zone_name(zone)
+
+
+# Zone offset cache.  Days are grouped in chunks of ZONE_CHUNK_DAYS and
+# intervals of days sharing zone fields are resolved once per chunk, then
+# looked up by bisecting their first days.  Zones are sampled every
+# ZONE_STEP_DAYS and changes are bisected between samples, like libjalali
+# does.  See jalali_tzset.
+ZONE_CHUNK_DAYS = 1024
+ZONE_STEP_DAYS = 8
+_ZONE_CACHE_CHUNKS = 1024
+# chunk: (first days of intervals, (isdst, gmtoff, zone name) of intervals)
+_zone_chunks = {}
+_fill_zone = True
+
+
+def _resolve_zone_chunk(chunk):
+    p = chunk * ZONE_CHUNK_DAYS
+    last = p + ZONE_CHUNK_DAYS - 1
+    cur = _local_zone(p * DAY_SECONDS)
+    firsts, zones = [p], [cur]
+    while p < last:
+        q = min(p + ZONE_STEP_DAYS, last)
+        zone = _local_zone(q * DAY_SECONDS)
+        if zone == cur:
+            p = q
+            continue
+        # day p has zone cur, day q has another one
+        while q - p > 1:
+            mid = (p + q) // 2
+            mid_zone = _local_zone(mid * DAY_SECONDS)
+            if mid_zone == cur:
+                p = mid
+            else:
+                q, zone = mid, mid_zone
+        p, cur = q, zone
+        firsts.append(p)
+        zones.append(cur)
+    zones = [(isdst, gmtoff, _zone_name(zone))
+             for isdst, gmtoff, zone in zones]
+    if len(_zone_chunks) >= _ZONE_CACHE_CHUNKS:
+        _zone_chunks.clear()
+    _zone_chunks[chunk] = firsts, zones
+    return firsts, zones
+
+
+def _day_zone(days):
+    """Return (isdst, gmtoff, zone) of local time at start of day `days`
+    days after UTC Epoch, zone name as bytes."""
+    try:
+        firsts, zones = _zone_chunks[days // ZONE_CHUNK_DAYS]
+    except KeyError:
+        firsts, zones = _resolve_zone_chunk(days // ZONE_CHUNK_DAYS)
+    if len(zones) == 1:
+        return zones[0]
+    return zones[bisect_right(firsts, days) - 1]
+
+
+def _set_day_zone(jtm, days):
+    if _fill_zone:
+        jtm.tm_isdst, jtm.tm_gmtoff, jtm.tm_zone = _day_zone(days)
+
+
+def jalali_tzset():
+    """Re-read ``TZ`` environment variable, where :func:`time.tzset` is
+    available, and forget cached zone offsets of days.  Should be called after
+    changing ``TZ``, as :func:`jalali_get_date` and :func:`jalali_update` fill
+    zone fields from the cache otherwise.
+    """
+    global timezone, tzname
+    if hasattr(_time, 'tzset'):  # not on Windows
+        _time.tzset()
+    timezone, tzname = _time.timezone, _time.tzname
+    _zone_chunks.clear()
+
+
+def jalali_fill_zone(fill):
+    """Set whether :func:`jalali_get_date`, :func:`jalali_update` and their
+    array variants fill :attr:`~.types.struct_jtm.tm_isdst`,
+    :attr:`~.types.struct_jtm.tm_gmtoff` and
+    :attr:`~.types.struct_jtm.tm_zone` fields, and return previous setting.
+    Calendar only callers may turn it off to leave those fields alone.
+
+    >>> previous = jalali_fill_zone(False)
+    >>> jalali_get_date(0).tm_zone is None
+    True
+    >>> jalali_fill_zone(previous)
+    False
+    """
+    global _fill_zone
+    previous, _fill_zone = _fill_zone, bool(fill)
+    return previous
+
+
+def _set_date(jtm, days):
+    year, yday = _year_from_days(days)
+    mon = bisect_right(accumulated_month_lengths, yday) - 1
+    jtm.tm_year = year
+    jtm.tm_yday = yday
+    jtm.tm_mon = mon
+    jtm.tm_mday = yday - accumulated_month_lengths[mon] + 1
+    jtm.tm_wday = (days + EPOCH_WDAY) % 7
+
+
+def jalali_create_time_from_secs(timestamp):
+    """Return :class:`.types.struct_ab_jtm` from given timestamp."""
+    days, secs = divmod(timestamp, DAY_SECONDS)
+    hour, secs = divmod(secs, 3600)
+    return struct_ab_jtm(secs % 60, secs // 60, hour, days)
+
+
+def jalali_create_secs_from_time(ab_jtm):
+    """Return number of seconds elapsed since UTC Epoch based on supplied
+    :class:`.types.struct_ab_jtm`.
+    """
+    return (ab_jtm.ab_days * DAY_SECONDS + ab_jtm.ab_hour * 3600 +
+            ab_jtm.ab_min * 60 + ab_jtm.ab_sec)
+
+
+def jalali_create_date_from_days(jtm, silent=False):
+    """Alter provided :class:`.types.struct_jtm` object's fields
+    :attr:`~.types.struct_jtm.tm_mon` and :attr:`~.types.struct_jtm.tm_mday`
+    based on its :attr:`~.types.struct_jtm.tm_yday` field.  In case of
+    failure raise `ValueError` exception if silent is not True.
+    """
+    if not 0 <= jtm.tm_yday <= 365:
+        if not silent:
+            raise ValueError
+        return
+    jtm.tm_mon, jtm.tm_mday = _month_from_yday(jtm.tm_yday)
+
+
+def jalali_create_days_from_date(jtm, silent=False):
+    """Alter provided :class:`.types.struct_jtm` object's field
+    :attr:`~.types.struct_jtm.tm_yday` based on its fields
+    :attr:`~.types.struct_jtm.tm_mon` and :attr:`~.types.struct_jtm.tm_mday`.
+    In case of failure raise `ValueError` exception if silent is not True.
+    """
+    if not (0 <= jtm.tm_mon <= 11 and 1 <= jtm.tm_mday <= 31):
+        if not silent:
+            raise ValueError
+        return
+    jtm.tm_yday = accumulated_month_lengths[jtm.tm_mon] + jtm.tm_mday - 1
+
+
+def jalali_get_jyear_info(jyinfo):
+    """Fill given :class:`.types.struct_jyinfo` object's fields with year
+    information based on given year by :attr:`.types.struct_jyinfo.y`.
+    """
+    y = jyinfo.y
+    jyinfo.lf = int(jalali_is_jleap(y))
+    # leap years from grand cycle epoch to y, both ends included
+    first, last = min(y, LEAP_BASE), max(y, LEAP_BASE)
+    c = (days_before_year(last + 1) - days_before_year(first) -
+         365 * (last - first + 1))
+    if y >= LEAP_BASE:
+        jyinfo.apl = c
+        jyinfo.pl = c % TOTAL_LEAPS_IN_PERIOD
+    else:
+        jyinfo.apl = -c
+        jyinfo.pl = TOTAL_LEAPS_IN_PERIOD - c % TOTAL_LEAPS_IN_PERIOD
+    jyinfo.rl = TOTAL_LEAPS_IN_PERIOD - jyinfo.pl
+    jyinfo.p = (y - LEAP_BASE) % LEAP_PERIOD
+    jyinfo.r = LEAP_PERIOD - jyinfo.p - 1
+
+
+def jalali_get_date(days):
+    """Calculates Jalali date based on given number of days since UTC
+    Epoch and return result as :class:`.types.struct_jtm`.
+    """
+    res = struct_jtm()
+    _set_date(res, days)
+    _set_day_zone(res, days)
+    return res
+
+
+def jalali_get_date_n(days, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` of dates `days`
+    days after UTC Epoch, see :func:`.jalali.jalali_get_date_n`.
+    """
+    days = c_array(days, c_int)
+    out = jtm_array(len(days), out)
+    for i, d in enumerate(days):
+        jtm = out[i]
+        _set_date(jtm, d)
+        _set_day_zone(jtm, d)
+    return out
+
+
+def jalali_get_diff(jtm, silent=False):
+    """Return number of days passed since UTC Epoch based on given
+    :class:`.types.struct_jtm`.  In case of failure raise `ValueError`
+    exception if silent is not True.
+    """
+    if not 0 <= jtm.tm_yday <= 365:
+        if not silent:
+            raise ValueError
+        return -1
+    return days_before_year(jtm.tm_year) + jtm.tm_yday
+
+
+def jalali_update(jtm):
+    """Updates given :class:`.types.struct_jtm` object's fields based on its
+    :attr:`~.types.struct_jtm.tm_year`, :attr:`~.types.struct_jtm.tm_mon` and
+    :attr:`~.types.struct_jtm.tm_mday`.
+    """
+    mins, jtm.tm_sec = divmod(jtm.tm_sec, 60)
+    hours, jtm.tm_min = divmod(jtm.tm_min + mins, 60)
+    mdays, jtm.tm_hour = divmod(jtm.tm_hour + hours, 24)
+    years, mon = divmod(jtm.tm_mon, 12)
+    days = (days_before_year(jtm.tm_year + years) +
+            accumulated_month_lengths[mon] + jtm.tm_mday + mdays - 1)
+    _set_date(jtm, days)
+    _set_day_zone(jtm, days)
+
+
+def jalali_update_n(jtms):
+    """Update :class:`.types.struct_jtm` objects of ctypes array or writable
+    buffer `jtms` in place, as :func:`jalali_update` does.
+    """
+    for jtm in c_array(jtms, struct_jtm, writable=True):
+        jalali_update(jtm)
+
+
+def jalali_year_month_days(year, month):
+    """Return number of days in provided month of year.
+    Month number starts at zero
+    """
+    return month_days(year, month + 1)
+
+
+def _set_time(jtm, timestamp):
+    days, secs = divmod(timestamp, DAY_SECONDS)
+    _set_date(jtm, days)
+    jtm.tm_hour, secs = divmod(secs, 3600)
+    jtm.tm_min, jtm.tm_sec = divmod(secs, 60)
+
+
+def _set_gmtime(jtm, timestamp):
+    _set_time(jtm, timestamp)
+    _set_zone(jtm, 0, 0, 'UTC')
+
+
+def _set_localtime(jtm, timestamp):
+    isdst, gmtoff, zone = _local_zone(timestamp)
+    _set_time(jtm, timestamp + gmtoff)
+    _set_zone(jtm, isdst, gmtoff, zone)
+
+
+def jgmtime(timestamp):
+    """Return :class:`.types.struct_jtm` from `timestamp` expressed in UTC.
+    """
+    res = struct_jtm()
+    _set_gmtime(res, timestamp)
+    return res
+
+
+def jlocaltime(timestamp):
+    """Make :class:`.types.struct_jtm` from `timestamp` according to local
+    zone and dst settings.
+    """
+    res = struct_jtm()
+    _set_localtime(res, timestamp)
+    return res
+
+
+def jgmtime_n(timestamps, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` from `timestamps`
+    expressed in UTC, see :func:`.jtime.jgmtime_n`.
+
+    >>> times = (c_longlong * 2)(0, 1385352000)
+    >>> out = jgmtime_n(times)
+    >>> [(j.tm_year, j.tm_mon + 1, j.tm_mday, j.tm_hour) for j in out]
+    [(1348, 10, 11, 0), (1392, 9, 4, 4)]
+    >>> times[0] += 86400
+    >>> out = jgmtime_n(times, out)
+    >>> jalali_update_n(out)
+    >>> out[0].tm_mday, out[0].tm_wday
+    (12, 6)
+    """
+    timestamps = c_array(timestamps, c_longlong)
+    out = jtm_array(len(timestamps), out)
+    for i, t in enumerate(timestamps):
+        _set_gmtime(out[i], t)
+    return out
+
+
+def jlocaltime_n(timestamps, out=None):
+    """Return ctypes array of :class:`.types.struct_jtm` from `timestamps`
+    according to local zone and dst settings, see
+    :func:`.jtime.jlocaltime_n`.
+    """
+    timestamps = c_array(timestamps, c_longlong)
+    out = jtm_array(len(timestamps), out)
+    for i, t in enumerate(timestamps):
+        _set_localtime(out[i], t)
+    return out
+
+
+def jmktime(jtm):
+    """Return timestamp from provided time.
+
+    :param `pyjalali.types.struct_jtm` jtm
+    """
+    jalali_update(jtm)
+    return (jalali_get_diff(jtm) * DAY_SECONDS + jtm.tm_hour * 3600 +
+            jtm.tm_min * 60 + jtm.tm_sec - jtm.tm_gmtoff)
+
+
+def jasctime(jtm, retain_nl=False):
+    """Return string representation of given time.
+
+    :param `pyjalali.types.struct_jtm` jtm:
+    :param bool retain_nl: keep trailing newline character
+    """
+    if not (0 <= jtm.tm_wday <= 6 and 0 <= jtm.tm_mon <= 11 and
+            1 <= jtm.tm_mday <= 31):
+        return ''
+    res = '%s %s %02d %02d:%02d:%02d %d' % (
+        jalali_days_3_fa[jtm.tm_wday], jalali_months_3[jtm.tm_mon],
+        jtm.tm_mday, jtm.tm_hour, jtm.tm_min, jtm.tm_sec, jtm.tm_year)
+    return res + '\n' if retain_nl else res
+
+
+def jctime(timestamp, retain_nl=False):
+    """Return string representation of time from timestamp.
+
+    :param int timestamp:
+    :param bool retain_nl: keep trailing newline character
+    """
+    return jasctime(jlocaltime(timestamp), retain_nl)
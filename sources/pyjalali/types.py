@@ -5,7 +5,9 @@
     Core C types for libjalali binding.
 """
 
-from ctypes import POINTER, Structure, c_char_p, c_int, c_long
+import sys
+from ctypes import (POINTER, Array, Structure, c_char_p, c_int, c_long,
+                    c_longlong, sizeof)
 from time import struct_time
 
 class struct_ab_jtm(Structure):
@@ -58,8 +60,12 @@ class struct_jyinfo(Structure):
                 ('apl', c_int))
 
 
-time_t = c_int
-time_t_p = POINTER(c_int)
+try:
+    from ctypes import c_time_t as time_t
+except ImportError:
+    # time_t is long on POSIX systems, and 64 bit on Windows since MSVC 2005
+    time_t = c_longlong if sys.platform == 'win32' else c_long
+time_t_p = POINTER(time_t)
 
 def jtm_to_struct_time(src_jtm):
     """Make :class:`time.struct_time` from broken-down jalali time
@@ -67,3 +73,78 @@ def jtm_to_struct_time(src_jtm):
     return struct_time((src_jtm.tm_year, src_jtm.tm_mon+1, src_jtm.tm_mday,
                         src_jtm.tm_hour, src_jtm.tm_min, src_jtm.tm_sec,
                         src_jtm.tm_wday, src_jtm.tm_yday+1, src_jtm.tm_isdst))
+
+
+def _nbytes(obj, size):
+    """Return size in bytes of buffer exported by `obj`, checking its items
+    are `size` bytes long, or None if `obj` isn't a buffer."""
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        if str is not bytes:
+            return None
+        # Python 2 array.array and mmap only export old style buffers
+        try:
+            nbytes = len(buffer(obj))
+        except TypeError:
+            return None
+        itemsize = getattr(obj, 'itemsize', 1)
+    else:
+        itemsize = view.itemsize
+        # no nbytes before Python 3.3
+        nbytes = getattr(view, 'nbytes', None) or len(view) * itemsize
+    if itemsize not in (1, size):
+        raise TypeError('buffer items are %d bytes long, not %d' %
+                        (itemsize, size))
+    if nbytes % size:
+        raise ValueError('buffer of %d bytes does not hold a whole number '
+                         'of %d bytes items' % (nbytes, size))
+    return nbytes
+
+
+def c_array(obj, ctype, writable=False):
+    """Return ctypes array of `ctype` items sharing memory with `obj`.
+
+    `obj` may be a ctypes array of `ctype` or an object exporting a buffer
+    of such items, like :class:`array.array`, :class:`bytearray` or a numpy
+    array, which is used in place.  Read-only buffers and other iterables
+    are copied, unless `writable` is true.
+
+    >>> from array import array
+    >>> values = array('i', [1, 2, 3])
+    >>> items = c_array(values, c_int)
+    >>> items[0] = 5
+    >>> values[0], len(items)
+    (5, 3)
+    >>> list(c_array([4, 5], c_int))
+    [4, 5]
+    """
+    if isinstance(obj, Array) and obj._type_ is ctype:
+        return obj
+    size = sizeof(ctype)
+    nbytes = _nbytes(obj, size)
+    if nbytes is None:
+        if writable or isinstance(obj, (bytes, type(u''))):
+            raise TypeError('writable buffer of %s expected, not %s' %
+                            (ctype.__name__, type(obj).__name__))
+        obj = list(obj)
+        return (ctype * len(obj))(*obj)
+    array_type = ctype * (nbytes // size)
+    try:
+        return array_type.from_buffer(obj)
+    except TypeError:
+        if writable:
+            raise
+        return array_type.from_buffer_copy(obj)
+
+
+def jtm_array(n, out=None):
+    """Return ctypes array of at least `n` :class:`struct_jtm`, `out` as
+    given by :func:`c_array` or a new one if it's None."""
+    if out is None:
+        return (struct_jtm * n)()
+    out = c_array(out, struct_jtm, writable=True)
+    if len(out) < n:
+        raise ValueError('room for %d structures needed, not %d' %
+                         (n, len(out)))
+    return out
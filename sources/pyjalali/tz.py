@@ -0,0 +1,398 @@
+"""
+    pyjalali.tz
+    ~~~~~~~~~~~
+
+    Time zones for :class:`.datetime.datetime`, without a Gregorian round
+    trip.  A :class:`JalaliZone` keeps its transitions as seconds since
+    Epoch, and for every day around them, keyed by ordinal, the number of
+    transitions before its start in UTC and in wall time.  So
+    :meth:`~JalaliZone.utcoffset`, :meth:`~JalaliZone.dst` and
+    :meth:`~JalaliZone.fromutc` read ordinal and seconds of a datetime, look
+    up its day and step over transitions of that day only, taking constant
+    time.
+
+    :data:`TEHRAN` is Asia/Tehran built from Iranian rules, which are in
+    Jalali dates: daylight saving time ran from 24:00 of 1 Farvardin to
+    24:00 of 30 Shahrivar, last in 1401.  Other zones are read by
+    :func:`zone` from the zoneinfo database of the system, rules of their
+    last transitions repeated through Gregorian year :data:`RULES_UNTIL`.
+
+    Ambiguous and missing wall times are resolved as :pep:`495` does with
+    ``fold`` being 0, which :class:`.datetime.datetime` doesn't have: the
+    offset before transition is taken.  Standard library datetimes are
+    accepted too, honoring their ``fold``.
+
+    >>> from pyjalali.datetime import datetime
+    >>> d = datetime(1392, 4, 1, 12, 0, tzinfo=TEHRAN)
+    >>> str(d.utcoffset()), str(d.dst()), d.tzname()
+    ('4:30:00', '1:00:00', '+0430')
+    >>> d.astimezone(UTC)
+    pyjalali.datetime.datetime(1392, 4, 1, 7, 30, 0, 0, tzinfo=pyjalali.tz.zone('UTC'))
+    >>> datetime(1391, 6, 30, 23, 30, tzinfo=TEHRAN).tzname()
+    '+0430'
+    >>> d = datetime(1391, 6, 30, 20, 0, tzinfo=UTC).astimezone(TEHRAN)
+    >>> d.hour, d.minute
+    (23, 30)
+    >>> zone('Asia/Tehran') is TEHRAN
+    True
+"""
+
+from __future__ import absolute_import
+from array import array
+import datetime as _std_datetime
+import os
+import re
+import struct
+
+from pyjalali import pure
+from pyjalali.datetime import datetime
+from pyjalali.pure import DAY_SECONDS, EPOCH_ORDINAL
+
+
+__all__ = ('RULES_UNTIL', 'TEHRAN', 'TZPATH', 'UTC', 'JalaliZone',
+           'from_file', 'zone')
+
+# last Gregorian year transitions of recurring rules are made for
+RULES_UNTIL = 2100
+
+# directories searched for zoneinfo files, PYTHONTZPATH overrides them like
+# it does for zoneinfo of standard library
+TZPATH = tuple(p for p in os.environ.get('PYTHONTZPATH', '').split(
+    os.pathsep) if os.path.isabs(p)) or (
+    '/usr/share/zoneinfo', '/usr/lib/zoneinfo', '/usr/share/lib/zoneinfo',
+    '/etc/zoneinfo')
+
+
+def _day_index(times, first, days):
+    """Return array giving for each of `days` days from day `first` since
+    Epoch how many of sorted `times` are before or at its start."""
+    index = array('i')
+    start = first * DAY_SECONDS
+    for k, t in enumerate(times):
+        # first day starting at or after t
+        day = min(-(-(t - start) // DAY_SECONDS), days)
+        index.extend([k] * (day - len(index)))
+    index.extend([len(times)] * (days - len(index)))
+    return index
+
+
+def _local(dt):
+    """Return ordinal, seconds of the day and fold of `dt`."""
+    try:
+        return dt._ordinal, dt._seconds, 0
+    except AttributeError:
+        return (dt.toordinal(), dt.hour * 3600 + dt.minute * 60 + dt.second,
+                getattr(dt, 'fold', 0))
+
+
+class JalaliZone(_std_datetime.tzinfo):
+    """Zone named `key` whose offset from UTC changes at `transitions`,
+    sorted seconds since Epoch, to each of `infos` after the first one.
+    Infos are tuples of offset from UTC in seconds, daylight saving time
+    part of it and abbreviated name; the first one is in effect before
+    transitions.
+    """
+
+    def __init__(self, key, transitions, infos):
+        if len(infos) != len(transitions) + 1:
+            raise ValueError('zone needs one more info than transitions')
+        self.key = key
+        self._utc = list(transitions)
+        self._offsets = [offset for offset, dst, name in infos]
+        self._infos = [(_std_datetime.timedelta(seconds=offset),
+                        _std_datetime.timedelta(seconds=dst), str(name))
+                       for offset, dst, name in infos]
+        offsets = self._offsets
+        # wall time of each transition on both sides of a fold: first time
+        # it's past, and first time it's past again for wall times that
+        # happen twice
+        self._wall = (
+            [t + max(offsets[k], offsets[k + 1])
+             for k, t in enumerate(self._utc)],
+            [t + min(offsets[k], offsets[k + 1])
+             for k, t in enumerate(self._utc)])
+        if self._utc:
+            # two days of margin, for offsets of wall times
+            first = self._utc[0] // DAY_SECONDS - 2
+            days = self._utc[-1] // DAY_SECONDS + 3 - first
+        else:
+            first = days = 0
+        self._first = first + EPOCH_ORDINAL
+        self._utc_days = _day_index(self._utc, first, days)
+        self._wall_days = _day_index(self._wall[0], first, days)
+
+    def __repr__(self):
+        return 'pyjalali.tz.zone(%r)' % self.key
+
+    def __str__(self):
+        return self.key
+
+    def __reduce__(self):
+        return zone, (self.key,)
+
+    def _find(self, times, index, ordinal, seconds):
+        """Return number of `times` before or at `seconds` of day
+        `ordinal`, starting from count of day in `index`."""
+        i = ordinal - self._first
+        if i < 0:
+            return 0
+        if i >= len(index):
+            return len(times)
+        k = index[i]
+        n = len(times)
+        if k < n:
+            s = (ordinal - EPOCH_ORDINAL) * DAY_SECONDS + seconds
+            while k < n and times[k] <= s:
+                k += 1
+        return k
+
+    def _info(self, dt):
+        ordinal, seconds, fold = _local(dt)
+        return self._infos[self._find(self._wall[fold], self._wall_days,
+                                      ordinal, seconds)]
+
+    def utcoffset(self, dt):
+        if dt is None:
+            return None
+        return self._info(dt)[0]
+
+    def dst(self, dt):
+        if dt is None:
+            return None
+        return self._info(dt)[1]
+
+    def tzname(self, dt):
+        if dt is None:
+            return None
+        return self._info(dt)[2]
+
+    def fromutc(self, dt):
+        """Return `dt`, a UTC time naive or having this zone, in wall time
+        of this zone."""
+        if dt.tzinfo is not None and dt.tzinfo is not self:
+            raise ValueError('fromutc: dt.tzinfo is not self')
+        ordinal, seconds, fold = _local(dt)
+        k = self._find(self._utc, self._utc_days, ordinal, seconds)
+        offset = self._offsets[k]
+        if isinstance(dt, datetime):
+            local = dt._shifted(0, offset, 0)
+            local.tzinfo = self
+            return local
+        local = (dt + self._infos[k][0]).replace(tzinfo=self)
+        if k and self._offsets[k - 1] > offset:
+            # second time of a wall time that happens twice
+            since = ((ordinal - EPOCH_ORDINAL) * DAY_SECONDS + seconds -
+                     self._utc[k - 1])
+            if since < self._offsets[k - 1] - offset and hasattr(local,
+                                                                 'fold'):
+                local = local.replace(fold=1)
+        return local
+
+
+def _dst_parts(types, indices):
+    """Return daylight saving time part of offset of each of TZif `types`,
+    tuples of offset and isdst, used at transitions to `indices`.  It's
+    difference from offset of a standard time next to a transition to it,
+    one hour if there's none."""
+    dsts = [0] * len(types)
+    for i in range(1, len(indices)):
+        offset, isdst = types[indices[i]]
+        if not isdst or dsts[indices[i]]:
+            continue
+        for j in (i - 1, i + 1):
+            if j < len(indices) and not types[indices[j]][1]:
+                dst = offset - types[indices[j]][0]
+                if dst:
+                    dsts[indices[i]] = dst
+                    break
+    return [dst or (3600 if isdst else 0)
+            for dst, (offset, isdst) in zip(dsts, types)]
+
+
+_POSIX_TIME = r'[+-]?\d{1,3}(?::\d{1,2}){0,2}'
+_POSIX_NAME = r'<[^>]+>|[A-Za-z]{3,}'
+_POSIX = re.compile(
+    r'(?P<std>%(name)s)(?P<stdoff>%(time)s)'
+    r'(?:(?P<dst>%(name)s)(?P<dstoff>%(time)s)?'
+    r'(?:,(?P<start>[^,/]+)(?:/(?P<starttime>%(time)s))?'
+    r',(?P<end>[^,/]+)(?:/(?P<endtime>%(time)s))?)?)?$'
+    % {'name': _POSIX_NAME, 'time': _POSIX_TIME})
+
+
+def _posix_seconds(text):
+    sign = -1 if text.startswith('-') else 1
+    parts = [int(p) for p in text.lstrip('+-').split(':')] + [0, 0]
+    return sign * (parts[0] * 3600 + parts[1] * 60 + parts[2])
+
+
+def _rule_ordinal(rule, year):
+    """Return Gregorian ordinal of day of POSIX TZ `rule` in `year`."""
+    jan1 = _std_datetime.date(year, 1, 1).toordinal()
+    if rule.startswith('M'):
+        month, week, wday = [int(p) for p in rule[1:].split('.')]
+        first = _std_datetime.date(year, month, 1)
+        # weekday of rules is 0 for Sunday
+        day = 1 + (wday - (first.weekday() + 1)) % 7 + (week - 1) * 7
+        month_end = (_std_datetime.date(year + month // 12, month % 12 + 1, 1)
+                     - first).days
+        while day > month_end:
+            day -= 7
+        return first.toordinal() + day - 1
+    if rule.startswith('J'):
+        n = int(rule[1:])
+        leap = (year % 4 == 0 and year % 100 != 0) or year % 400 == 0
+        return jan1 + n - 1 + (1 if leap and n >= 60 else 0)
+    return jan1 + int(rule)
+
+
+def _expand_rules(tz, times, infos, until):
+    """Append transitions of POSIX TZ string `tz` after last one of `times`
+    through Gregorian year `until`."""
+    match = _POSIX.match(tz)
+    if match is None or match.group('start') is None:
+        return
+    std = -_posix_seconds(match.group('stdoff'))
+    dst = (-_posix_seconds(match.group('dstoff')) if match.group('dstoff')
+           else std + 3600)
+    std_info = (std, 0, match.group('std').strip('<>'))
+    dst_info = (dst, dst - std, match.group('dst').strip('<>'))
+    last = times[-1] if times else None
+    first = (_std_datetime.datetime(1970, 1, 1) + _std_datetime.timedelta(
+        seconds=last)).year if last is not None else 1970
+    for year in range(first, until + 1):
+        changes = []
+        for rule, time, info, before in (
+                (match.group('start'), match.group('starttime'), dst_info,
+                 std),
+                (match.group('end'), match.group('endtime'), std_info, dst)):
+            seconds = _posix_seconds(time) if time else 7200
+            changes.append(((_rule_ordinal(rule, year) - EPOCH_ORDINAL) *
+                            DAY_SECONDS + seconds - before, info))
+        for t, info in sorted(changes):
+            if last is None or t > last:
+                times.append(t)
+                infos.append(info)
+
+
+def _parse_tzif(data, until=None):
+    """Return transitions and infos of TZif `data`, rules of its footer
+    expanded through Gregorian year `until`, or :data:`RULES_UNTIL`."""
+    if data[:4] != b'TZif':
+        raise ValueError('not a TZif file')
+
+    def header(pos):
+        return struct.unpack('>6l', data[pos + 20:pos + 44])
+
+    isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = header(0)
+    size, pos = 4, 44
+    if data[4:5] != b'\0':
+        # skip version 1 block for the 64 bit one
+        pos += (timecnt * 5 + typecnt * 6 + charcnt + leapcnt * 8 +
+                isstdcnt + isutcnt)
+        isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = header(pos)
+        size, pos = 8, pos + 44
+    times = list(struct.unpack('>%d%s' % (timecnt, 'lq'[size == 8]),
+                               data[pos:pos + timecnt * size]))
+    pos += timecnt * size
+    indices = bytearray(data[pos:pos + timecnt])
+    pos += timecnt
+    types = [struct.unpack('>lBB', data[pos + 6 * i:pos + 6 * i + 6])
+             for i in range(typecnt)]
+    pos += typecnt * 6
+    chars = data[pos:pos + charcnt]
+    pos += (charcnt + leapcnt * (size + 4) + isstdcnt + isutcnt)
+
+    def name(i):
+        return chars[i:chars.index(b'\0', i)].decode('ascii')
+
+    dsts = _dst_parts([(offset, isdst) for offset, isdst, i in types],
+                      indices)
+    type_infos = [(offset, dsts[i], name(abbr))
+                  for i, (offset, isdst, abbr) in enumerate(types)]
+    infos = [type_infos[0]] + [type_infos[i] for i in indices]
+    if size == 8:
+        footer = data[pos:].strip(b'\n').split(b'\n')[0].decode('ascii')
+        _expand_rules(footer, times, infos,
+                      RULES_UNTIL if until is None else until)
+    # drop transitions changing nothing
+    res_times, res_infos = [], [infos[0]]
+    for t, info in zip(times, infos[1:]):
+        if info != res_infos[-1]:
+            res_times.append(t)
+            res_infos.append(info)
+    return res_times, res_infos
+
+
+def from_file(fileobj, key=None):
+    """Return :class:`JalaliZone` read from TZif file `fileobj`, a path or
+    binary file object, named `key`."""
+    if not hasattr(fileobj, 'read'):
+        with open(fileobj, 'rb') as f:
+            data = f.read()
+        if key is None:
+            key = fileobj
+    else:
+        data = fileobj.read()
+    times, infos = _parse_tzif(data)
+    return JalaliZone(key, times, infos)
+
+
+# Asia/Tehran before 1371, wall times of changes in offset before them:
+# year, month, day, seconds of day, offset, daylight saving part and name
+_TEHRAN_HISTORY = (
+    (1294, 10, 10, 0, 12344, 0, 'TMT'),
+    (1314, 3, 22, 0, 12600, 0, '+0330'),
+    (1356, 1, 1, 82800, 16200, 3600, '+0430'),
+    (1356, 7, 29, 0, 14400, 0, '+04'),
+    (1357, 1, 5, 0, 18000, 3600, '+05'),
+    (1357, 5, 14, 3600, 14400, 0, '+04'),
+    (1357, 8, 20, 0, 12600, 0, '+0330'),
+    (1358, 3, 6, 0, 16200, 3600, '+0430'),
+    (1358, 6, 28, 0, 12600, 0, '+0330'),
+    (1359, 1, 1, 0, 16200, 3600, '+0430'),
+    (1359, 7, 1, 0, 12600, 0, '+0330'),
+    (1370, 2, 13, 0, 16200, 3600, '+0430'),
+    (1370, 6, 31, 0, 12600, 0, '+0330'),
+)
+
+# years daylight saving time ran from 24:00 of 1 Farvardin to 24:00 of 30
+# Shahrivar
+_TEHRAN_DST_YEARS = list(range(1371, 1385)) + list(range(1387, 1402))
+
+
+def _tehran():
+    changes = list(_TEHRAN_HISTORY)
+    for year in _TEHRAN_DST_YEARS:
+        changes.append((year, 1, 1, DAY_SECONDS, 16200, 3600, '+0430'))
+        changes.append((year, 6, 30, DAY_SECONDS, 12600, 0, '+0330'))
+    infos = [(12344, 0, 'LMT')]
+    times = []
+    for year, month, day, seconds, offset, dst, name in changes:
+        times.append(pure.date_to_days(year, month, day) * DAY_SECONDS +
+                     seconds - infos[-1][0])
+        infos.append((offset, dst, name))
+    return JalaliZone('Asia/Tehran', times, infos)
+
+
+UTC = JalaliZone('UTC', [], [(0, 0, 'UTC')])
+TEHRAN = _tehran()
+
+_zones = {'UTC': UTC, 'Asia/Tehran': TEHRAN, 'Iran': TEHRAN}
+
+
+def zone(key):
+    """Return :class:`JalaliZone` named `key`, like ``'Europe/London'``,
+    read from first file of it in :data:`TZPATH` once and shared by later
+    calls.  ``'Asia/Tehran'`` and ``'UTC'`` are built in."""
+    tz = _zones.get(key)
+    if tz is not None:
+        return tz
+    path = os.path.normpath(key)
+    if os.path.isabs(path) or path.startswith(os.pardir):
+        raise ValueError('invalid zone key %r' % key)
+    for directory in TZPATH:
+        filename = os.path.join(directory, path)
+        if os.path.isfile(filename):
+            tz = _zones[key] = from_file(filename, key)
+            return tz
+    raise ValueError('unknown zone %r' % key)
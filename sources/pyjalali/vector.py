@@ -0,0 +1,582 @@
+"""
+    pyjalali.vector
+    ~~~~~~~~~~~~~~~
+
+    Bulk conversion between timestamps and Jalali date fields using NumPy.
+
+    Functions of this module work on whole arrays at once with integer
+    arithmetic and table lookups, instead of calling :func:`.jtime.jgmtime`
+    or :func:`.jtime.jmktime` for every element.  Results are equal to those
+    functions' in UTC.  NumPy is needed only by this module.
+
+    :class:`JalaliDateArray` and :class:`JalaliDatetimeArray` hold many
+    dates or datetimes in a typed array, working on all of them at once.
+
+    Like :mod:`.datetime` months and days of month start at 1.
+    :attr:`~jtm_fields.weekday` and :attr:`~jtm_fields.yday` follow
+    :class:`.types.struct_jtm`, Shanbeh and 1 Farvardin being 0.
+
+    >>> f = fields_from_timestamps([0, 1351859990])
+    >>> f.year.tolist(), f.month.tolist(), f.day.tolist()
+    ([1348, 1391], [10, 8], [11, 12])
+    >>> f.hour.tolist(), f.weekday.tolist(), f.yday.tolist()
+    ([0, 12], [5, 6], [286, 227])
+    >>> timestamps_from_fields(f.year, f.month, f.day, f.hour, f.minute,
+    ...                        f.second).tolist()
+    [0, 1351859990]
+    >>> import numpy
+    >>> t = numpy.array(['2012-11-02T12:39:50.5'], dtype='datetime64[us]')
+    >>> f = fields_from_timestamps(t)
+    >>> [int(a[0]) for a in f]
+    [1391, 8, 12, 12, 39, 50, 6, 227]
+    >>> [a.tolist() for a in days_to_dates([-1, 0, 15784])]
+    [[1348, 1348, 1391], [10, 10, 12], [10, 11, 30]]
+    >>> dates_to_days([1391, 1392], [12, 1], [31, 1]).tolist()
+    [15785, 15785]
+"""
+
+from __future__ import absolute_import
+import datetime as _std_datetime
+from collections import namedtuple
+
+import numpy
+
+from pyjalali import pure
+
+
+__all__ = ('jtm_fields', 'dates_to_days', 'days_to_dates',
+           'fields_from_timestamps', 'timestamps_from_fields', 'timestamps',
+           'JalaliDateArray', 'JalaliDatetimeArray')
+
+
+class jtm_fields(namedtuple('jtm_fields', 'year month day hour minute second '
+                                         'weekday yday')):
+    """Jalali date and time fields, each one an array of
+    :class:`numpy.int32` in shape of the converted array.
+    """
+    __slots__ = ()
+
+
+# seconds in datetime64 units, fractions as (1, divisor)
+_unit_seconds = {'W': 7 * pure.DAY_SECONDS, 'D': pure.DAY_SECONDS,
+                 'h': 3600, 'm': 60, 's': 1, 'ms': (1, 10 ** 3),
+                 'us': (1, 10 ** 6), 'ns': (1, 10 ** 9)}
+
+# Arrays are converted in chunks of this many elements, so temporaries of
+# each step stay in CPU cache.
+_CHUNK = 1 << 14
+
+_int32 = numpy.int32
+_int64 = numpy.int64
+
+
+class _tables(object):
+    """Lookup tables, built on first use."""
+    # days from UTC Epoch to 1 Farvardin of years in pyjalali.pure's year
+    # index, as int64 and int32
+    starts = starts32 = None
+    # month (1-12) and day of month of each day of year
+    yday_month = yday_mday = None
+    # days before each month (0-11)
+    acc = None
+
+    @classmethod
+    def build(cls):
+        cls.starts = numpy.array(pure._year_starts or
+                                 pure._build_year_index(), dtype=_int64)
+        cls.starts32 = cls.starts.astype(_int32)
+        mons = numpy.repeat(numpy.arange(12, dtype=_int32),
+                            pure.month_lengths[:11] + (30,))
+        cls.acc = numpy.array(pure.accumulated_month_lengths, dtype=_int64)
+        cls.yday_month = mons + 1
+        cls.yday_mday = (numpy.arange(366) - cls.acc[mons] + 1).astype(_int32)
+        return cls
+
+
+def _get_tables():
+    return _tables if _tables.starts is not None else _tables.build()
+
+
+def timestamps(values):
+    """Return an :class:`numpy.int64` array of seconds since UTC Epoch from
+    `values`, an array like of integer timestamps or of
+    :class:`numpy.datetime64`.  Fractions of seconds are floored, so every
+    moment stays in the second it falls in.
+    """
+    values = numpy.asarray(values)
+    if values.dtype.kind == 'M':
+        unit, count = numpy.datetime_data(values.dtype)
+        if unit not in _unit_seconds:
+            raise ValueError('unsupported datetime64 unit %r' % unit)
+        if numpy.isnat(values).any():
+            raise ValueError('NaT can not be converted')
+        res = values.view(_int64) * count
+        scale = _unit_seconds[unit]
+        if isinstance(scale, tuple):
+            return res // scale[1]
+        return res * scale
+    if values.dtype.kind not in 'iu':
+        raise TypeError('expected integer or datetime64 array, got %s' %
+                        values.dtype)
+    return values.astype(_int64, copy=False)
+
+
+# NumPy's % and divmod are several times slower than // by a scalar, so
+# remainders below are computed from floor division or looked up.
+
+def _years_from_days(days):
+    """Return year and day of year (0 based) int32 arrays of int64 `days`.
+    """
+    t = _get_tables()
+    starts = t.starts
+    if days.size and (days.min() < starts[0] or days.max() >= starts[-1]):
+        return _years_from_days_outside(days)
+    # Dividing by average year length never guesses a year after the right
+    # one and at most one year before it, for years of the index.
+    i = ((days - starts[0]) * 10000 // 3652422).astype(_int32)
+    days = days.astype(_int32)
+    i += days >= t.starts32.take(i + 1, mode='clip')
+    yday = days - t.starts32.take(i, mode='clip')
+    i += pure.INDEX_FIRST_YEAR
+    return i, yday
+
+
+def _years_from_days_outside(days):
+    starts = _get_tables().starts
+    outside = (days < starts[0]) | (days >= starts[-1])
+    i = ((days - starts[0]) * 10000 // 3652422).clip(0, len(starts) - 2)
+    i += days >= starts[i + 1]
+    i = i.clip(0, len(starts) - 2)
+    years, ydays = pure.INDEX_FIRST_YEAR + i, days - starts[i]
+    for k in numpy.flatnonzero(outside):
+        years.flat[k], ydays.flat[k] = pure._year_from_days(int(days.flat[k]))
+    return years.astype(_int32), ydays.astype(_int32)
+
+
+def _chunks(size):
+    return ((lo, lo + _CHUNK) for lo in range(0, size, _CHUNK))
+
+
+def days_to_dates(days):
+    """Return (year, month, day) :class:`numpy.int32` arrays of dates `days`
+    days after UTC Epoch.
+    """
+    days = numpy.asarray(days, dtype=_int64)
+    flat, t = days.ravel(), _get_tables()
+    out = numpy.empty((3, flat.size), dtype=_int32)
+    for lo, hi in _chunks(flat.size):
+        out[0, lo:hi], yday = _years_from_days(flat[lo:hi])
+        t.yday_month.take(yday, out=out[1, lo:hi], mode='clip')
+        t.yday_mday.take(yday, out=out[2, lo:hi], mode='clip')
+    return tuple(a.reshape(days.shape) for a in out)
+
+
+def dates_to_days(year, month, day):
+    """Return number of days since UTC Epoch of given dates as
+    :class:`numpy.int64` array.  Arguments are broadcast against each other,
+    `month` and `day` could overflow their ranges like
+    :func:`.jalali.jalali_update` allows.
+    """
+    year, month, day = numpy.broadcast_arrays(
+        numpy.asarray(year, dtype=_int64),
+        numpy.asarray(month, dtype=_int64) - 1,
+        numpy.asarray(day, dtype=_int64))
+    t = _get_tables()
+    years = month // 12
+    month = month - years * 12
+    i = year + years - pure.INDEX_FIRST_YEAR
+    inside = (i >= 0) & (i < len(t.starts))
+    if inside.all():
+        before = t.starts[i]
+    else:
+        before = t.starts[numpy.where(inside, i, 0)]
+        for k in numpy.flatnonzero(~inside):
+            before.flat[k] = pure.days_before_year(
+                int(i.flat[k]) + pure.INDEX_FIRST_YEAR)
+    return before + t.acc[month] + day - 1
+
+
+def _fill_fields(ts, out):
+    t = _get_tables()
+    days = ts // pure.DAY_SECONDS
+    secs = (ts - days * pure.DAY_SECONDS).astype(_int32)
+    out[0], yday = _years_from_days(days)
+    t.yday_month.take(yday, out=out[1], mode='clip')
+    t.yday_mday.take(yday, out=out[2], mode='clip')
+    numpy.floor_divide(secs, 3600, out=out[3])
+    mins = secs // 60
+    numpy.subtract(mins, out[3] * 60, out=out[4])
+    numpy.subtract(secs, mins * 60, out=out[5])
+    wday = days.astype(_int32)
+    wday += pure.EPOCH_WDAY
+    numpy.subtract(wday, wday // 7 * 7, out=out[6])
+    out[7] = yday
+
+
+def fields_from_timestamps(values):
+    """Convert UTC timestamps to Jalali date and time, same as calling
+    :func:`.jtime.jgmtime` on each element.
+
+    :param values: array like of integer timestamps or of
+        :class:`numpy.datetime64`, see :func:`timestamps`
+    :rtype: :class:`jtm_fields`
+    """
+    ts = timestamps(values)
+    flat = ts.ravel()
+    out = numpy.empty((8, flat.size), dtype=_int32)
+    for lo, hi in _chunks(flat.size):
+        _fill_fields(flat[lo:hi], out[:, lo:hi])
+    return jtm_fields(*(a.reshape(ts.shape) for a in out))
+
+
+def timestamps_from_fields(year, month, day, hour=0, minute=0, second=0):
+    """Return UTC timestamps of given Jalali dates and times as
+    :class:`numpy.int64` array, same as :func:`.jtime.jmktime` on
+    :class:`.types.struct_jtm` objects with zero
+    :attr:`~.types.struct_jtm.tm_gmtoff`.  Arguments are broadcast against
+    each other and could overflow their ranges.
+    """
+    days = dates_to_days(year, month, day)
+    return (days * pure.DAY_SECONDS +
+            numpy.asarray(hour, dtype=numpy.int64) * 3600 +
+            numpy.asarray(minute, dtype=numpy.int64) * 60 +
+            numpy.asarray(second, dtype=numpy.int64))
+
+
+class _JalaliArray(object):
+    """Base of :class:`JalaliDateArray` and :class:`JalaliDatetimeArray`,
+    wrapping one dimensional NumPy array `values` of type `dtype`.  Arrays
+    of that type are kept as they are, not copied."""
+
+    dtype = None
+    # unit of timedelta64 differences
+    _delta_unit = None
+
+    def __init__(self, values):
+        values = numpy.asarray(values)
+        if values.dtype != self.dtype:
+            if values.dtype.kind not in 'iu' and values.size:
+                raise TypeError('expected integer array, got %s' %
+                                values.dtype)
+            values = values.astype(self.dtype)
+        if values.ndim != 1:
+            raise ValueError('expected one dimensional array')
+        self.values = values
+
+    @classmethod
+    def frombuffer(cls, buffer):
+        """Make array viewing `buffer` of native values, without copying."""
+        return cls(numpy.frombuffer(buffer, dtype=cls.dtype))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        box = self._box
+        return (box(v) for v in self.values.tolist())
+
+    def __getitem__(self, index):
+        v = self.values[index]
+        if isinstance(v, numpy.ndarray):
+            return self.__class__(v)
+        return self._box(int(v))
+
+    def __repr__(self):
+        items = ', '.join(str(v) for v in self[:3])
+        if len(self) > 3:
+            items += ', ...'
+        return '<%s [%s], length %d>' % (self.__class__.__name__, items,
+                                          len(self))
+
+    def _other(self, other):
+        """Return values of an element, array of same type or array like
+        values to compare with."""
+        if isinstance(other, self.__class__):
+            return other.values
+        if isinstance(other, self._scalar):
+            return self._unbox(other)
+        return numpy.asarray(other)
+
+    def _shift(self, delta, sign):
+        if not isinstance(delta, _timedelta):
+            return NotImplemented
+        return self.__class__(self.values + sign * self._steps(delta))
+
+    def __add__(self, delta):
+        return self._shift(delta, 1)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, _timedelta):
+            return self._shift(other, -1)
+        if isinstance(other, (self.__class__, self._scalar)):
+            return (self.values - self._other(other)).astype(
+                'timedelta64[%s]' % self._delta_unit)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return self.values == self._other(other)
+
+    def __ne__(self, other):
+        return self.values != self._other(other)
+
+    def __lt__(self, other):
+        return self.values < self._other(other)
+
+    def __le__(self, other):
+        return self.values <= self._other(other)
+
+    def __gt__(self, other):
+        return self.values > self._other(other)
+
+    def __ge__(self, other):
+        return self.values >= self._other(other)
+
+    def searchsorted(self, value, side='left'):
+        """Return indexes where `value`, an element or an array of them,
+        would be inserted to keep sorted array in order, like
+        :func:`numpy.searchsorted`."""
+        return numpy.searchsorted(self.values, self._other(value), side)
+
+    def argsort(self):
+        return numpy.argsort(self.values, kind='stable')
+
+    def sort(self):
+        """Return sorted copy of array."""
+        return self.__class__(numpy.sort(self.values))
+
+    def _days(self):
+        """Return int64 days since UTC Epoch of elements."""
+        raise NotImplementedError
+
+    def _dates(self):
+        """Return year, month, day and day of year (0 based) arrays."""
+        t = _get_tables()
+        year, yday = _years_from_days(self._days())
+        return (year, t.yday_month.take(yday, mode='clip'),
+                t.yday_mday.take(yday, mode='clip'), yday)
+
+    def _times(self):
+        """Return hour, minute and second lists."""
+        zeros = [0] * len(self)
+        return zeros, zeros, zeros
+
+    @property
+    def year(self):
+        return self._dates()[0]
+
+    @property
+    def month(self):
+        return self._dates()[1]
+
+    @property
+    def day(self):
+        return self._dates()[2]
+
+    @property
+    def weekday(self):
+        """Day of week of elements, Shanbeh being 0."""
+        wday = self._days() + pure.EPOCH_WDAY
+        return (wday - wday // 7 * 7).astype(_int32)
+
+    def strftime(self, format):
+        """Return :class:`numpy.ndarray` of strings of elements formatted by
+        `format`, see :mod:`.formatting`.  Each distinct value is formatted
+        once."""
+        from pyjalali.formatting import compile_format
+        render = compile_format(format)
+        if not len(self):
+            return numpy.array([], dtype=type(format))
+        unique, inverse = numpy.unique(self.values, return_inverse=True)
+        unique = self.__class__(unique)
+        # naive values, no zone
+        zeros = [0] * len(unique)
+        year, month, day, yday = (a.tolist() for a in unique._dates())
+        columns = ([year, month, day] + list(unique._times()) +
+                   [unique.weekday.tolist(), yday, zeros, zeros,
+                    [None] * len(unique)])
+        texts = list(map(render, *columns))
+        return numpy.array(texts)[inverse.ravel()]
+
+
+_timedelta = _std_datetime.timedelta
+
+
+class JalaliDateArray(_JalaliArray):
+    """Jalali dates held by their proleptic Gregorian ordinals (see
+    :meth:`.datetime.date.toordinal`) in an :class:`numpy.int32` array, 4
+    bytes per date.  Elements are :class:`.datetime.date` objects.  Adding
+    a :class:`python:datetime.timedelta` shifts by its days, subtracting
+    two gives ``timedelta64[D]`` array, comparisons give boolean arrays.
+
+    >>> from pyjalali.datetime import date
+    >>> a = JalaliDateArray.from_dates([date(1392, 12, 29), date(1393, 1, 1)])
+    >>> a[1], (a + _timedelta(days=1))[0]
+    (pyjalali.datetime.date(1393, 1, 1), pyjalali.datetime.date(1393, 1, 1))
+    >>> a.year.tolist(), a.month.tolist(), a.weekday.tolist()
+    ([1392, 1393], [12, 1], [5, 6])
+    >>> (a >= date(1393, 1, 1)).tolist(), int(a.searchsorted(a[1]))
+    ([False, True], 1)
+    >>> a.strftime('%Y/%m/%d').tolist()
+    ['1392/12/29', '1393/01/01']
+    >>> JalaliDateArray.from_fields([1392], [1], [1]).to_datetime64()
+    array(['2013-03-21'], dtype='datetime64[D]')
+    """
+
+    dtype = numpy.dtype(_int32)
+    _delta_unit = 'D'
+
+    @property
+    def _scalar(self):
+        from pyjalali.datetime import date
+        return date
+
+    @staticmethod
+    def _box(ordinal):
+        from pyjalali.datetime import date
+        return date.fromordinal(ordinal)
+
+    @staticmethod
+    def _unbox(d):
+        return d.toordinal()
+
+    @staticmethod
+    def _steps(delta):
+        return delta.days
+
+    def _days(self):
+        return self.values.astype(_int64) - pure.EPOCH_ORDINAL
+
+    @classmethod
+    def from_dates(cls, dates):
+        """Make array of :class:`.datetime.date` objects, or anything with
+        proleptic Gregorian ``toordinal``."""
+        return cls(numpy.fromiter((d.toordinal() for d in dates), _int32))
+
+    @classmethod
+    def from_fields(cls, year, month, day):
+        """Make array of Jalali dates given by arrays of their fields, see
+        :func:`dates_to_days`."""
+        return cls(numpy.ravel(dates_to_days(year, month, day) +
+                               pure.EPOCH_ORDINAL))
+
+    @classmethod
+    def from_datetime64(cls, values):
+        """Make array of days of :class:`numpy.datetime64` array, in UTC."""
+        days = timestamps(values) // pure.DAY_SECONDS
+        return cls(numpy.ravel(days + pure.EPOCH_ORDINAL))
+
+    def toordinals(self):
+        return self.values
+
+    def to_datetime64(self):
+        """Return days as ``datetime64[D]`` array."""
+        return self._days().astype('datetime64[D]')
+
+
+class JalaliDatetimeArray(_JalaliArray):
+    """Naive Jalali datetimes held by microseconds since Epoch in an
+    :class:`numpy.int64` array, 8 bytes per datetime.  Elements are
+    :class:`.datetime.datetime` objects, otherwise it's like
+    :class:`JalaliDateArray`, differences being ``timedelta64[us]``.
+
+    >>> from pyjalali.datetime import datetime
+    >>> a = JalaliDatetimeArray.from_datetimes([datetime(1392, 12, 29, 23)])
+    >>> (a + _timedelta(hours=1, microseconds=5))[0]
+    pyjalali.datetime.datetime(1393, 1, 1, 0, 0, 0, 5)
+    >>> a.hour.tolist(), a.day.tolist()
+    ([23], [29])
+    >>> a.strftime('%Y/%m/%d %H:%M').tolist()
+    ['1392/12/29 23:00']
+    >>> a.date()[0]
+    pyjalali.datetime.date(1392, 12, 29)
+    """
+
+    dtype = numpy.dtype(_int64)
+    _delta_unit = 'us'
+
+    @property
+    def _scalar(self):
+        from pyjalali.datetime import datetime
+        return datetime
+
+    @staticmethod
+    def _box(us):
+        from pyjalali.datetime import _new_datetime
+        days, us = divmod(us, pure.DAY_SECONDS * 1000000)
+        seconds, us = divmod(us, 1000000)
+        y, m, d = pure.days_to_date(days)
+        return _new_datetime(days + pure.EPOCH_ORDINAL, y, m, d, seconds, us,
+                             None)
+
+    @staticmethod
+    def _unbox(dt):
+        if dt.tzinfo is not None:
+            raise TypeError('JalaliDatetimeArray holds naive datetimes')
+        return ((dt.toordinal() - pure.EPOCH_ORDINAL) * pure.DAY_SECONDS +
+                dt.hour * 3600 + dt.minute * 60 + dt.second) * 1000000 + \
+            dt.microsecond
+
+    @staticmethod
+    def _steps(delta):
+        return ((delta.days * pure.DAY_SECONDS + delta.seconds) * 1000000 +
+                delta.microseconds)
+
+    def _days(self):
+        return self.values // (pure.DAY_SECONDS * 1000000)
+
+    def _seconds_of_day(self):
+        return ((self.values - self._days() * (pure.DAY_SECONDS * 1000000)) //
+                1000000).astype(_int32)
+
+    @classmethod
+    def from_datetimes(cls, datetimes):
+        """Make array of naive :class:`.datetime.datetime` objects."""
+        return cls(numpy.fromiter((cls._unbox(d) for d in datetimes),
+                                  _int64))
+
+    @classmethod
+    def from_datetime64(cls, values):
+        """Make array of :class:`numpy.datetime64` array, in UTC.  Units
+        finer than microseconds are floored."""
+        values = numpy.ravel(values)
+        if values.dtype.kind != 'M':
+            raise TypeError('expected datetime64 array, got %s' %
+                            values.dtype)
+        return cls(values.astype('datetime64[us]').view(_int64))
+
+    @classmethod
+    def from_timestamps(cls, values):
+        """Make array of UTC datetimes of integer POSIX timestamps."""
+        return cls(numpy.ravel(timestamps(values)) * 1000000)
+
+    def to_datetime64(self):
+        """Return datetimes as ``datetime64[us]`` array."""
+        return self.values.view('datetime64[us]')
+
+    def date(self):
+        """Return :class:`JalaliDateArray` of days of datetimes."""
+        return JalaliDateArray(self._days() + pure.EPOCH_ORDINAL)
+
+    def _times(self):
+        return tuple(a.tolist() for a in (self.hour, self.minute,
+                                           self.second))
+
+    @property
+    def hour(self):
+        return self._seconds_of_day() // 3600
+
+    @property
+    def minute(self):
+        return self._seconds_of_day() // 60 % 60
+
+    @property
+    def second(self):
+        return self._seconds_of_day() % 60
+
+    @property
+    def microsecond(self):
+        return (self.values % 1000000).astype(_int32)
@@ -21,8 +21,13 @@
 #ifndef _XOPEN_SOURCE
 #define _XOPEN_SOURCE
 #endif
+/* tm_gmtoff and tm_zone of struct tm */
+#ifndef _DEFAULT_SOURCE
+#define _DEFAULT_SOURCE
+#endif
 
 #include <getopt.h>
+#include <limits.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -31,6 +36,7 @@
 #include <time.h>
 
 #include "../libjalali/jalali.h"
+#include "../libjalali/jconfig.h"
 #include "../libjalali/jtime.h"
 #include "jdate.h"
 
@@ -57,6 +63,198 @@ int mod_time(const char *path, time_t *t, int a) {
   return 0;
 }
 
+/*
+ * Days since UTC Epoch of a proleptic gregorian date and back, month being
+ * 1 to 12. Overflowing days of month are carried over.
+ */
+static int days_from_civil(int y, int m, int d) {
+  int era, yoe, doy;
+
+  y -= m <= 2;
+  era = (y >= 0 ? y : y - 399) / 400;
+  yoe = y - era * 400;
+  doy = (153 * (m > 2 ? m - 3 : m + 9) + 2) / 5 + d - 1;
+
+  return era * 146097 + yoe * 365 + yoe / 4 - yoe / 100 + doy - 719468;
+}
+
+static void civil_from_days(int p, struct tm *g) {
+  int era, doe, yoe, doy, mp;
+  int z = p + 719468;
+
+  era = (z >= 0 ? z : z - 146096) / 146097;
+  doe = z - era * 146097;
+  yoe = (doe - doe / 1460 + doe / 36524 - doe / 146096) / 365;
+  doy = doe - (365 * yoe + yoe / 4 - yoe / 100);
+  mp = (5 * doy + 2) / 153;
+
+  g->tm_mday = doy - (153 * mp + 2) / 5 + 1;
+  g->tm_mon = mp < 10 ? mp + 2 : mp - 10;
+  g->tm_year = yoe + era * 400 + (g->tm_mon < 2) - 1900;
+  g->tm_wday = ((p + 4) % 7 + 7) % 7;
+  g->tm_yday = p - days_from_civil(g->tm_year + 1900, 1, 1);
+}
+
+/*
+ * Local zone offset at start of day p, from libjalali's cache.
+ */
+static long int zone_gmtoff(int p) {
+  struct jtm z;
+
+  jalali_get_date(p, &z);
+  return z.tm_gmtoff;
+}
+
+/*
+ * Seconds since UTC Epoch of l, a local time counted in seconds since
+ * Epoch, on a day the local zone changes, before being the offset at start
+ * of the previous day. Times a change skips take the offset before it, as
+ * mktime() does with tm_isdst of -1, so they move forward. Times a change
+ * repeats take their first occurrence.
+ */
+static time_t zone_change_time(time_t l, long int before) {
+  struct jtm z;
+  long int after;
+  time_t t = l - before, u;
+
+  jlocaltime_r(&t, &z);
+  if (z.tm_gmtoff != before) {
+    /* after a change, unless l is skipped by it */
+    after = z.tm_gmtoff;
+    u = l - after;
+    jlocaltime_r(&u, &z);
+    if (z.tm_gmtoff == after)
+      t = u;
+  }
+  return t;
+}
+
+/*
+ * Batch mode. Converts a date on each line of in, parsed by in_format, and
+ * writes it formatted by out_format to stdout, fully buffered. Lines are
+ * jalali dates unless action->batch_jalali is set, output is jalali unless
+ * action->batch_gregorian is. Dates are taken in local time and converted
+ * by day numbers, never calling mktime() or jmktime(), so that local zone
+ * offsets come from libjalali's cache instead of a tzset() per line. Only
+ * lines on days when the zone changes ask localtime_r() for their offset.
+ * Lines longer than MAX_BUF_SIZE are skipped and reported.
+ * Returns 0 if all lines could be parsed, 1 otherwise.
+ */
+static int batch(FILE *in, const char *in_format, const char *out_format,
+                 const struct jdate_action *action) {
+  char line[MAX_BUF_SIZE];
+  char buf[MAX_BUF_SIZE];
+  struct jtm j;
+  struct tm g;
+  size_t n;
+  int p, secs, c, zone_change, status = 0;
+  long int gmtoff;
+  time_t t;
+
+  setvbuf(stdout, 0, _IOFBF, 1 << 16);
+
+  while (fgets(line, MAX_BUF_SIZE, in)) {
+    n = strlen(line);
+    if (n == MAX_BUF_SIZE - 1 && line[n - 1] != '\n' && !feof(in)) {
+      /* discards rest of the line */
+      while ((c = getc(in)) != EOF && c != '\n')
+        ;
+      fprintf(stderr, "jdate: line too long '%.32s...'\n", line);
+      status = 1;
+      continue;
+    }
+    if (n && line[n - 1] == '\n')
+      line[--n] = 0;
+    if (n && line[n - 1] == '\r')
+      line[--n] = 0;
+
+    memset(&j, 0, sizeof(struct jtm));
+    memset(&g, 0, sizeof(struct tm));
+
+    if (action->batch_jalali) {
+      if (!n || !strptime(line, in_format, &g)) {
+        fprintf(stderr, "jdate: invalid date '%s'\n", line);
+        status = 1;
+        continue;
+      }
+      p = days_from_civil(g.tm_year + 1900, g.tm_mon + 1, g.tm_mday);
+      secs = g.tm_hour * J_HOUR_LENGTH_IN_SECONDS +
+             g.tm_min * J_MINUTE_LENGTH_IN_SECONDS + g.tm_sec;
+    } else {
+      if (!n || !jstrptime(line, in_format, &j)) {
+        fprintf(stderr, "jdate: invalid date '%s'\n", line);
+        status = 1;
+        continue;
+      }
+      /* normalizes fields, carrying seconds over to days */
+      jalali_update(&j);
+      p = jalali_get_diff(&j);
+      secs = j.tm_hour * J_HOUR_LENGTH_IN_SECONDS +
+             j.tm_min * J_MINUTE_LENGTH_IN_SECONDS + j.tm_sec;
+    }
+
+    /* zone fields of local day p */
+    jalali_get_date(p, &j);
+    gmtoff = j.tm_gmtoff;
+    t = (time_t)p * J_DAY_LENGTH_IN_SECONDS + secs;
+    zone_change = zone_gmtoff(p - 1) != gmtoff || zone_gmtoff(p + 1) != gmtoff;
+    if (zone_change)
+      t = zone_change_time(t, zone_gmtoff(p - 1));
+    else
+      t -= gmtoff;
+
+    if (action->utc) {
+      p = (int)((t >= 0 ? t : t - J_DAY_LENGTH_IN_SECONDS + 1) /
+                J_DAY_LENGTH_IN_SECONDS);
+      secs = (int)(t - (time_t)p * J_DAY_LENGTH_IN_SECONDS);
+      jalali_get_date(p, &j);
+      j.tm_isdst = 0;
+      j.tm_gmtoff = 0;
+      j.tm_zone = "UTC";
+    } else if (zone_change) {
+      /* zone changes about day p, so its offset at t is asked for */
+      if (action->batch_gregorian)
+        localtime_r(&t, &g);
+      else
+        jlocaltime_r(&t, &j);
+      p = INT_MIN;
+    }
+
+    if (action->batch_gregorian) {
+      if (p != INT_MIN) {
+        civil_from_days(p, &g);
+        g.tm_hour = secs / J_HOUR_LENGTH_IN_SECONDS;
+        g.tm_min = secs / J_MINUTE_LENGTH_IN_SECONDS % 60;
+        g.tm_sec = secs % J_MINUTE_LENGTH_IN_SECONDS;
+        g.tm_isdst = j.tm_isdst;
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+        g.tm_gmtoff = j.tm_gmtoff;
+        g.tm_zone = j.tm_zone;
+#endif
+      }
+      strftime(buf, MAX_BUF_SIZE, out_format, &g);
+    } else {
+      if (p != INT_MIN) {
+        j.tm_hour = secs / J_HOUR_LENGTH_IN_SECONDS;
+        j.tm_min = secs / J_MINUTE_LENGTH_IN_SECONDS % 60;
+        j.tm_sec = secs % J_MINUTE_LENGTH_IN_SECONDS;
+      }
+      jstrftime(buf, MAX_BUF_SIZE, out_format, &j);
+    }
+
+    fputs(buf, stdout);
+    putchar('\n');
+  }
+
+  if (ferror(in)) {
+    perror("jdate");
+    status = 1;
+  }
+
+  fflush(stdout);
+  return status;
+}
+
 int main(int argc, char **argv) {
   int opt;
   int i;
@@ -80,6 +278,10 @@ int main(int argc, char **argv) {
                                   {UTC_OPT, 0, 0, 'u'},
                                   {JALALI_OPT, 1, 0, 'j'},
                                   {GREGORIAN_OPT, 1, 0, 'g'},
+                                  {FILE_OPT, 1, 0, 'f'},
+                                  {INPUT_FORMAT_OPT, 1, 0, 'i'},
+                                  {BATCH_JALALI_OPT, 0, 0, 'J'},
+                                  {BATCH_GREGORIAN_OPT, 0, 0, 'G'},
                                   {UNIVERSAL_OPT, 0, 0, 'u'},
                                   {HELP_OPT, 0, 0, 'h'},
                                   {VERSION_OPT, 0, 0, 'V'},
@@ -124,6 +326,29 @@ int main(int argc, char **argv) {
       action.jalali_ptr = optarg;
       break;
 
+      /* convert a date on each line of a file. */
+    case 'f':
+      action.batch = 1;
+      action.batch_ptr = optarg;
+      break;
+
+      /* input format of lines of a file. */
+    case 'i':
+      action.input_ptr = optarg;
+      break;
+
+      /* lines of a file are gregorian dates, converted to jalali. */
+    case 'J':
+      action.batch_jalali = 1;
+      action.batch_gregorian = 0;
+      break;
+
+      /* lines of a file are jalali dates, converted to gregorian. */
+    case 'G':
+      action.batch_gregorian = 1;
+      action.batch_jalali = 0;
+      break;
+
       /*
        * output date and time in RFC 2822 format.
        * %h, %m %b %Y %H:%M:%S %z
@@ -177,6 +402,35 @@ int main(int argc, char **argv) {
   /*
    *@action_handlers
    */
+  if (action.batch && !action.help && !action.version) {
+    FILE *in = stdin;
+    const char *out_format;
+
+    if (strcmp(action.batch_ptr, "-")) {
+      in = fopen(action.batch_ptr, "r");
+      if (!in) {
+        fprintf(stderr, "jdate: %s: No such file or directory\n",
+                action.batch_ptr);
+        exit(EXIT_FAILURE);
+      }
+    }
+
+    if (action.rfc2822)
+      out_format = action.batch_gregorian ? "%a, %d %b %Y %H:%M:%S %z"
+                                          : "%h, %d %b %Y %H:%M:%S %z";
+    else if (action.format)
+      out_format = action.format_ptr;
+    else
+      out_format = action.batch_gregorian ? "%a %b %d %H:%M:%S %Z %Y"
+                                          : "%h %b %d %H:%M:%S %Z %Y";
+
+    err = batch(in, action.input_ptr ? action.input_ptr : "%Y/%m/%d",
+                out_format, &action);
+    if (in != stdin)
+      fclose(in);
+    exit(err ? EXIT_FAILURE : EXIT_SUCCESS);
+  }
+
   if (action.jalali) {
     if (!strptime(action.jalali_ptr, "%Y/%m/%d", &g)) {
       fprintf(stderr, "Specify gregorian date in the following format\n");
@@ -24,7 +24,7 @@
 #define JDATE_VERSION "0.5.1"
 
 /* short options */
-#define JDATE_VALID_ARGS "a:r:d:j:g:RuhV"
+#define JDATE_VALID_ARGS "a:r:d:j:g:f:i:JGRuhV"
 
 /* long options */
 #define DATE_OPT "date"
@@ -32,6 +32,10 @@
 #define ACC_OPT "access"
 #define JALALI_OPT "jalali"
 #define GREGORIAN_OPT "gregorian"
+#define FILE_OPT "file"
+#define INPUT_FORMAT_OPT "input-format"
+#define BATCH_JALALI_OPT "batch-jalali"
+#define BATCH_GREGORIAN_OPT "batch-gregorian"
 #define RFC2822_OPT "rfc-2822"
 #define UTC_OPT "utc"
 #define UNIVERSAL_OPT "universal"
@@ -42,6 +46,7 @@
 #define HELP_STR                                                               \
   "Usage: jdate [arRuhV]... [+OUTPUT_FORMAT]\
 [d INPUT_FORMAT;DATE_STRING]\n\
+  or:  jdate -f FILE [-i INPUT_FORMAT] [JGRu]... [+OUTPUT_FORMAT]\n\
 Display the current date and time in the given FORMAT.\n\
 \n\
   -d, --date=FORMAT;STRING\tdisplay time described by STRING, not `now'\n\
@@ -50,6 +55,12 @@ Display the current date and time in the given FORMAT.\n\
 \n\
   -j, --jalali=%Y/%m/%d\t\tconverts a gregorian date to jalali.\n\
   -g, --gregorian=%Y/%m/%d\tconverts a jalali date to gregorian.\n\
+\n\
+  -f, --file=FILE\t\tlike --date once for each line of FILE, '-' being\n\
+\t\t\t\tstandard input.\n\
+  -i, --input-format=FORMAT\tformat of lines of FILE (default %Y/%m/%d).\n\
+  -J, --batch-jalali\t\tlines of FILE are gregorian, converts to jalali.\n\
+  -G, --batch-gregorian\t\tlines of FILE are jalali, converts to gregorian.\n\
 \n\
   -R, --rfc-2822\t\toutput date and time in RFC 2822 format.\n\
 \t\t\t\tExample: Jom, 06 Khor 1390 13:44:56 -0430.\n\
@@ -122,6 +133,11 @@ struct jdate_action {
   char *jalali_ptr;    /* jalali conversion argument */
   int gregorian;       /* convert a jalali date to gregorian */
   char *gregorian_ptr; /* gregorian conversion argument */
+  int batch;           /* convert each line of a file */
+  char *batch_ptr;     /* file argument, '-' for stdin */
+  char *input_ptr;     /* input format of lines */
+  int batch_jalali;    /* lines are gregorian dates, converted to jalali */
+  int batch_gregorian; /* lines are jalali dates, converted to gregorian */
   int format;          /* +FORMAT. uses jstrftime() to format output */
   char *format_ptr;    /* +FORMAT argument */
   int rfc2822;         /* rfc2822 date and time: %h, %m %b %Y %H:%M:%S %z */
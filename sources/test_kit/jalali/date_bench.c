@@ -0,0 +1,68 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#include "jalali.h"
+
+static const int years[] = {1,    475,  1000, 1348, 1403,
+                            2000, 4000, 6000, 8000, 9999};
+
+static double elapsed_ns(const struct timespec *s, const struct timespec *e) {
+  return (e->tv_sec - s->tv_sec) * 1e9 + (e->tv_nsec - s->tv_nsec);
+}
+
+int main(int argc, char **argv) {
+  if (argc > 2) {
+    printf("wrong arguments given\n");
+    printf("date_bench: per call cost of day number conversions by year\n");
+    printf("usage: date_bench [ITERATIONS]\n");
+    exit(1);
+  }
+
+  int n = (argc == 2) ? atoi(argv[1]) : 100000;
+  int i, k, p;
+  struct jtm j;
+  struct timespec s, e;
+  double diff_ns, date_ns, update_ns;
+
+  if (n < 1)
+    n = 1;
+
+  printf("%6s %12s %12s %12s\n", "year", "get_diff", "get_date", "update");
+
+  for (k = 0; k < (int)(sizeof(years) / sizeof(years[0])); k++) {
+    j.tm_year = years[k];
+    j.tm_mon = 5;
+    j.tm_mday = 17;
+    j.tm_hour = j.tm_min = j.tm_sec = 0;
+    jalali_create_days_from_date(&j);
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i = 0, p = 0; i < n; i++)
+      p += jalali_get_diff(&j);
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    diff_ns = elapsed_ns(&s, &e) / n;
+
+    p = jalali_get_diff(&j);
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i = 0; i < n; i++)
+      jalali_get_date(p, &j);
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    date_ns = elapsed_ns(&s, &e) / n;
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i = 0; i < n; i++) {
+      j.tm_year = years[k];
+      j.tm_mon = 5;
+      j.tm_mday = 17 + (i & 0x3f);
+      jalali_update(&j);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    update_ns = elapsed_ns(&s, &e) / n;
+
+    printf("%6d %9.1f ns %9.1f ns %9.1f ns\n", years[k], diff_ns, date_ns,
+           update_ns);
+  }
+
+  exit(0);
+}
@@ -11,11 +11,11 @@ int main(int argc, char **argv) {
   }
 
   struct ab_jtm a;
-  int s;
-  s = atoi(argv[1]);
+  time_t s;
+  s = (time_t)strtoll(argv[1], 0, 10);
   jalali_create_time_from_secs(s, &a);
-  printf("%d secs passed, time created: %d days, %02d:%02d:%02d.\n", s,
-         a.ab_days, a.ab_hour, a.ab_min, a.ab_sec);
+  printf("%lld secs passed, time created: %d days, %02d:%02d:%02d.\n",
+         (long long)s, a.ab_days, a.ab_hour, a.ab_min, a.ab_sec);
 
   exit(0);
 }
@@ -0,0 +1,71 @@
+#!/bin/sh
+#
+# Checks batch mode of jdate, -f with -i, -J, -G and -u, against known
+# conversions in Asia/Tehran, around the start and end of daylight saving
+# time in 1399. JDATE is the jdate to run.
+
+JDATE=${JDATE:-../../src/jdate}
+status=0
+
+# check NAME EXPECTED_STATUS EXPECTED_OUTPUT INPUT [ARGUMENT]...
+check() {
+  name=$1
+  expected_status=$2
+  expected=$3
+  input=$4
+  shift 4
+  got=$(printf '%s\n' "$input" | TZ=Asia/Tehran "$JDATE" -f - "$@" 2>&1)
+  got_status=$?
+  if [ "$got" != "$expected" ] || [ "$got_status" != "$expected_status" ]; then
+    echo "FAIL: $name"
+    echo "expected ($expected_status):"
+    echo "$expected"
+    echo "got ($got_status):"
+    echo "$got"
+    status=1
+  fi
+}
+
+check "jalali to jalali" 0 \
+"1392/01/01 Thursday
+1391/12/30 Wednesday" \
+"1392/01/01
+1391/12/30" '+%Y/%m/%d %A'
+
+# 1399/01/02 00:00 to 01:00 is skipped, 1399/06/30 23:00 to 24:00 repeated
+check "jalali to gregorian" 0 \
+"2020-03-20 23:59 +0330
+2020-03-21 01:30 +0430
+2020-03-21 01:00 +0430
+2020-09-20 23:30 +0430
+2020-09-21 00:00 +0330" \
+"1399/01/01 23:59
+1399/01/02 00:30
+1399/01/02 01:00
+1399/06/30 23:30
+1399/06/31 00:00" -i '%Y/%m/%d %H:%M' -G '+%Y-%m-%d %H:%M %z'
+
+check "gregorian to jalali" 0 \
+"1399/01/02 01:30 +0430
+1391/12/30 00:00 +0330
+1399/06/31 00:00 +0330" \
+"2020-03-21 00:30
+2013-03-20 00:00
+2020-09-21 00:00" -i '%Y-%m-%d %H:%M' -J '+%Y/%m/%d %H:%M %z'
+
+check "utc" 0 \
+"2020-03-21 07:30 +0000
+2020-03-20 20:29 +0000" \
+"1399/01/02 12:00
+1399/01/01 23:59" -i '%Y/%m/%d %H:%M' -G -u '+%Y-%m-%d %H:%M %z'
+
+long=$(printf '%03000d' 0)
+check "invalid lines" 1 \
+"jdate: invalid date 'not a date'
+jdate: line too long '00000000000000000000000000000000...'
+1392/01/02" \
+"not a date
+$long
+1392/01/02" '+%Y/%m/%d'
+
+exit $status
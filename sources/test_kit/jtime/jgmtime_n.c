@@ -0,0 +1,41 @@
+#include <stdio.h>
+#include <time.h>
+
+#include "jalali.h"
+#include "jtime.h"
+
+#define N 8
+
+static int differ(const struct jtm *a, const struct jtm *b) {
+  return a->tm_sec != b->tm_sec || a->tm_min != b->tm_min ||
+         a->tm_hour != b->tm_hour || a->tm_mday != b->tm_mday ||
+         a->tm_mon != b->tm_mon || a->tm_year != b->tm_year ||
+         a->tm_wday != b->tm_wday || a->tm_yday != b->tm_yday ||
+         a->tm_isdst != b->tm_isdst || a->tm_gmtoff != b->tm_gmtoff ||
+         a->tm_zone != b->tm_zone;
+}
+
+int main() {
+  long long times[N];
+  struct jtm gm[N], local[N], j;
+  time_t t;
+  int i, bad = 0;
+
+  time(&t);
+  for (i = 0; i < N; i++)
+    times[i] = (long long)t + (long long)i * 40000000;
+
+  jgmtime_n(times, gm, N);
+  jlocaltime_n(times, local, N);
+  for (i = 0; i < N; i++) {
+    t = (time_t)times[i];
+    jalali_show_time(&gm[i]);
+    jgmtime_r(&t, &j);
+    bad += differ(&j, &gm[i]);
+    jlocaltime_r(&t, &j);
+    bad += differ(&j, &local[i]);
+  }
+
+  printf("%d mismatches\n", bad);
+  return bad != 0;
+}